@@ -6,7 +6,7 @@ from modules.pattern_learning import PatternLearner  # v0.3.0 模式学习
 from modules.tool_manager import get_tool_registry  # v0.4.0 工具管理
 from modules.enhanced_intent import EnhancedToolSelector, ContextEnhancer
 from modules.dialogue_enhancer import DialogueEnhancer  # v0.6.0
-from modules.task_manager import TaskManager  # v0.8.0 任务管理
+from modules.task_manager import get_task_manager  # v0.8.0 任务管理
 from error_handler import (
     retry_with_backoff, log_execution, handle_api_errors,
     logger
@@ -93,15 +93,8 @@ class XiaoLeAgent:
         self.context_enhancer = ContextEnhancer(self.memory, self.conversation)
         self.dialogue_enhancer = DialogueEnhancer()  # Day 4: 对话质量
 
-        # v0.8.0 任务管理器
-        db_config = {
-            'host': os.getenv('DB_HOST'),
-            'port': int(os.getenv('DB_PORT', 5432)),
-            'database': os.getenv('DB_NAME'),
-            'user': os.getenv('DB_USER'),
-            'password': os.getenv('DB_PASS')
-        }
-        self.task_manager = TaskManager(db_config)
+        # v0.8.0 任务管理器（与路由、工具共用同一实例，读缓存才能被写入及时失效）
+        self.task_manager = get_task_manager()
 
         # v0.8.0 任务执行器(延迟导入避免循环依赖)
         from modules.task_executor import TaskExecutor
@@ -145,25 +138,29 @@ class XiaoLeAgent:
     def _register_tools(self):
         """注册所有可用工具"""
         try:
-            from tools import (
-                weather_tool, system_info_tool,
-                time_tool, calculator_tool, reminder_tool,
-                search_tool, file_tool, delete_memory_tool,
-                task_tool, vision_tool, register_face_tool
+            from tools.weather_tool import weather_tool
+            from tools.system_tool import (
+                system_info_tool, time_tool, calculator_tool
             )
+            from tools.reminder_tool import ReminderTool
+            from tools.search_tool import search_tool
+            from tools.file_tool import file_tool
+            from tools.delete_memory_tool import DeleteMemoryTool
+            from tools.task_tool import TaskTool
+            from tools.vision_tool import VisionTool, RegisterFaceTool
 
             # 注册工具
             self.tool_registry.register(weather_tool)
             self.tool_registry.register(system_info_tool)
             self.tool_registry.register(time_tool)
             self.tool_registry.register(calculator_tool)
-            self.tool_registry.register(reminder_tool)  # v0.5.0 提醒工具
+            self.tool_registry.register(ReminderTool())  # v0.5.0 提醒工具
             self.tool_registry.register(search_tool)  # v0.5.0 搜索工具
             self.tool_registry.register(file_tool)  # v0.5.0 文件工具
-            self.tool_registry.register(delete_memory_tool)  # v0.8.1 删除记忆
-            self.tool_registry.register(task_tool)  # v0.8.2 任务工具
-            self.tool_registry.register(vision_tool)  # v0.9.0 视觉工具
-            self.tool_registry.register(register_face_tool)  # v0.9.1 人脸注册工具
+            self.tool_registry.register(DeleteMemoryTool())  # v0.8.1 删除记忆
+            self.tool_registry.register(TaskTool())  # v0.8.2 任务工具
+            self.tool_registry.register(VisionTool())  # v0.9.0 视觉工具
+            self.tool_registry.register(RegisterFaceTool())  # v0.9.1 人脸注册工具
 
             logger.info(
                 f"✅ 工具注册完成，共 "
@@ -1061,7 +1058,7 @@ class XiaoLeAgent:
                     # 直接调用 register_face 工具（同步方式）
                     try:
                         from tools.baidu_face_tool import baidu_face_client
-                        if baidu_face_client._is_configured():
+                        if baidu_face_client._configured:
                             result = baidu_face_client.register_face(
                                 image_path, person_name
                             )
@@ -1239,16 +1236,11 @@ class XiaoLeAgent:
                             )
 
                             if task_id:
-                                # 创建步骤
-                                for step in decompose_result.get('steps', []):
-                                    self.task_manager.create_step(
-                                        task_id=task_id,
-                                        step_num=step.get('step_num', 0),
-                                        description=step.get(
-                                            'description', ''),
-                                        action_type=step.get('action_type'),
-                                        action_params=step.get('action_params')
-                                    )
+                                # 创建步骤（批量插入）
+                                self.task_manager.create_steps(
+                                    task_id=task_id,
+                                    steps=decompose_result.get('steps', [])
+                                )
 
                                 # 执行任务
                                 task_result = self.task_executor.execute_task(
@@ -3138,6 +3130,9 @@ class XiaoLeAgent:
    - **重要：time_desc 请直接使用用户的自然语言描述（如"明天早上8点"），不要尝试转换为UTC时间或具体日期，工具会自动处理。**
 5. 需要用户确认的要标明
 6. 每个步骤包含: 序号、描述、操作类型、所需参数
+7. tool_call 步骤要在 action_params 中标明 depends_on：该步骤需要等待完成的步骤序号列表
+   - 与之前的步骤完全无关、可以同时执行时填 []；依赖哪些步骤的结果就列出它们的序号
+   - 不确定时不要填写 depends_on，该步骤会等之前的步骤全部完成后再执行
 
 以JSON格式返回:
 {{
@@ -3149,6 +3144,7 @@ class XiaoLeAgent:
             "action_params": {{
                 "tool_name": "工具名",
                 "params": {{}},
+                "depends_on": [],
                 "notes": "备注"
             }}
         }}
@@ -3165,6 +3161,7 @@ class XiaoLeAgent:
             "action_params": {{
                 "tool_name": "weather",
                 "params": {{"city": "上海", "query_type": "7d"}},
+                "depends_on": [],
                 "notes": "确定天气情况"
             }}
         }},
@@ -3195,6 +3192,7 @@ class XiaoLeAgent:
                     "content": "购买野餐用品：餐垫、水果、饮料",
                     "time_desc": "明天早上9点"
                 }},
+                "depends_on": [3],
                 "notes": "用户确认后执行"
             }}
         }}
@@ -0,0 +1,9 @@
+-- 记忆内容三元组索引 - 课程表检索优化
+-- 课程表查询用一个正则匹配多个特征串，pg_trgm 的 GIN 索引可同时支持 LIKE 和正则
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_memories_content_trgm
+    ON memories USING GIN (content gin_trgm_ops);
+
+ANALYZE memories;
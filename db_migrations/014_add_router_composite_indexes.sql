@@ -0,0 +1,20 @@
+-- 路由热点查询复合索引
+-- 002 迁移中的 memories/tool_executions 索引引用了不存在的 timestamp 列，
+-- 这里按实际列名 created_at / executed_at 重新建立
+
+-- 1. memories: 课程表/记忆按标签过滤并按时间倒序取最新
+CREATE INDEX IF NOT EXISTS idx_memories_tag_created
+    ON memories(tag, created_at DESC);
+
+-- 2. tool_executions: 工具历史按用户+会话过滤并按时间倒序
+CREATE INDEX IF NOT EXISTS idx_tool_exec_user_session_time
+    ON tool_executions(user_id, session_id, executed_at DESC);
+
+ANALYZE memories;
+ANALYZE tool_executions;
+
+-- 验证（应看到 Index Scan / Bitmap Index Scan 而非 Seq Scan）
+-- EXPLAIN SELECT * FROM memories WHERE tag LIKE 'image:%'
+--     ORDER BY created_at DESC LIMIT 1;
+-- EXPLAIN SELECT * FROM tool_executions WHERE user_id = 'default_user'
+--     ORDER BY executed_at DESC LIMIT 20;
@@ -0,0 +1,13 @@
+-- 记忆标签大小写不敏感查询索引
+-- MemoryManager.recall / recall_recent / recall_by_keywords / semantic_recall
+-- 按 lower(tag) = :tag OR lower(tag) LIKE ':tag:%' 过滤，
+-- text_pattern_ops 让前缀 LIKE 也能走 btree 索引（与数据库 collation 无关）
+
+CREATE INDEX IF NOT EXISTS idx_memories_tag_lower
+    ON memories (lower(tag) text_pattern_ops);
+
+ANALYZE memories;
+
+-- 验证（应看到 Bitmap Index Scan on idx_memories_tag_lower）
+-- EXPLAIN SELECT * FROM memories
+--     WHERE lower(tag) = 'facts' OR lower(tag) LIKE 'facts:%';
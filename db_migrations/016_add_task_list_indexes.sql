@@ -0,0 +1,16 @@
+-- 任务列表查询复合索引
+-- TaskManager.get_tasks_by_session / get_tasks_by_user
+-- 按会话/用户过滤并按 created_at 倒序，复合索引免去排序
+-- （task_steps 的 UNIQUE(task_id, step_num) 已提供按步骤序号读取的索引，无需新建）
+
+CREATE INDEX IF NOT EXISTS idx_tasks_session_created
+    ON tasks(session_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_user_created
+    ON tasks(user_id, created_at DESC);
+
+ANALYZE tasks;
+
+-- 验证（应看到 Index Scan using idx_tasks_session_created）
+-- EXPLAIN SELECT id FROM tasks WHERE session_id = 'xxx'
+--     ORDER BY created_at DESC;
@@ -0,0 +1,11 @@
+-- task_steps.action_params 由 TEXT（JSON 字符串）改为 JSONB
+-- 写入时由 psycopg2 Jsonb 适配器序列化，读取时驱动直接解码为字典，
+-- 应用层不再 json.dumps / json.loads
+-- 连接上已准备的语句在首次执行报错时自动重新准备（见 TaskManager._execute_prepared），无需重启服务
+
+ALTER TABLE task_steps
+    ALTER COLUMN action_params TYPE JSONB
+    USING NULLIF(action_params, '')::jsonb;
+
+-- 验证
+-- SELECT pg_typeof(action_params) FROM task_steps LIMIT 1;
@@ -0,0 +1,35 @@
+-- tool_executions.parameters / result 由 TEXT（JSON 字符串）改为 JSONB
+-- 写入时由 SQLAlchemy JSONB 类型经 orjson 序列化，库端不再以文本存储，
+-- 后续可按结果字段建立索引查询
+
+-- 数据修复：旧记录由 json.dumps 写入，数值为 NaN / Infinity 时会输出
+-- NaN、Infinity、-Infinity，不是合法 JSON，直接 ::jsonb 会使整个迁移失败。
+-- 无法解析的行将这些记号替换为 null 后再转换（只影响这些行）；
+-- 仍无法解析的，原文以 JSON 字符串保存，不丢数据。
+CREATE FUNCTION pg_temp.tool_execution_jsonb(value TEXT) RETURNS JSONB AS $$
+BEGIN
+    IF NULLIF(value, '') IS NULL THEN
+        RETURN NULL;
+    END IF;
+    BEGIN
+        RETURN value::jsonb;
+    EXCEPTION WHEN invalid_text_representation THEN
+        BEGIN
+            RETURN regexp_replace(
+                value, '-?\m(NaN|Infinity)\M', 'null', 'g'
+            )::jsonb;
+        EXCEPTION WHEN invalid_text_representation THEN
+            RETURN to_jsonb(value);
+        END;
+    END;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE tool_executions
+    ALTER COLUMN parameters TYPE JSONB
+    USING pg_temp.tool_execution_jsonb(parameters),
+    ALTER COLUMN result TYPE JSONB
+    USING pg_temp.tool_execution_jsonb(result);
+
+-- 验证
+-- SELECT pg_typeof(parameters), pg_typeof(result) FROM tool_executions LIMIT 1;
@@ -0,0 +1,20 @@
+-- 记忆删除工具（DeleteMemoryTool）过滤条件索引
+-- 删除/预览按 created_at >= :start、tag LIKE '%x%'、content LIKE '%kw%' 组合过滤：
+--   created_at: idx_memories_tag_created 以 tag 开头，单独按时间过滤用不上，补一个单列索引
+--   tag: 包含匹配（前后都有 %）btree 无法使用，需要三元组 GIN 索引
+--   content: 已由迁移 013 的 idx_memories_content_trgm 支持
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_memories_created_at
+    ON memories(created_at);
+
+CREATE INDEX IF NOT EXISTS idx_memories_tag_trgm
+    ON memories USING GIN (tag gin_trgm_ops);
+
+ANALYZE memories;
+
+-- 验证（应看到 Bitmap Index Scan 而非 Seq Scan）
+-- EXPLAIN SELECT count(*) FROM memories
+--     WHERE created_at >= now() - interval '1 hour';
+-- EXPLAIN SELECT count(*) FROM memories WHERE tag LIKE '%对话%';
@@ -1,10 +1,13 @@
 from sqlalchemy import (
-    create_engine, Column, Integer, String, Text, DateTime, Boolean, Float, ARRAY
+    create_engine, event, Column, Integer, String, Text, DateTime, Boolean,
+    Float, ARRAY, Index, JSON
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import os
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,11 +22,45 @@ else:
         f"/{os.getenv('DB_NAME')}"
     )
 
-engine = create_engine(
-    DB_URL,
-    connect_args={'check_same_thread': False} if DB_URL.startswith('sqlite')
-    else {'client_encoding': 'utf8'}
-)
+
+
+def _json_serializer(obj) -> str:
+    """JSON 列的序列化（orjson；orjson.Fragment 中的预序列化内容原样写入）"""
+    return orjson.dumps(
+        obj, option=orjson.OPT_NON_STR_KEYS, default=str
+    ).decode('utf-8')
+
+
+if DB_URL.startswith('sqlite'):
+    engine = create_engine(
+        DB_URL,
+        connect_args={'check_same_thread': False},
+        json_serializer=_json_serializer
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL 日志 + synchronous=NORMAL：提交时不再每次 fsync，写入吞吐大幅提升
+
+        进程崩溃不丢数据；断电时可能丢失最近提交的事务，但数据库不会损坏
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+else:
+    # 连接池：常驻 10 个连接，高峰再临时增加 20 个；
+    # 借出前 ping 一次丢弃失效连接，1 小时回收避免被服务端超时断开
+    engine = create_engine(
+        DB_URL,
+        connect_args={'client_encoding': 'utf8'},
+        pool_size=int(os.getenv('DB_POOL_SIZE', 10)),
+        max_overflow=int(os.getenv('DB_POOL_MAX_OVERFLOW', 20)),
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        json_serializer=_json_serializer
+    )
 Base = declarative_base()
 
 # 创建Session工厂
@@ -38,6 +75,11 @@ SessionLocal = sessionmaker(
 
 class Memory(Base):
     __tablename__ = "memories"
+    # 按时间范围删除记忆（DeleteMemoryTool），已有库见迁移 019；
+    # 标签 + 时间倒序索引见类定义之后
+    __table_args__ = (
+        Index('idx_memories_created_at', 'created_at'),
+    )
     id = Column(Integer, primary_key=True)
     content = Column(Text)
     tag = Column(String(50))
@@ -49,6 +91,10 @@ class Memory(Base):
     # is_archived = Column(Boolean, default=False)  # 是否已归档
 
 
+# 按标签过滤 + 时间倒序（课程表、记忆列表），与迁移 014 一致（created_at DESC）
+Index('idx_memories_tag_created', Memory.tag, Memory.created_at.desc())
+
+
 class Conversation(Base):
     """对话会话表"""
     __tablename__ = "conversations"
@@ -149,6 +195,7 @@ class LearnedPattern(Base):
 class ToolExecution(Base):
     """工具执行记录表 - v0.4.0 Action层"""
     __tablename__ = "tool_executions"
+    # 工具历史按用户+会话过滤、时间倒序索引见类定义之后
 
     execution_id = Column(Integer, primary_key=True)
     tool_name = Column(String(100), index=True)  # 工具名称
@@ -156,8 +203,9 @@ class ToolExecution(Base):
     session_id = Column(String(100), index=True)  # 会话ID
 
     # 执行参数和结果
-    parameters = Column(Text)  # JSON格式的参数
-    result = Column(Text)  # JSON格式的结果
+    # PostgreSQL 上为 JSONB（已有库见迁移 018），SQLite 上为 JSON 文本
+    parameters = Column(JSON().with_variant(JSONB(), 'postgresql'))  # 参数
+    result = Column(JSON().with_variant(JSONB(), 'postgresql'))  # 结果
     success = Column(Boolean, default=True)  # 是否成功
     error_message = Column(Text)  # 错误信息
 
@@ -168,6 +216,14 @@ class ToolExecution(Base):
     executed_at = Column(DateTime, default=datetime.now, index=True)
 
 
+# 工具历史按用户+会话过滤、时间倒序，与迁移 014 一致（executed_at DESC）
+Index(
+    'idx_tool_exec_user_session_time',
+    ToolExecution.user_id, ToolExecution.session_id,
+    ToolExecution.executed_at.desc()
+)
+
+
 class FaceEncoding(Base):
     """人脸特征向量表 - v0.9.0 Phase 1"""
     __tablename__ = "face_encodings"
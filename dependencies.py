@@ -1,4 +1,6 @@
 from agent import XiaoLeAgent
+from memory import MemoryManager
+from db_setup import SessionLocal
 from modules.conflict_detector import ConflictDetector
 from modules.proactive_qa import ProactiveQA
 from modules.reminder_manager import get_reminder_manager
@@ -32,6 +34,20 @@ def get_proactive_qa() -> ProactiveQA:
     return _proactive_qa
 
 
+def get_memory_manager() -> MemoryManager:
+    """与 agent 共用同一个 MemoryManager（同一份语义索引和查询缓存）"""
+    return get_xiaole_agent().memory
+
+
+def get_db():
+    """按请求提供数据库 Session，请求结束后归还连接池"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 # Re-export others for consistency
 get_reminder_manager = get_reminder_manager
 get_scheduler = get_scheduler
@@ -1,9 +1,13 @@
 from sqlalchemy import func, or_
 from db_setup import Memory, SessionLocal
+from contextlib import contextmanager
 import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-from modules.semantic_search import SemanticSearchManager
+from modules.semantic_search import (
+    get_semantic_query_cache, get_semantic_search_manager,
+    invalidate_search_cache
+)
 
 load_dotenv()
 
@@ -18,7 +22,8 @@ class MemoryManager:
         # 初始化语义搜索管理器
         if self.enable_vector_search:
             try:
-                self.semantic_search = SemanticSearchManager()
+                # 进程内共享一份语义索引，多个 MemoryManager 不重复加载
+                self.semantic_search = get_semantic_search_manager()
                 print("✅ 语义搜索已启用")
             except Exception as e:
                 print(f"⚠️ 语义搜索初始化失败: {e}，降级到关键词搜索")
@@ -27,6 +32,19 @@ class MemoryManager:
         else:
             self.semantic_search = None
 
+    @contextmanager
+    def session_scope(self):
+        """提供一次请求范围内的 Session，结束时自动关闭
+
+        MemoryManager 作为单例共享，Session 不能跨线程复用，
+        因此每次操作都从连接池取一个独立 Session。
+        """
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
     def remember(
         self,
         content,
@@ -69,11 +87,14 @@ class MemoryManager:
             )
             session.add(memory)
             session.commit()
+            invalidate_search_cache()
 
             # 添加到语义搜索索引
             if self.enable_vector_search and self.semantic_search:
                 try:
-                    self.semantic_search.add_memory(memory.id, content, tag)
+                    self.semantic_search.add_memory(
+                        memory.id, final_content, tag
+                    )
                 except Exception as e:
                     print(f"添加语义索引失败: {e}")
 
@@ -216,6 +237,20 @@ class MemoryManager:
         finally:
             session.close()
 
+    def invalidate_search_cache(self):
+        """记忆发生变化后清空语义搜索结果缓存"""
+        invalidate_search_cache()
+
+    def cached_semantic_recall(self, query, tag=None, limit=10, min_score=0.15):
+        """带结果缓存的语义搜索：相似查询（同 tag/limit/min_score）直接复用结果"""
+        cache = get_semantic_query_cache()
+        scope = (tag, limit, min_score)
+        memories = cache.get(query, scope)
+        if memories is None:
+            memories = self.semantic_recall(query, tag, limit, min_score)
+            cache.set(query, scope, memories)
+        return memories
+
     def semantic_recall(self, query, tag=None, limit=10, min_score=0.15):
         """Semantic search using TF-IDF and cosine similarity"""
         if not self.enable_vector_search or not self.semantic_search:
@@ -245,6 +280,11 @@ class MemoryManager:
 
             # 构建文档列表：(id, content)
             documents = [(m.id, m.content) for m in all_memories]
+            if not tag:
+                # 全量检索时文档即全部记忆，供索引保存时清理已删除记忆
+                self.semantic_search.set_live_ids(
+                    doc_id for doc_id, _ in documents
+                )
 
             # 执行语义搜索
             results = self.semantic_search.search(
@@ -477,6 +517,8 @@ class MemoryManager:
                 archived_count += 1
 
             session.commit()
+            if archived_count:
+                invalidate_search_cache()
 
             if archived_count > 0:
                 print(f"✅ 已归档 {archived_count} 条低重要性记忆")
@@ -559,6 +601,12 @@ class MemoryManager:
                 session.delete(mem)
 
             session.commit()
+            if count:
+                if self.semantic_search:
+                    self.semantic_search.remove_memories(
+                        mem.id for mem in old_conversations
+                    )
+                invalidate_search_cache()
             print(f"🗑️ 清理了 {count} 条超过{days}天的conversation记忆")
             return count
         finally:
@@ -8,6 +8,7 @@ from db_setup import Message, UserBehavior, ProactiveQuestion, Memory
 from datetime import datetime, timedelta
 import os
 import json
+import random
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -85,8 +86,6 @@ class ProactiveChat:
 
     def _check_pending_questions(self, session, user_id):
         """检查是否有待追问的问题"""
-        from datetime import datetime
-
         # 查询最近24小时内未追问的问题
         time_threshold = datetime.now() - timedelta(hours=24)
 
@@ -167,8 +166,6 @@ class ProactiveChat:
 
     def _check_active_time(self, session, user_id):
         """检查是否是用户的活跃时间"""
-        from datetime import datetime
-
         # 查询用户的活跃时间模式
         time_threshold = datetime.now() - timedelta(days=30)
 
@@ -233,7 +230,6 @@ class ProactiveChat:
             return {"should_chat": False}
 
         # 随机选择一个记忆话题
-        import random
         memory = random.choice(interesting_memories)
 
         # 构造基于记忆的对话开场
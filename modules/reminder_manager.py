@@ -9,15 +9,17 @@ import json
 import logging
 
 import psycopg2
+from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-def get_db_connection():
-    """获取数据库连接"""
+def _connection_params() -> Dict[str, Any]:
+    """从环境变量读取数据库连接参数"""
     host = os.getenv('DB_HOST')
     port = os.getenv('DB_PORT', '5432')
     dbname = os.getenv('DB_NAME')
@@ -28,15 +30,49 @@ def get_db_connection():
         raise ValueError(
             "Database configuration is missing. Please check environment variables.")
 
-    conn = psycopg2.connect(
-        host=host,
-        port=port,
-        database=dbname,
-        user=user,
-        password=password,
-        client_encoding='UTF8'
-    )
-    return conn
+    return {
+        'host': host,
+        'port': port,
+        'database': dbname,
+        'user': user,
+        'password': password,
+        'client_encoding': 'UTF8'
+    }
+
+
+# 连接池：调度器每分钟的检查和各接口复用连接，省去每次建连的 TCP/认证开销
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> pool.ThreadedConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pool.ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=int(os.getenv('DB_POOL_MAX', '8')),
+                    **_connection_params()
+                )
+    return _pool
+
+
+def get_db_connection():
+    """从连接池获取数据库连接，用完须调用 release_db_connection 归还"""
+    try:
+        return _get_pool().getconn()
+    except pool.PoolError:
+        # 连接池已满时临时直连，归还时直接关闭
+        return psycopg2.connect(**_connection_params())
+
+
+def release_db_connection(conn):
+    """归还连接（未提交的事务由连接池回滚）"""
+    try:
+        _get_pool().putconn(conn)
+    except pool.PoolError:
+        conn.close()
 
 
 logger = logging.getLogger(__name__)
@@ -187,7 +223,7 @@ class ReminderManager:
             logger.error(f"Failed to create reminder: {e}")
             raise
         finally:
-            conn.close()
+            release_db_connection(conn)
 
     def get_user_reminders(
         self,
@@ -244,7 +280,63 @@ class ReminderManager:
             logger.error(f"Failed to get user reminders: {e}")
             return []
         finally:
-            conn.close()
+            release_db_connection(conn)
+
+    def fetch_enabled_reminders(
+        self,
+        reminder_type: str
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        一次查询取出所有用户某类型的已启用提醒（供调度器批量检查）
+
+        Returns:
+            {user_id: 提醒列表}，每个用户内的顺序与 get_user_reminders 一致
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT * FROM reminders
+                    WHERE enabled = true AND reminder_type = %s
+                    ORDER BY user_id, priority ASC, created_at DESC
+                """, (reminder_type,))
+                reminders_by_user: Dict[str, List[Dict[str, Any]]] = {}
+                for row in cur.fetchall():
+                    reminders_by_user.setdefault(
+                        row['user_id'], []).append(dict(row))
+                return reminders_by_user
+
+        except Exception as e:
+            logger.error(f"Failed to fetch enabled reminders: {e}")
+            return {}
+        finally:
+            release_db_connection(conn)
+
+    def get_reminder(self, reminder_id: int) -> Optional[Dict[str, Any]]:
+        """
+        按ID获取单个提醒
+
+        Args:
+            reminder_id: 提醒ID
+
+        Returns:
+            提醒信息（不存在时为None）
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(
+                    "SELECT * FROM reminders WHERE reminder_id = %s LIMIT 1",
+                    (reminder_id,)
+                )
+                row = cur.fetchone()
+                return dict(row) if row else None
+
+        except Exception as e:
+            logger.error(f"Failed to get reminder {reminder_id}: {e}")
+            return None
+        finally:
+            release_db_connection(conn)
 
     def update_reminder(
         self,
@@ -319,7 +411,7 @@ class ReminderManager:
             logger.error(f"Failed to update reminder: {e}")
             return None
         finally:
-            conn.close()
+            release_db_connection(conn)
 
     def delete_reminder(self, reminder_id: int) -> bool:
         """删除提醒"""
@@ -362,22 +454,31 @@ class ReminderManager:
             logger.error(f"Failed to delete reminder: {e}")
             return False
         finally:
-            conn.close()
+            release_db_connection(conn)
 
-    def check_time_reminders(self, user_id: str) -> List[Dict[str, Any]]:
+    def check_time_reminders(
+        self,
+        user_id: str,
+        reminders: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
         """
         检查时间类型的提醒
 
+        Args:
+            user_id: 用户ID
+            reminders: 已查询好的该用户启用提醒（批量检查时传入，省去查询）
+
         Returns:
             需要触发的提醒列表
         """
-        # 强制不使用缓存，确保获取最新的数据库状态（特别是Snooze更新后）
-        reminders = self.get_user_reminders(
-            user_id,
-            enabled_only=True,
-            reminder_type=ReminderType.TIME,
-            use_cache=False
-        )
+        if reminders is None:
+            # 强制不使用缓存，确保获取最新的数据库状态（特别是Snooze更新后）
+            reminders = self.get_user_reminders(
+                user_id,
+                enabled_only=True,
+                reminder_type=ReminderType.TIME,
+                use_cache=False
+            )
 
         triggered = []
         now = datetime.now()
@@ -405,9 +506,9 @@ class ReminderManager:
                     trigger_time = datetime.strptime(
                         trigger_time_str, "%Y-%m-%d %H:%M:%S")
 
-                # DEBUG: 打印检查信息
-                logger.info(
-                    f"Checking reminder {reminder['reminder_id']}: trigger={trigger_time}, now={now}")
+                logger.debug(
+                    "Checking reminder %s: trigger=%s, now=%s",
+                    reminder['reminder_id'], trigger_time, now)
 
                 # 检查是否到时间
                 if now >= trigger_time:
@@ -451,25 +552,37 @@ class ReminderManager:
 
         return triggered
 
-    def check_behavior_reminders(self, user_id: str) -> List[Dict[str, Any]]:
+    def check_behavior_reminders(
+        self,
+        user_id: str,
+        reminders: Optional[List[Dict[str, Any]]] = None,
+        last_active: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
         """
         检查行为类型的提醒（如长时间未聊天）
 
+        Args:
+            user_id: 用户ID
+            reminders: 已查询好的该用户启用提醒（批量检查时传入，省去查询）
+            last_active: 已查询好的用户最后活跃时间
+
         Returns:
             需要触发的提醒列表
         """
-        # 强制不使用缓存
-        reminders = self.get_user_reminders(
-            user_id,
-            enabled_only=True,
-            reminder_type=ReminderType.BEHAVIOR,
-            use_cache=False
-        )
+        if reminders is None:
+            # 强制不使用缓存
+            reminders = self.get_user_reminders(
+                user_id,
+                enabled_only=True,
+                reminder_type=ReminderType.BEHAVIOR,
+                use_cache=False
+            )
 
         triggered = []
 
         # 获取用户最后活跃时间
-        last_active = self._get_user_last_active(user_id)
+        if last_active is None:
+            last_active = self._get_user_last_active(user_id)
         if not last_active:
             return triggered
 
@@ -550,57 +663,117 @@ class ReminderManager:
                     f"Notified reminder {reminder_id} (not confirmed yet)"
                 )
 
-                # 动态生成语音提醒内容
-                trigger_count = reminder.get('trigger_count', 0) + 1
-                # 尝试获取用户昵称，这里暂时使用默认值，后续可以从用户配置中获取
-                nickname = "主人"
+                trigger_count = (reminder.get('trigger_count') or 0) + 1
+                return self._push_reminder_notification(
+                    reminder, trigger_count)
+
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Failed to notify reminder: {e}")
+            return False
+        finally:
+            release_db_connection(conn)
 
-                # 格式化时间
-                current_time_str = datetime.now().strftime("%H:%M")
+    def notify_batch(self, reminder_ids: List[int]) -> Dict[int, bool]:
+        """
+        批量标记并推送提醒（一次UPDATE代替逐条查询+更新）
 
-                voice_text = ""
-                content = reminder['content']
+        Args:
+            reminder_ids: 提醒ID列表
 
-                if trigger_count <= 1:
-                    # 第一次提醒
-                    voice_text = f"现在是{current_time_str}，请{nickname}{content}。"
-                elif trigger_count == 2:
-                    # 第二次提醒（稍后提醒后）
-                    voice_text = f"请{nickname}赶快{content}。"
-                else:
-                    # 第三次及以上
-                    voice_text = f"请{nickname}立马马上{content}！"
+        Returns:
+            {reminder_id: 是否成功推送}
+        """
+        results = {reminder_id: False for reminder_id in reminder_ids}
+        if not reminder_ids:
+            return results
 
-                # WebSocket实时推送提醒（用户需要确认）
-                if self.websocket_broadcast:
-                    try:
-                        self._broadcast({
-                            "type": "reminder",
-                            "data": {
-                                "reminder_id": reminder_id,
-                                "title": reminder.get('title', '提醒'),
-                                "content": reminder['content'],
-                                "voice_text": voice_text,  # 新增字段
-                                "priority": reminder.get('priority', 3),
-                                "reminder_type": reminder.get('reminder_type'),
-                                "triggered_at": datetime.now().isoformat()
-                            }
-                        })
-                        logger.info(f"WebSocket推送提醒 {reminder_id}")
-                        return True
-                    except Exception as ws_error:
-                        logger.error(f"WebSocket推送失败: {ws_error}")
-                        return False
-                else:
-                    logger.warning("No WebSocket broadcast callback available")
-                    return False
+        conn = get_db_connection()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                # 更新last_triggered（标记为已通知但未确认），同时取回提醒信息
+                cur.execute("""
+                    UPDATE reminders
+                    SET last_triggered = CURRENT_TIMESTAMP,
+                        trigger_count = COALESCE(trigger_count, 0) + 1
+                    WHERE reminder_id = ANY(%s)
+                    RETURNING *
+                """, (list(reminder_ids),))
+                reminders = [dict(row) for row in cur.fetchall()]
+                conn.commit()
 
         except Exception as e:
             conn.rollback()
-            logger.error(f"Failed to notify reminder: {e}")
-            return False
+            logger.error(f"Failed to notify reminders: {e}")
+            return results
         finally:
-            conn.close()
+            release_db_connection(conn)
+
+        for user_id in {r['user_id'] for r in reminders}:
+            self._clear_user_cache(user_id)
+
+        for reminder in reminders:
+            reminder_id = reminder['reminder_id']
+            logger.info(
+                f"Notified reminder {reminder_id} (not confirmed yet)"
+            )
+            # RETURNING 返回的已是递增后的 trigger_count
+            results[reminder_id] = self._push_reminder_notification(
+                reminder, reminder['trigger_count'])
+
+        return results
+
+    def _push_reminder_notification(
+        self,
+        reminder: Dict[str, Any],
+        trigger_count: int
+    ) -> bool:
+        """生成语音提醒内容并通过WebSocket推送"""
+        reminder_id = reminder['reminder_id']
+
+        # 动态生成语音提醒内容
+        # 尝试获取用户昵称，这里暂时使用默认值，后续可以从用户配置中获取
+        nickname = "主人"
+
+        # 格式化时间
+        current_time_str = datetime.now().strftime("%H:%M")
+
+        voice_text = ""
+        content = reminder['content']
+
+        if trigger_count <= 1:
+            # 第一次提醒
+            voice_text = f"现在是{current_time_str}，请{nickname}{content}。"
+        elif trigger_count == 2:
+            # 第二次提醒（稍后提醒后）
+            voice_text = f"请{nickname}赶快{content}。"
+        else:
+            # 第三次及以上
+            voice_text = f"请{nickname}立马马上{content}！"
+
+        # WebSocket实时推送提醒（用户需要确认）
+        if self.websocket_broadcast:
+            try:
+                self._broadcast({
+                    "type": "reminder",
+                    "data": {
+                        "reminder_id": reminder_id,
+                        "title": reminder.get('title', '提醒'),
+                        "content": reminder['content'],
+                        "voice_text": voice_text,  # 新增字段
+                        "priority": reminder.get('priority', 3),
+                        "reminder_type": reminder.get('reminder_type'),
+                        "triggered_at": datetime.now().isoformat()
+                    }
+                })
+                logger.info(f"WebSocket推送提醒 {reminder_id}")
+                return True
+            except Exception as ws_error:
+                logger.error(f"WebSocket推送失败: {ws_error}")
+                return False
+        else:
+            logger.warning("No WebSocket broadcast callback available")
+            return False
 
     def snooze_reminder(self, reminder_id: int, minutes: int = 5) -> bool:
         """
@@ -659,7 +832,7 @@ class ReminderManager:
             logger.error(f"Failed to snooze reminder: {e}")
             return False
         finally:
-            conn.close()
+            release_db_connection(conn)
 
     def confirm_reminder(self, reminder_id: int) -> bool:
         """
@@ -780,7 +953,7 @@ class ReminderManager:
             logger.error(f"Failed to confirm reminder: {e}")
             return False
         finally:
-            conn.close()
+            release_db_connection(conn)
 
     def get_reminder_history(
         self,
@@ -805,7 +978,7 @@ class ReminderManager:
             logger.error(f"Failed to get reminder history: {e}")
             return []
         finally:
-            conn.close()
+            release_db_connection(conn)
 
     def get_pending_reminders(
         self, user_id: str, limit: int = 5
@@ -837,7 +1010,7 @@ class ReminderManager:
                 reminders = cur.fetchall()
                 return [dict(r) for r in reminders]
         finally:
-            conn.close()
+            release_db_connection(conn)
 
     def _clear_user_cache(self, user_id: str):
         """清除用户相关的缓存"""
@@ -853,6 +1026,36 @@ class ReminderManager:
         delta = datetime.now() - self.last_cache_update
         return delta.total_seconds() < self.cache_ttl
 
+    def get_users_last_active(
+        self,
+        user_ids: List[str]
+    ) -> Dict[str, datetime]:
+        """批量获取用户最后活跃时间（一次 GROUP BY 查询），无记录的用户不出现在结果中"""
+        if not user_ids:
+            return {}
+
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT c.user_id, MAX(m.created_at) as last_active
+                    FROM messages m
+                    JOIN conversations c ON m.session_id = c.session_id
+                    WHERE c.user_id = ANY(%s) AND m.role = 'user'
+                    GROUP BY c.user_id
+                """, (list(user_ids),))
+                return {
+                    user_id: last_active
+                    for user_id, last_active in cur.fetchall()
+                    if last_active
+                }
+
+        except Exception as e:
+            logger.error(f"Failed to get users last active: {e}")
+            return {}
+        finally:
+            release_db_connection(conn)
+
     def _get_user_last_active(self, user_id: str) -> Optional[datetime]:
         """获取用户最后活跃时间"""
         conn = get_db_connection()
@@ -871,7 +1074,7 @@ class ReminderManager:
             logger.error(f"Failed to get user last active: {e}")
             return None
         finally:
-            conn.close()
+            release_db_connection(conn)
 
 
 # 全局单例
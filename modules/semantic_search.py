@@ -4,51 +4,273 @@
 无需深度学习模型，速度快，资源占用小，仅依赖 jieba 分词
 """
 
-import jieba
+import functools
+import hashlib
+import heapq
+import logging
 import math
-from collections import Counter
-from typing import List, Tuple, Dict
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from operator import itemgetter
+from typing import (
+    Any, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+)
+import orjson
+from config import BASE_DIR
 from logger import logger
 
+# 优先使用 C 扩展实现的 jieba_fast（接口与 jieba 相同），未安装时回退到 jieba
+try:
+    import jieba_fast as jieba
+except ImportError:
+    import jieba
+
+# 文档索引持久化路径与最短保存间隔（秒）
+INDEX_PATH = os.getenv(
+    'SEMANTIC_INDEX_PATH',
+    os.path.join(BASE_DIR, 'cache', 'semantic_index.json')
+)
+INDEX_SAVE_INTERVAL = 60
+# 索引文件格式版本：2 起只存内容摘要 + 词频，不再保存记忆原文
+INDEX_FORMAT = 2
+
+# 常见停用词
+STOPWORDS = frozenset([
+    '的', '了', '是', '在', '我', '有', '和', '就',
+    '不', '人', '都', '一', '你', '他', '她', '它', '吗',
+    '啊', '呢', '吧', '么', '什么', '这', '那', '这个'
+])
+
+
+@functools.lru_cache(maxsize=16384)
+def tokenize(text: str) -> Tuple[str, ...]:
+    """分词并过滤停用词
+
+    jieba 分词是本模块最耗时的步骤，结果按原文做有界 LRU 缓存；
+    返回不可变元组，缓存条目可被多个调用方安全共享。
+    """
+    words = jieba.lcut(text.lower())
+    return tuple(w for w in words if w not in STOPWORDS and len(w) > 1)
+
+
+def content_digest(text: str) -> str:
+    """记忆原文摘要，用于判断索引条目是否过期（索引中不保存原文）"""
+    return hashlib.blake2b(
+        text.encode('utf-8'), digest_size=8
+    ).hexdigest()
+
 
 class SemanticSearchManager:
-    def __init__(self):
+    def __init__(self, index_path: Optional[str] = None):
         """初始化分词器"""
         logger.info("✅ 初始化轻量级语义搜索")
-        jieba.setLogLevel(jieba.logging.INFO)
-        # 添加自定义词典（常见停用词）
-        self.stopwords = set([
-            '的', '了', '是', '在', '我', '有', '和', '就',
-            '不', '人', '都', '一', '你', '他', '她', '它', '吗',
-            '啊', '呢', '吧', '么', '什么', '这', '那', '这个'
-        ])
+        jieba.setLogLevel(logging.INFO)
+        # 立即加载词典，避免首次查询时的词典加载延迟
+        jieba.initialize()
+        self.stopwords = STOPWORDS
+        # 文档索引 memory_id -> (原文摘要, 词频TF)，分词结果跨查询复用；
+        # 原文变化（记忆被编辑）时摘要不符，自动重建该条
+        self._doc_index: Dict[int, Tuple[str, Dict[str, float]]] = {}
+        self._index_lock = threading.Lock()
+        # 索引版本号，文档增删改时递增，用于失效语料统计缓存
+        self._version = 0
+        # 全部已索引文档的语料统计 (索引版本, 文档频率DF, 倒排表, 文档数)
+        self._stats: Optional[tuple] = None
+        # 当前仍存在的全部记忆 ID（由全量检索告知），保存时清理其余条目
+        self._live_ids: Optional[frozenset] = None
+        # 索引持久化：首次使用时加载一次，无需对全部记忆重新分词
+        self.index_path = index_path or INDEX_PATH
+        self._loaded = False
+        self._saved_version = 0
+        self._last_save = 0.0
+        self._save_lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        """首次使用索引时从磁盘加载（只加载一次）"""
+        if self._loaded:
+            return
+        with self._save_lock:
+            if not self._loaded:
+                self.load_index()
+                self._loaded = True
 
     def add_memory(self, memory_id: int, content: str, tag: str):
-        """添加记忆到索引 (轻量级版本无需持久化索引，此方法为空)"""
-        pass
+        """添加记忆到索引"""
+        self._ensure_loaded()
+        self._index_document(memory_id, content)
+
+    def remove_memory(self, memory_id: int):
+        """从索引移除记忆"""
+        self.remove_memories((memory_id,))
+
+    def remove_memories(self, memory_ids: Iterable[int]):
+        """从索引批量移除记忆"""
+        self._ensure_loaded()
+        with self._index_lock:
+            removed = False
+            for memory_id in memory_ids:
+                if self._doc_index.pop(memory_id, None) is not None:
+                    removed = True
+            if removed:
+                self._version += 1
+
+    def set_live_ids(self, memory_ids: Iterable[int]):
+        """告知当前仍存在的全部记忆 ID，下次保存时清理已删除记忆的条目"""
+        self._live_ids = frozenset(memory_ids)
+
+    def rebuild_index(self, documents: List[Tuple[int, str]]):
+        """用给定文档全量重建索引"""
+        index = {
+            doc_id: (content_digest(text), self.compute_tf(self.tokenize(text)))
+            for doc_id, text in documents
+        }
+        # 持有 _save_lock：与 _ensure_loaded 的首次加载互斥，
+        # 磁盘上的旧索引不会在重建之后再覆盖回来
+        with self._save_lock, self._index_lock:
+            self._doc_index = index
+            self._version += 1
+            self._loaded = True
+
+    def load_index(self) -> bool:
+        """从磁盘加载文档索引；条目按原文摘要校验，过期条目在检索时自动重建"""
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = orjson.loads(f.read())
+            legacy = data.get('format') != INDEX_FORMAT
+            if legacy:
+                # 旧格式 {id: [原文, 词频]}：转为摘要，并在下次保存时覆盖掉原文
+                index = {
+                    int(doc_id): (content_digest(text), doc_tf)
+                    for doc_id, (text, doc_tf) in data.items()
+                }
+            else:
+                index = {
+                    int(doc_id): (digest, doc_tf)
+                    for doc_id, (digest, doc_tf) in data['docs'].items()
+                }
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"加载语义索引失败，将重新构建: {e}")
+            return False
+
+        with self._index_lock:
+            self._doc_index = index
+            self._version += 1
+            if not legacy:
+                self._saved_version = self._version
+        logger.info(f"✅ 已加载语义索引: {len(index)} 条")
+        return True
+
+    def save_index(self):
+        """将文档索引写入磁盘（先写临时文件再原子替换，多进程并发写安全）
+
+        已知当前记忆 ID 集合时，先清理已删除记忆的条目，索引不会无限增长。
+        """
+        with self._save_lock:
+            with self._index_lock:
+                live_ids = self._live_ids
+                if live_ids is not None:
+                    stale = [i for i in self._doc_index if i not in live_ids]
+                    for doc_id in stale:
+                        del self._doc_index[doc_id]
+                    if stale:
+                        self._version += 1
+                version = self._version
+                snapshot = dict(self._doc_index)
+            if version == self._saved_version:
+                return
+            try:
+                index_dir = os.path.dirname(self.index_path)
+                os.makedirs(index_dir, exist_ok=True)
+                with tempfile.NamedTemporaryFile(
+                    'wb', dir=index_dir, suffix='.tmp', delete=False
+                ) as f:
+                    f.write(orjson.dumps(
+                        {'format': INDEX_FORMAT, 'docs': snapshot},
+                        option=orjson.OPT_NON_STR_KEYS
+                    ))
+                os.replace(f.name, self.index_path)
+                self._saved_version = version
+            except Exception as e:
+                logger.warning(f"保存语义索引失败: {e}")
+
+    def _maybe_save_index(self):
+        """索引有变化且距上次保存超过间隔时，在后台线程保存"""
+        now = time.monotonic()
+        if (
+            self._version == self._saved_version
+            or now - self._last_save < INDEX_SAVE_INTERVAL
+        ):
+            return
+        self._last_save = now
+        threading.Thread(target=self.save_index, daemon=True).start()
+
+    def _index_document(self, doc_id: int, text: str) -> Dict[str, float]:
+        """取文档的词频TF，索引未命中或原文已变化时分词并写入索引"""
+        digest = content_digest(text)
+        entry = self._doc_index.get(doc_id)
+        if entry is not None and entry[0] == digest:
+            return entry[1]
+        doc_tf = self.compute_tf(self.tokenize(text))
+        with self._index_lock:
+            self._doc_index[doc_id] = (digest, doc_tf)
+            self._version += 1
+        return doc_tf
+
+    def _corpus_stats(self) -> Tuple[Counter, Dict[str, List[int]], int]:
+        """
+        全部已索引文档的文档频率 DF、倒排表 词 -> [记忆ID] 与文档数
 
-    def tokenize(self, text: str) -> List[str]:
+        只按索引版本缓存（文档增删改时版本递增）：索引不变时多次查询共享同一份统计，
+        命中缓存无需遍历文档。
+        """
+        with self._index_lock:
+            stats = self._stats
+            if stats is not None and stats[0] == self._version:
+                return stats[1], stats[2], stats[3]
+            version = self._version
+            entries = list(self._doc_index.items())
+
+        # 单遍构建倒排表，文档频率即倒排表长度
+        postings: Dict[str, List[int]] = {}
+        for doc_id, (_, doc_tf) in entries:
+            for word in doc_tf:
+                postings.setdefault(word, []).append(doc_id)
+        df = Counter({word: len(ids) for word, ids in postings.items()})
+
+        self._stats = (version, df, postings, len(entries))
+        return df, postings, len(entries)
+
+    def tokenize(self, text: str) -> Tuple[str, ...]:
         """分词并过滤停用词"""
-        words = jieba.lcut(text.lower())
-        return [w for w in words if w not in self.stopwords and len(w) > 1]
+        return tokenize(text)
 
-    def compute_tf(self, words: List[str]) -> Dict[str, float]:
+    def compute_tf(self, words: Sequence[str]) -> Dict[str, float]:
         """计算词频TF"""
         word_count = Counter(words)
         total = len(words) if words else 1
         return {word: count / total for word, count in word_count.items()}
 
-    def compute_idf(self, documents: List[List[str]]) -> Dict[str, float]:
-        """计算逆文档频率IDF"""
+    def compute_idf(self, documents: List[Iterable[str]]) -> Dict[str, float]:
+        """计算逆文档频率IDF
+
+        documents 的元素可以是词序列，也可以是词频字典（如 compute_tf 的结果）
+        """
         doc_count = len(documents)
         if doc_count == 0:
             return {}
 
+        # 词频字典/Counter 的键本身已去重，直接计数；词序列才需要 set 去重
         word_doc_count = Counter()
         for doc in documents:
-            unique_words = set(doc)
-            for word in unique_words:
-                word_doc_count[word] += 1
+            word_doc_count.update(
+                doc.keys() if isinstance(doc, Mapping) else set(doc)
+            )
 
         idf = {}
         for word, count in word_doc_count.items():
@@ -118,39 +340,230 @@ class SemanticSearchManager:
         if not documents:
             return []
 
-        # 分词所有文档
-        doc_words = [self.tokenize(text) for _, text in documents]
         query_words = self.tokenize(query)
 
         if not query_words:
             return []
 
-        # 计算IDF
-        all_docs = doc_words + [query_words]
-        idf = self.compute_idf(all_docs)
+        self._ensure_loaded()
+        # 文档TF从索引取，只有新文档/被修改的文档才需要重新分词
+        doc_tfs = [
+            self._index_document(doc_id, text) for doc_id, text in documents
+        ]
+        self._maybe_save_index()
+
+        # IDF 取自全部已索引文档（语料含查询本身），按需只算用到的词
+        df, postings, indexed_count = self._corpus_stats()
+        doc_count = indexed_count + 1
+        query_tf = self.compute_tf(query_words)
+        idf_values: Dict[str, float] = {}
+
+        def idf(word: str) -> float:
+            value = idf_values.get(word)
+            if value is None:
+                count = df[word] + (1 if word in query_tf else 0)
+                value = idf_values[word] = math.log(doc_count / (count + 1))
+            return value
 
         # 计算查询的TF-IDF
-        query_tfidf = self.compute_tfidf(query, idf)
-
-        # 计算每个文档的相似度
+        query_tfidf = {}
+        for w, tf_value in query_tf.items():
+            tfidf_value = tf_value * idf(w)
+            if tfidf_value:
+                query_tfidf[w] = tfidf_value
+        query_norm = math.sqrt(sum(v * v for v in query_tfidf.values()))
+        if query_norm == 0:
+            return [
+                (doc_id, 0.0) for doc_id, _ in documents if min_score <= 0
+            ][:top_k]
+
+        # 只有包含查询词的文档点积非零，经倒排表取候选，其余文档得分为 0；
+        # 点积只遍历查询词（通常只有几个）
+        positions = {doc_id: i for i, (doc_id, _) in enumerate(documents)}
+        candidates = set()
+        for w in query_tfidf:
+            for doc_id in postings.get(w, ()):
+                i = positions.get(doc_id)
+                if i is not None:
+                    candidates.add(i)
+
+        scores: Dict[int, float] = {}
+        for i in candidates:
+            doc_tf = doc_tfs[i]
+            dot_product = sum(
+                q_value * doc_tf.get(w, 0) * idf(w)
+                for w, q_value in query_tfidf.items()
+            )
+            if dot_product == 0:
+                continue
+            doc_norm = math.sqrt(sum(
+                (tf_value * idf(w)) ** 2 for w, tf_value in doc_tf.items()
+            ))
+            if doc_norm:
+                scores[i] = dot_product / (query_norm * doc_norm)
+
+        # 保持文档原有顺序（同分时排序稳定）
+        if min_score <= 0:
+            indices = range(len(documents))
+        else:
+            indices = sorted(scores)
         results = []
-        for (doc_id, doc_text), doc_word_list in zip(documents, doc_words):
-            doc_tf = self.compute_tf(doc_word_list)
-            # 计算文档的TF-IDF
-            doc_tfidf = {
-                w: doc_tf.get(w, 0) * idf.get(w, 0)
-                for w in set(doc_word_list)
-            }
+        for i in indices:
+            score = scores.get(i, 0.0)
+            if score >= min_score:
+                results.append((documents[i][0], score))
 
-            score = self.cosine_similarity(query_tfidf, doc_tfidf)
+        # 按分数降序取前K个：堆选择 O(N log K)，与完整排序后截断结果一致（同分保持原序）
+        return heapq.nlargest(top_k, results, key=itemgetter(1))
 
-            if score >= min_score:
-                results.append((doc_id, score))
 
-        # 按分数降序排序
-        results.sort(key=lambda x: x[1], reverse=True)
+_semantic_search_manager: Optional[SemanticSearchManager] = None
+_semantic_search_lock = threading.Lock()
+
 
-        return results[:top_k]
+def get_semantic_search_manager() -> SemanticSearchManager:
+    """获取进程内共享的语义搜索管理器（全部 MemoryManager 共用一份文档索引）"""
+    global _semantic_search_manager
+    if _semantic_search_manager is None:
+        with _semantic_search_lock:
+            if _semantic_search_manager is None:
+                _semantic_search_manager = SemanticSearchManager()
+    return _semantic_search_manager
+
+
+class SemanticQueryCache:
+    """
+    语义搜索结果缓存
+
+    以查询的词频向量作为查询"嵌入"，新查询与已缓存查询的余弦相似度
+    达到阈值即视为同一问题，直接返回缓存结果（MeanCache 思路）。
+    scope 用于区分 tag/limit 等影响结果的参数，只在同一 scope 内匹配。
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 512,
+        ttl: float = 300,
+        threshold: float = 0.97
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        # (query, scope) -> (words, counts, norm, results, expire_at)
+        # 缓存向量以紧凑形式存储：words 为驻留(intern)后的词元组，
+        # 各条目共享同一字符串对象；counts 为 uint8 词频(截断到255)
+        self._entries: "OrderedDict[Tuple[str, Hashable], tuple]" = (
+            OrderedDict()
+        )
+        # 倒排索引 (scope, 词) -> {缓存键}，相似查询必然共享词，
+        # 查找时只比较候选集而不扫描全部缓存
+        self._postings: Dict[Tuple[Hashable, str], set] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _vectorize(query: str) -> Tuple[Dict[str, int], float]:
+        """查询 -> (词频向量, L2 模)"""
+        vec = Counter(tokenize(query))
+        norm = math.sqrt(sum(v * v for v in vec.values()))
+        return vec, norm
+
+    @staticmethod
+    def _compact(vec: Dict[str, int]) -> Tuple[Tuple[str, ...], bytes]:
+        """词频向量 -> (驻留词元组, uint8 词频)"""
+        words = tuple(sys.intern(word) for word in vec)
+        counts = bytes(min(vec[word], 255) for word in words)
+        return words, counts
+
+    def get(self, query: str, scope: Hashable) -> Optional[Any]:
+        """查找缓存，未命中返回 None"""
+        now = time.monotonic()
+        key = (query, scope)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[4] > now:
+                self._entries.move_to_end(key)
+                return entry[3]
+
+            vec, norm = self._vectorize(query)
+            if norm == 0:
+                return None
+
+            candidates = set()
+            for word in vec:
+                candidates |= self._postings.get((scope, word), set())
+
+            best_key, best_score = None, 0.0
+            for cached_key in candidates:
+                c_words, c_counts, c_norm, _, expire_at = (
+                    self._entries[cached_key]
+                )
+                if expire_at <= now:
+                    continue
+                dot = sum(
+                    count * vec.get(word, 0)
+                    for word, count in zip(c_words, c_counts)
+                )
+                score = dot / (norm * c_norm)
+                if score > best_score:
+                    best_key, best_score = cached_key, score
+
+            if best_key is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_key)
+                return self._entries[best_key][3]
+            return None
+
+    def set(self, query: str, scope: Hashable, results: Any):
+        """写入缓存"""
+        vec, norm = self._vectorize(query)
+        if norm == 0:
+            return
+        key = (query, scope)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            words, counts = self._compact(vec)
+            norm = math.sqrt(sum(c * c for c in counts))
+            self._entries[key] = (
+                words, counts, norm, results, time.monotonic() + self.ttl
+            )
+            for word in words:
+                self._postings.setdefault((scope, word), set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Tuple[str, Hashable]):
+        """删除一条缓存并同步倒排索引（调用方持有锁）"""
+        words = self._entries.pop(key)[0]
+        for word in words:
+            posting_key = (key[1], word)
+            posting = self._postings.get(posting_key)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[posting_key]
+
+    def clear(self):
+        """记忆变更后整体失效"""
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+
+# 语义搜索结果缓存（进程内所有 MemoryManager 共享）；
+# 任何记忆写入/删除都要调用 invalidate_search_cache 使其失效
+_semantic_query_cache = SemanticQueryCache(
+    maxsize=512, ttl=300, threshold=0.97
+)
+
+
+def get_semantic_query_cache() -> SemanticQueryCache:
+    """获取进程内共享的语义搜索结果缓存"""
+    return _semantic_query_cache
+
+
+def invalidate_search_cache():
+    """记忆发生变化（新增/修改/删除）后清空语义搜索结果缓存"""
+    _semantic_query_cache.clear()
 
 
 # 测试代码
@@ -179,6 +592,8 @@ if __name__ == "__main__":
         "咖啡"
     ]
 
+    id_to_text = dict(documents)
+
     print("=" * 50)
     for query in queries:
         print(f"查询: '{query}'")
@@ -186,7 +601,7 @@ if __name__ == "__main__":
 
         if results:
             for doc_id, score in results:
-                doc_text = next(text for id, text in documents if id == doc_id)
+                doc_text = id_to_text[doc_id]
                 print(f"  [{score:.3f}] {doc_text}")
         else:
             print("  无匹配结果")
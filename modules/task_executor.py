@@ -2,17 +2,41 @@
 任务执行引擎
 负责执行任务步骤、调用工具、处理用户确认等
 """
-import json
+import hashlib
 import logging
 import asyncio
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+import orjson
 
 from modules.task_manager import TaskManager
 from modules.tool_manager import ToolRegistry
 
+# uvloop（libuv 实现的事件循环，随 uvicorn[standard] 安装，不支持 Windows），
+# 不可用时使用标准库事件循环
+try:
+    import uvloop
+    _new_event_loop = uvloop.new_event_loop
+except ImportError:
+    _new_event_loop = asyncio.new_event_loop
+
 logger = logging.getLogger(__name__)
 
 
+def _dumps(obj: Any) -> str:
+    """序列化步骤结果（orjson，输出 UTF-8 JSON 文本）"""
+    return orjson.dumps(obj).decode('utf-8')
+
+
+TOOL_CACHE_SIZE = 512
+
+# 终态集合：任务结束后不可再执行/取消；步骤终态在恢复执行时跳过
+TERMINAL_TASK_STATUSES = frozenset({'completed', 'failed', 'cancelled'})
+TERMINAL_STEP_STATUSES = frozenset({'completed', 'failed'})
+
+
 class TaskExecutor:
     """任务执行器"""
 
@@ -26,15 +50,80 @@ class TaskExecutor:
         self.task_manager = task_manager
         self.tool_registry = tool_registry
 
+        # 常驻事件循环（独立线程）：工具调用提交到这里执行，
+        # 避免每次 asyncio.run 创建/销毁事件循环
+        self._loop = _new_event_loop()
+        # Python 3.12+：工具协程在首次真正挂起前同步执行，
+        # 无需 I/O 即返回的工具调用不再经过就绪队列调度
+        if hasattr(asyncio, 'eager_task_factory'):
+            self._loop.set_task_factory(asyncio.eager_task_factory)
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="task-executor-loop",
+            daemon=True
+        )
+        self._loop_thread.start()
+
+        # 纯函数工具（tool.cacheable）的结果缓存，(工具名, 参数摘要) -> 结果
+        self._tool_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._tool_cache_lock = threading.Lock()
+
+    def close(self):
+        """停止常驻事件循环"""
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
+
+    def _check_not_loop_thread(self):
+        """同步入口会阻塞等待常驻事件循环，在循环线程内调用必然死锁"""
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError(
+                "不能在任务执行器的事件循环线程中同步执行任务，"
+                "请改用 await execute_task_async(...)"
+            )
+
     def execute_task(
         self,
         task_id: int,
         user_id: str,
         session_id: str,
         user_confirm_callback: Optional[callable] = None
+    ) -> Dict[str, Any]:
+        """执行任务（同步入口，在常驻事件循环上运行 execute_task_async）
+
+        Args:
+            task_id: 任务ID
+            user_id: 用户ID
+            session_id: 会话ID
+            user_confirm_callback: 用户确认回调函数,接收(step_info)返回bool
+
+        Returns:
+            执行结果
+        """
+        self._check_not_loop_thread()
+        future = asyncio.run_coroutine_threadsafe(
+            self.execute_task_async(
+                task_id=task_id,
+                user_id=user_id,
+                session_id=session_id,
+                user_confirm_callback=user_confirm_callback
+            ),
+            self._loop
+        )
+        return future.result()
+
+    async def execute_task_async(
+        self,
+        task_id: int,
+        user_id: str,
+        session_id: str,
+        user_confirm_callback: Optional[callable] = None
     ) -> Dict[str, Any]:
         """执行任务
 
+        相互独立的工具调用步骤并发执行（见 _plan_waves），
+        数据库读写放到线程中执行，不阻塞事件循环。
+
         Args:
             task_id: 任务ID
             user_id: 用户ID
@@ -44,31 +133,60 @@ class TaskExecutor:
         Returns:
             执行结果
         """
-        try:
-            # 获取任务信息
-            task = self.task_manager.get_task(task_id)
+        # 置为执行中并取回任务及步骤（一条 UPDATE ... RETURNING）
+        task = await asyncio.to_thread(
+            self.task_manager.claim_task, task_id
+        )
+        if not task:
+            # 未领取到：区分任务不存在与任务已结束
+            task = await asyncio.to_thread(
+                self.task_manager.get_task, task_id
+            )
             if not task:
                 return {
                     'success': False,
                     'error': f'任务不存在: {task_id}'
                 }
+            return {
+                'success': False,
+                'error': f'任务状态无效: {task["status"]}'
+            }
 
-            # 检查任务状态
-            if task['status'] in ['completed', 'failed', 'cancelled']:
-                return {
-                    'success': False,
-                    'error': f'任务状态无效: {task["status"]}'
-                }
+        return await self._execute_task_inner(
+            task=task,
+            user_id=user_id,
+            session_id=session_id,
+            user_confirm_callback=user_confirm_callback
+        )
 
-            # 更新任务状态为执行中
-            self.task_manager.update_task_status(
-                task_id=task_id,
-                status='in_progress'
-            )
+    async def _execute_task_inner(
+        self,
+        task: Dict[str, Any],
+        user_id: str,
+        session_id: str,
+        user_confirm_callback: Optional[callable] = None
+    ) -> Dict[str, Any]:
+        """执行已领取（状态为执行中）的任务的剩余步骤
 
-            # 获取任务步骤
-            steps = self.task_manager.get_task_steps(task_id)
+        Args:
+            task: claim_task 返回的任务信息（含 steps）
+            user_id: 用户ID
+            session_id: 会话ID
+            user_confirm_callback: 用户确认回调函数,接收(step_info)返回bool
+
+        Returns:
+            执行结果
+        """
+        task_id = task['id']
+        try:
+            steps = task['steps']
             if not steps:
+                # 没有可执行的步骤，恢复为待处理
+                await asyncio.to_thread(
+                    self.task_manager.update_task_status,
+                    task_id=task_id,
+                    status='pending'
+                )
                 return {
                     'success': False,
                     'error': '任务没有步骤'
@@ -80,61 +198,75 @@ class TaskExecutor:
             failed_steps = 0
             results = []
 
+            # 跳过已完成或失败的步骤（一次遍历完成计数与筛选）
+            pending_steps = []
             for step in steps:
-                # 跳过已完成或失败的步骤
-                if step['status'] in ['completed', 'failed']:
-                    if step['status'] == 'completed':
-                        completed_steps += 1
-                    else:
-                        failed_steps += 1
-                    continue
-
-                # 执行步骤
-                step_result = self._execute_step(
-                    step=step,
-                    user_confirm_callback=user_confirm_callback,
-                    task_id=task_id,
-                    user_id=user_id,
-                    session_id=session_id
-                )
-
-                results.append({
-                    'step_id': step['id'],
-                    'step_order': step['step_num'],
-                    'title': step['description'],
-                    'result': step_result
-                })
-
-                # 检查是否需要等待用户确认
-                if step_result.get('status') == 'waiting':
-                    self.task_manager.update_step_status(
-                        step_id=step['id'],
-                        status='waiting',
-                        result=json.dumps(step_result, ensure_ascii=False)
-                    )
-                    # 停止执行循环
-                    break
-
-                # 更新步骤状态
-                if step_result['success']:
-                    self.task_manager.update_step_status(
-                        step_id=step['id'],
-                        status='completed',
-                        result=json.dumps(step_result, ensure_ascii=False)
-                    )
+                status = step['status']
+                if status not in TERMINAL_STEP_STATUSES:
+                    pending_steps.append(step)
+                elif status == 'completed':
                     completed_steps += 1
                 else:
-                    self.task_manager.update_step_status(
-                        step_id=step['id'],
-                        status='failed',
-                        error=step_result.get('error', '未知错误')
-                    )
                     failed_steps += 1
 
-                    # 如果步骤失败,判断是否继续
-                    if not step.get('continue_on_error', False):
-                        logger.warning(f"步骤失败,停止执行: {step['description']}")
+            # 步骤状态更新先收集，循环结束（或中断）时一次批量写入
+            step_updates = []
+            try:
+                for wave in self._plan_waves(pending_steps):
+                    # 同一批次内的步骤并发执行，结果按步骤顺序返回
+                    wave_results = await self._run_wave(
+                        wave,
+                        user_confirm_callback=user_confirm_callback,
+                        task_id=task_id,
+                        user_id=user_id,
+                        session_id=session_id
+                    )
+
+                    stop = False
+                    for step, step_result in zip(wave, wave_results):
+                        results.append({
+                            'step_id': step['id'],
+                            'step_order': step['step_num'],
+                            'title': step['description'],
+                            'result': step_result
+                        })
+
+                        # 检查是否需要等待用户确认
+                        if step_result.get('status') == 'waiting':
+                            # 与终态步骤同批写入，先于任务状态落库
+                            step_updates.append((
+                                step['id'], 'waiting',
+                                _dumps(step_result), None
+                            ))
+                            # 停止执行循环
+                            stop = True
+                            break
+
+                        # 更新步骤状态
+                        if step_result['success']:
+                            step_updates.append((
+                                step['id'], 'completed',
+                                _dumps(step_result), None
+                            ))
+                            completed_steps += 1
+                        else:
+                            step_updates.append((
+                                step['id'], 'failed',
+                                None, step_result.get('error', '未知错误')
+                            ))
+                            failed_steps += 1
+
+                            # 如果步骤失败,判断是否继续
+                            if not step.get('continue_on_error', False):
+                                logger.warning(f"步骤失败,停止执行: {step['description']}")
+                                stop = True
+
+                    if stop:
                         break
+            finally:
+                await asyncio.to_thread(
+                    self.task_manager.batch_update_step_status, step_updates
+                )
 
             # 更新任务状态
             if failed_steps > 0 and completed_steps == 0:
@@ -150,7 +282,8 @@ class TaskExecutor:
                 # 仍在执行中(可能有等待步骤)
                 final_status = 'waiting'
 
-            self.task_manager.update_task_status(
+            await asyncio.to_thread(
+                self.task_manager.update_task_status,
                 task_id=task_id,
                 status=final_status
             )
@@ -169,7 +302,8 @@ class TaskExecutor:
             logger.error(f"执行任务失败: {e}", exc_info=True)
             # 更新任务状态为失败
             try:
-                self.task_manager.update_task_status(
+                await asyncio.to_thread(
+                    self.task_manager.update_task_status,
                     task_id=task_id,
                     status='failed'
                 )
@@ -181,7 +315,73 @@ class TaskExecutor:
                 'error': str(e)
             }
 
-    def _execute_step(
+    @staticmethod
+    def _plan_waves(steps: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """将待执行步骤按顺序划分为可并发执行的批次
+
+        - 默认顺序执行：每个步骤依赖它之前的全部步骤，单独成批
+        - tool_call 步骤显式给出 action_params['depends_on']（所依赖的步骤序号列表，
+          [] 表示与之前的步骤无关）且不依赖当前批次中的步骤时，并入当前批次并发执行
+        - user_confirm / wait / info 等步骤是屏障，单独成批，保持原有顺序
+
+        Args:
+            steps: 待执行步骤（按 step_num 排序）
+
+        Returns:
+            批次列表
+        """
+        waves = []
+        wave = []
+        wave_nums = set()
+        for step in steps:
+            if step.get('action_type') != 'tool_call':
+                if wave:
+                    waves.append(wave)
+                    wave, wave_nums = [], set()
+                waves.append([step])
+                continue
+
+            params = step.get('action_params')
+            depends_on = params.get('depends_on') if isinstance(params, dict) else None
+            independent = False
+            if isinstance(depends_on, list):
+                try:
+                    independent = not wave_nums.intersection(
+                        int(num) for num in depends_on
+                    )
+                except (TypeError, ValueError):
+                    # 序号无法识别，按依赖全部前序步骤处理
+                    independent = False
+
+            if wave and not independent:
+                waves.append(wave)
+                wave, wave_nums = [], set()
+            wave.append(step)
+            wave_nums.add(step['step_num'])
+
+        if wave:
+            waves.append(wave)
+        return waves
+
+    async def _run_wave(
+        self,
+        wave: List[Dict[str, Any]],
+        **step_kwargs
+    ) -> List[Dict[str, Any]]:
+        """并发执行一个批次的步骤，结果按步骤顺序返回
+
+        批次内的步骤同时开始。某个步骤失败时不取消其余步骤：
+        已在线程中开始的工具调用无法中断，其副作用（创建提醒、删除记忆等）照常发生，
+        因此等它们执行完并返回真实结果；是否继续执行后续批次由调用方判断。
+        """
+        if len(wave) == 1:
+            return [await self._execute_step(step=wave[0], **step_kwargs)]
+
+        return list(await asyncio.gather(*(
+            self._execute_step(step=step, **step_kwargs) for step in wave
+        )))
+
+    async def _execute_step(
         self,
         step: Dict[str, Any],
         user_confirm_callback: Optional[callable] = None,
@@ -207,7 +407,7 @@ class TaskExecutor:
         try:
             if action_type == 'tool_call':
                 # 调用工具
-                return self._execute_tool_call(
+                return await self._execute_tool_call(
                     params=action_params,
                     task_id=task_id,
                     user_id=user_id,
@@ -215,8 +415,12 @@ class TaskExecutor:
                 )
 
             elif action_type == 'user_confirm':
-                # 用户确认
-                return self._execute_user_confirm(step, user_confirm_callback)
+                # 用户确认（回调可能阻塞，放到线程中执行）
+                if user_confirm_callback:
+                    return await asyncio.to_thread(
+                        self._execute_user_confirm, step, user_confirm_callback
+                    )
+                return self._execute_user_confirm(step, None)
 
             elif action_type == 'wait':
                 # 等待
@@ -243,7 +447,7 @@ class TaskExecutor:
                 'error': str(e)
             }
 
-    def _execute_tool_call(
+    async def _execute_tool_call(
         self,
         params: Dict[str, Any],
         task_id: Optional[int] = None,
@@ -271,16 +475,50 @@ class TaskExecutor:
                     'error': '缺少工具名称'
                 }
 
-            # 调用工具
+            tool = self.tool_registry.get(tool_name)
+            cache_key = None
+            if tool is not None and tool.cacheable:
+                digest = hashlib.blake2b(orjson.dumps(
+                    tool_params, option=orjson.OPT_SORT_KEYS, default=str
+                ), digest_size=16).digest()
+                cache_key = (tool_name, digest)
+                with self._tool_cache_lock:
+                    result = self._tool_cache.get(cache_key)
+                    if result is not None:
+                        self._tool_cache.move_to_end(cache_key)
+                if result is not None:
+                    logger.info(f"工具结果命中缓存: {tool_name}")
+                    return {
+                        'success': True,
+                        'tool_name': tool_name,
+                        'result': result,
+                        'action_type': 'tool_call'
+                    }
+
+            # 调用工具：声明为 async_safe 的工具直接在常驻事件循环上 await；
+            # 其余工具可能在 execute 中阻塞，放到独立线程（自带事件循环）执行，
+            # 不拖住同一事件循环上的其他任务
             logger.info(f"调用工具: {tool_name}")
-            # 使用 asyncio.run 执行异步工具方法
-            result = asyncio.run(self.tool_registry.execute(
-                tool_name=tool_name,
-                params=tool_params,
-                user_id=user_id,
-                session_id=session_id,
-                task_id=task_id
-            ))
+            exec_kwargs = {
+                'tool_name': tool_name,
+                'params': tool_params,
+                'user_id': user_id,
+                'session_id': session_id,
+                'task_id': task_id
+            }
+            if tool is not None and tool.async_safe:
+                result = await self.tool_registry.execute(**exec_kwargs)
+            else:
+                result = await asyncio.to_thread(
+                    self._execute_tool_blocking, exec_kwargs
+                )
+
+            # 只缓存成功结果
+            if cache_key is not None and result.get('success'):
+                with self._tool_cache_lock:
+                    self._tool_cache[cache_key] = result
+                    if len(self._tool_cache) > TOOL_CACHE_SIZE:
+                        self._tool_cache.popitem(last=False)
 
             return {
                 'success': True,
@@ -296,6 +534,12 @@ class TaskExecutor:
                 'error': f'工具调用失败: {str(e)}'
             }
 
+    def _execute_tool_blocking(
+        self, exec_kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """在工作线程中用独立事件循环执行工具（供非 async_safe 工具使用）"""
+        return asyncio.run(self.tool_registry.execute(**exec_kwargs))
+
     def _execute_user_confirm(
         self,
         step: Dict[str, Any],
@@ -378,25 +622,31 @@ class TaskExecutor:
         Returns:
             执行结果
         """
-        task = self.task_manager.get_task(task_id)
+        self._check_not_loop_thread()
+        # 校验 waiting 状态并置为执行中，同一条语句取回任务及步骤
+        task = self.task_manager.claim_task(task_id, from_status='waiting')
         if not task:
-            return {
-                'success': False,
-                'error': f'任务不存在: {task_id}'
-            }
-
-        if task['status'] != 'waiting':
+            task = self.task_manager.get_task(task_id)
+            if not task:
+                return {
+                    'success': False,
+                    'error': f'任务不存在: {task_id}'
+                }
             return {
                 'success': False,
                 'error': f'任务状态不是waiting,无法恢复: {task["status"]}'
             }
 
-        # 调用execute_task继续执行
-        return self.execute_task(
-            task_id=task_id,
-            user_id=user_id,
-            session_id=session_id
+        # 直接执行剩余步骤，不再经 execute_task 重新读取任务
+        future = asyncio.run_coroutine_threadsafe(
+            self._execute_task_inner(
+                task=task,
+                user_id=user_id,
+                session_id=session_id
+            ),
+            self._loop
         )
+        return future.result()
 
     def cancel_task(self, task_id: int) -> Dict[str, Any]:
         """取消任务
@@ -415,7 +665,7 @@ class TaskExecutor:
                     'error': f'任务不存在: {task_id}'
                 }
 
-            if task['status'] in ['completed', 'failed', 'cancelled']:
+            if task['status'] in TERMINAL_TASK_STATUSES:
                 return {
                     'success': False,
                     'error': f'任务已结束,无法取消: {task["status"]}'
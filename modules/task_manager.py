@@ -3,14 +3,176 @@
 负责任务的创建、查询、更新、删除和执行管理
 """
 import logging
-import json
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional, List, Dict, Any
+import orjson
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import errors as pg_errors, pool
+from psycopg2.extras import (
+    Jsonb, RealDictCursor, execute_values,
+    register_default_json, register_default_jsonb
+)
 
 logger = logging.getLogger(__name__)
 
+# 任务读取缓存有效期（秒）；本进程写入任务时主动失效。
+# 其他进程（多 worker、调度器）的写入不会失效本进程缓存，
+# 因此缓存只供纯展示读取按需使用（use_cache=True），依据状态做决定的调用直接读库
+TASK_CACHE_TTL = 2.0
+
+# 后台杂务线程池（如删除任务后清理提醒缓存），首次使用时创建
+_housekeeping_executor: Optional[ThreadPoolExecutor] = None
+_housekeeping_lock = threading.Lock()
+
+
+def _housekeeping() -> ThreadPoolExecutor:
+    global _housekeeping_executor
+    if _housekeeping_executor is None:
+        with _housekeeping_lock:
+            if _housekeeping_executor is None:
+                _housekeeping_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="taskmgr-housekeep"
+                )
+    return _housekeeping_executor
+
+
+def _dumps(obj: Any) -> str:
+    """序列化为 JSON 文本（orjson）"""
+    return orjson.dumps(obj).decode('utf-8')
+
+
+_loads = orjson.loads
+
+# json / jsonb 列（action_params、json_agg 结果）由驱动直接解码为 Python 对象，
+# 改用 orjson 解码
+register_default_json(globally=True, loads=_loads)
+register_default_jsonb(globally=True, loads=_loads)
+
+# 列表查询只取界面/调用方用到的列，不读取 result / error_message 大字段
+_TASK_LIST_COLUMNS = """
+    id, user_id, session_id, title, description, status, parent_id,
+    order_num, priority, retry_count, max_retries,
+    created_at, updated_at, started_at, completed_at
+"""
+_STEP_LIST_COLUMNS = """
+    id, task_id, step_num, description, action_type, action_params, status
+"""
+# 任务详情 / 领取任务时返回的列。预备语句中显式列出列名，不用 SELECT *：
+# 表新增列时语句结果类型不变
+_TASK_COLUMNS = _TASK_LIST_COLUMNS + ", result, error_message"
+_STEP_COLUMNS = _STEP_LIST_COLUMNS + """,
+    result, error_message, created_at, started_at, completed_at
+"""
+# 任务的全部步骤（按序号）聚合为 JSON 数组
+_STEPS_JSON_SQL = f"""COALESCE(
+            (SELECT json_agg(s ORDER BY s.step_num)
+             FROM (SELECT {_STEP_COLUMNS} FROM task_steps
+                   WHERE task_id = t.id) s),
+            '[]'::json
+        ) AS steps"""
+
+
+def _build_status_sql(
+    table: str,
+    timestamps: Dict[str, str],
+    returning: str = ''
+) -> Dict[tuple, str]:
+    """
+    预先生成状态更新 SQL：(状态, 是否带 result, 是否带 error_message) -> SQL
+
+    timestamps 为 状态 -> 需要同时写入当前时间的列；
+    不在其中的状态（键为 None）只更新 status。
+    """
+    statements = {}
+    for status in (*timestamps, None):
+        fields = ["status = %s"]
+        if status in timestamps:
+            fields.append(f"{timestamps[status]} = CURRENT_TIMESTAMP")
+        for has_result in (False, True):
+            for has_error in (False, True):
+                extra = (["result = %s"] if has_result else []) + \
+                    (["error_message = %s"] if has_error else [])
+                statements[(status, has_result, has_error)] = (
+                    f"UPDATE {table} SET {', '.join(fields + extra)} "
+                    f"WHERE id = %s{returning}"
+                )
+    return statements
+
+
+_TASK_STATUS_SQL = _build_status_sql('tasks', {
+    'in_progress': 'started_at',
+    'completed': 'completed_at',
+    'failed': 'completed_at',
+    'cancelled': 'completed_at',
+}, returning=' RETURNING session_id')
+
+_STEP_STATUS_SQL = _build_status_sql('task_steps', {
+    'in_progress': 'started_at',
+    'completed': 'completed_at',
+    'failed': 'completed_at',
+})
+
+
+def _status_sql_and_params(
+    statements: Dict[tuple, str],
+    row_id: int,
+    status: str,
+    result: Optional[str],
+    error_message: Optional[str]
+) -> tuple:
+    """查表取状态更新 SQL 并组装参数"""
+    key = (status, result is not None, error_message is not None)
+    sql = statements.get(key) or statements[(None, key[1], key[2])]
+    params = [status]
+    if result is not None:
+        params.append(result)
+    if error_message is not None:
+        params.append(error_message)
+    params.append(row_id)
+    return sql, params
+
+
+# 执行任务时反复调用的语句，在每个连接上 PREPARE 一次，之后只发送 EXECUTE，
+# 省去每次的 SQL 解析与规划：名称 -> (参数类型, SQL)
+# 列类型变更（如迁移 017）后首次执行会报 "cached plan must not change result type"，
+# 由 _execute_prepared 重新 PREPARE 后重试
+_PREPARED_STATEMENTS = {
+    'task_get': ('int', f"""
+        SELECT {_TASK_COLUMNS} FROM tasks WHERE id = $1
+    """),
+    'task_get_steps': ('int', f"""
+        SELECT {_STEP_LIST_COLUMNS} FROM task_steps
+        WHERE task_id = $1
+        ORDER BY step_num
+    """),
+    'task_get_with_steps': ('int', f"""
+        SELECT {_TASK_COLUMNS}, {_STEPS_JSON_SQL}
+        FROM tasks t
+        WHERE t.id = $1
+    """),
+    'task_claim': ('int', f"""
+        UPDATE tasks t
+        SET status = 'in_progress',
+            started_at = CURRENT_TIMESTAMP
+        WHERE t.id = $1
+          AND t.status NOT IN ('completed', 'failed', 'cancelled')
+        RETURNING {_TASK_COLUMNS}, {_STEPS_JSON_SQL}
+    """),
+    'task_claim_from': ('int, text', f"""
+        UPDATE tasks t
+        SET status = 'in_progress',
+            started_at = CURRENT_TIMESTAMP
+        WHERE t.id = $1
+          AND t.status = $2
+        RETURNING {_TASK_COLUMNS}, {_STEPS_JSON_SQL}
+    """),
+}
+
 
 class TaskManager:
     """任务管理器类"""
@@ -23,13 +185,113 @@ class TaskManager:
             db_config: 数据库配置字典
         """
         self.db_config = db_config
+        # 连接池在首次使用时创建；执行一个任务会多次读写任务/步骤，
+        # 复用连接省去每次调用的 TCP + 认证握手
+        self._pool: Optional[pool.ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # 已执行过 PREPARE 的连接（连接关闭后自动移除）
+        self._prepared_conns = weakref.WeakSet()
+        # 短 TTL 读缓存：task_id -> (过期时间, 任务)，
+        # (session_id, status) -> (过期时间, 任务列表)
+        self._task_cache: Dict[int, tuple] = {}
+        self._session_cache: Dict[tuple, tuple] = {}
+        self._cache_lock = threading.Lock()
         logger.info("✅ 任务管理器初始化完成")
 
     def _get_connection(self):
-        """获取数据库连接"""
+        """新建数据库连接（连接池已满时的兜底）"""
         conn = psycopg2.connect(**self.db_config, client_encoding='utf8')
+        conn.autocommit = True
         return conn
 
+    def _get_pool(self) -> pool.ThreadedConnectionPool:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pool.ThreadedConnectionPool(
+                        minconn=2,
+                        maxconn=20,
+                        client_encoding='utf8',
+                        **self.db_config
+                    )
+        return self._pool
+
+    @contextmanager
+    def _conn(self):
+        """
+        从连接池借出连接，结束时归还
+
+        连接为 autocommit 模式：单条语句自动提交，省去 COMMIT 往返；
+        需要多条语句原子提交时使用 _transaction。
+        """
+        try:
+            conn = self._get_pool().getconn()
+            if not conn.autocommit:
+                conn.autocommit = True
+            pooled = True
+        except pool.PoolError:
+            conn = self._get_connection()
+            pooled = False
+        try:
+            yield conn
+        finally:
+            if pooled:
+                self._pool.putconn(conn)
+            else:
+                conn.close()
+
+    @staticmethod
+    @contextmanager
+    def _transaction(cursor):
+        """在 autocommit 连接上显式 BEGIN / COMMIT，出错时 ROLLBACK"""
+        cursor.execute("BEGIN")
+        try:
+            yield
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+
+    def _prepare_statements(self, conn, cursor) -> None:
+        """在连接上 PREPARE 全部热点语句"""
+        self._prepared_conns.discard(conn)
+        # 清掉已有（或上次中途失败时残留）的语句
+        cursor.execute("DEALLOCATE ALL")
+        for stmt_name, (arg_types, sql) in _PREPARED_STATEMENTS.items():
+            cursor.execute(f"PREPARE {stmt_name} ({arg_types}) AS {sql}")
+        self._prepared_conns.add(conn)
+
+    def _execute_prepared(self, conn, cursor, name: str, args: tuple) -> None:
+        """执行预备语句（连接首次使用时 PREPARE 全部热点语句）
+
+        表结构变更后已准备的语句失效（cached plan must not change result type），
+        重新 PREPARE 后重试一次；该错误在执行前抛出，语句未生效，重试安全。
+        """
+        if conn not in self._prepared_conns:
+            self._prepare_statements(conn, cursor)
+        placeholders = ', '.join(['%s'] * len(args))
+        try:
+            cursor.execute(f"EXECUTE {name} ({placeholders})", args)
+        except pg_errors.FeatureNotSupported as e:
+            if 'cached plan' not in str(e):
+                raise
+            logger.warning(f"表结构已变更，重新准备预备语句: {name}")
+            self._prepare_statements(conn, cursor)
+            cursor.execute(f"EXECUTE {name} ({placeholders})", args)
+
+    def _invalidate_task(
+        self,
+        task_id: int = None,
+        session_id: str = None
+    ) -> None:
+        """任务写入后失效对应的读缓存"""
+        with self._cache_lock:
+            if task_id is not None:
+                self._task_cache.pop(task_id, None)
+            if session_id is not None:
+                for key in [k for k in self._session_cache if k[0] == session_id]:
+                    del self._session_cache[key]
+
     # ==================== 任务 CRUD ====================
 
     def create_task(
@@ -56,23 +318,19 @@ class TaskManager:
             任务ID，失败返回None
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                INSERT INTO tasks (
-                    user_id, session_id, title, description, 
-                    parent_id, priority, status
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, 'pending')
-                RETURNING id
-            """, (user_id, session_id, title, description, parent_id, priority))
+            with self._conn() as conn, conn.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO tasks (
+                        user_id, session_id, title, description, 
+                        parent_id, priority, status
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, 'pending')
+                    RETURNING id
+                """, (user_id, session_id, title, description, parent_id, priority))
 
-            task_id = cursor.fetchone()[0]
-            conn.commit()
-            cursor.close()
-            conn.close()
+                task_id = cursor.fetchone()[0]
 
+            self._invalidate_task(session_id=session_id)
             logger.info(f"📝 创建任务成功: ID={task_id}, 标题={title}")
             return task_id
 
@@ -80,29 +338,39 @@ class TaskManager:
             logger.error(f"❌ 创建任务失败: {e}")
             return None
 
-    def get_task(self, task_id: int) -> Optional[Dict[str, Any]]:
+    def get_task(
+        self,
+        task_id: int,
+        use_cache: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         获取任务详情
 
         Args:
             task_id: 任务ID
+            use_cache: 是否允许返回最多 TASK_CACHE_TTL 秒前的缓存（仅用于展示）
 
         Returns:
             任务信息字典，失败返回None
         """
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+        if use_cache:
+            with self._cache_lock:
+                cached = self._task_cache.get(task_id)
+            if cached is not None and cached[0] > time.monotonic():
+                return dict(cached[1])
 
-            cursor.execute("""
-                SELECT * FROM tasks WHERE id = %s
-            """, (task_id,))
+        try:
+            with self._conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                self._execute_prepared(conn, cursor, 'task_get', (task_id,))
 
-            task = cursor.fetchone()
-            cursor.close()
-            conn.close()
+                task = cursor.fetchone()
 
             if task:
+                task = dict(task)
+                with self._cache_lock:
+                    self._task_cache[task_id] = (
+                        time.monotonic() + TASK_CACHE_TTL, task
+                    )
                 return dict(task)
             return None
 
@@ -113,7 +381,8 @@ class TaskManager:
     def get_tasks_by_session(
         self,
         session_id: str,
-        status: str = None
+        status: str = None,
+        use_cache: bool = False
     ) -> List[Dict[str, Any]]:
         """
         获取会话的所有任务
@@ -121,31 +390,39 @@ class TaskManager:
         Args:
             session_id: 会话ID
             status: 任务状态过滤（可选）
+            use_cache: 是否允许返回最多 TASK_CACHE_TTL 秒前的缓存（仅用于展示）
 
         Returns:
             任务列表
         """
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-            if status:
-                cursor.execute("""
-                    SELECT * FROM tasks 
-                    WHERE session_id = %s AND status = %s
-                    ORDER BY created_at DESC
-                """, (session_id, status))
-            else:
-                cursor.execute("""
-                    SELECT * FROM tasks 
-                    WHERE session_id = %s
-                    ORDER BY created_at DESC
-                """, (session_id,))
-
-            tasks = cursor.fetchall()
-            cursor.close()
-            conn.close()
+        cache_key = (session_id, status)
+        if use_cache:
+            with self._cache_lock:
+                cached = self._session_cache.get(cache_key)
+            if cached is not None and cached[0] > time.monotonic():
+                return [dict(task) for task in cached[1]]
 
+        try:
+            with self._conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                if status:
+                    cursor.execute(f"""
+                        SELECT {_TASK_LIST_COLUMNS} FROM tasks
+                        WHERE session_id = %s AND status = %s
+                        ORDER BY created_at DESC
+                    """, (session_id, status))
+                else:
+                    cursor.execute(f"""
+                        SELECT {_TASK_LIST_COLUMNS} FROM tasks
+                        WHERE session_id = %s
+                        ORDER BY created_at DESC
+                    """, (session_id,))
+
+                tasks = [dict(task) for task in cursor.fetchall()]
+
+            with self._cache_lock:
+                self._session_cache[cache_key] = (
+                    time.monotonic() + TASK_CACHE_TTL, tasks
+                )
             return [dict(task) for task in tasks]
 
         except Exception as e:
@@ -170,27 +447,23 @@ class TaskManager:
             任务列表
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-            if status:
-                cursor.execute("""
-                    SELECT * FROM tasks 
-                    WHERE user_id = %s AND status = %s
-                    ORDER BY created_at DESC
-                    LIMIT %s
-                """, (user_id, status, limit))
-            else:
-                cursor.execute("""
-                    SELECT * FROM tasks 
-                    WHERE user_id = %s
-                    ORDER BY created_at DESC
-                    LIMIT %s
-                """, (user_id, limit))
-
-            tasks = cursor.fetchall()
-            cursor.close()
-            conn.close()
+            with self._conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                if status:
+                    cursor.execute(f"""
+                        SELECT {_TASK_LIST_COLUMNS} FROM tasks
+                        WHERE user_id = %s AND status = %s
+                        ORDER BY created_at DESC
+                        LIMIT %s
+                    """, (user_id, status, limit))
+                else:
+                    cursor.execute(f"""
+                        SELECT {_TASK_LIST_COLUMNS} FROM tasks
+                        WHERE user_id = %s
+                        ORDER BY created_at DESC
+                        LIMIT %s
+                    """, (user_id, limit))
+
+                tasks = cursor.fetchall()
 
             return [dict(task) for task in tasks]
 
@@ -218,39 +491,14 @@ class TaskManager:
             是否成功
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-
-            # 构建更新SQL
-            update_fields = ["status = %s"]
-            params = [status]
-
-            if status == 'in_progress':
-                update_fields.append("started_at = CURRENT_TIMESTAMP")
-            elif status in ['completed', 'failed', 'cancelled']:
-                update_fields.append("completed_at = CURRENT_TIMESTAMP")
-
-            if result is not None:
-                update_fields.append("result = %s")
-                params.append(result)
-
-            if error_message is not None:
-                update_fields.append("error_message = %s")
-                params.append(error_message)
-
-            params.append(task_id)
-
-            sql = f"""
-                UPDATE tasks 
-                SET {', '.join(update_fields)}
-                WHERE id = %s
-            """
-
-            cursor.execute(sql, params)
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with self._conn() as conn, conn.cursor() as cursor:
+                sql, params = _status_sql_and_params(
+                    _TASK_STATUS_SQL, task_id, status, result, error_message
+                )
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
 
+            self._invalidate_task(task_id, row[0] if row else None)
             logger.info(f"✅ 更新任务状态: ID={task_id}, 状态={status}")
             return True
 
@@ -269,38 +517,23 @@ class TaskManager:
             是否成功
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-
-            # 1. 获取任务所属用户ID (用于清除提醒缓存)
-            cursor.execute(
-                "SELECT user_id FROM tasks WHERE id = %s", (task_id,)
-            )
-            result = cursor.fetchone()
-            user_id = result[0] if result else None
-
-            # 2. 删除任务
-            # 由于设置了ON DELETE CASCADE，删除任务会自动删除步骤和子任务
-            # 也会自动删除关联的 reminders (如果有外键约束)
-            cursor.execute("DELETE FROM tasks WHERE id = %s", (task_id,))
+            with self._conn() as conn, conn.cursor() as cursor:
+                # 1. 删除任务，同时取回所属用户ID (用于清除提醒缓存) 和会话ID
+                # 由于设置了ON DELETE CASCADE，删除任务会自动删除步骤和子任务
+                # 也会自动删除关联的 reminders (如果有外键约束)
+                cursor.execute(
+                    "DELETE FROM tasks WHERE id = %s RETURNING user_id, session_id",
+                    (task_id,)
+                )
+                result = cursor.fetchone()
+                user_id = result[0] if result else None
+                session_id = result[1] if result else None
 
-            conn.commit()
-            cursor.close()
-            conn.close()
+            self._invalidate_task(task_id, session_id)
 
-            # 3. 清除提醒缓存 (如果存在关联提醒被级联删除)
+            # 2. 清除提醒缓存 (如果存在关联提醒被级联删除)，后台执行不阻塞返回
             if user_id:
-                try:
-                    # 延迟导入避免循环依赖
-                    from modules.reminder_manager import get_reminder_manager
-                    reminder_mgr = get_reminder_manager()
-                    # 这是一个私有方法，但为了保持一致性我们需要调用它
-                    # 或者我们可以添加一个公共方法 clear_cache(user_id)
-                    if hasattr(reminder_mgr, '_clear_user_cache'):
-                        reminder_mgr._clear_user_cache(user_id)
-                        logger.info(f"🧹 已清除用户 {user_id} 的提醒缓存 (因任务删除)")
-                except Exception as e:
-                    logger.warning(f"清除提醒缓存失败: {e}")
+                _housekeeping().submit(self._clear_reminder_cache, user_id)
 
             logger.info(f"🗑️ 删除任务成功: ID={task_id}")
             return True
@@ -309,6 +542,60 @@ class TaskManager:
             logger.error(f"❌ 删除任务失败: {e}")
             return False
 
+    def delete_if_owned(self, task_id: int, user_id: str) -> str:
+        """
+        校验所有权并删除任务（常见路径只需一条 DELETE）
+
+        Args:
+            task_id: 任务ID
+            user_id: 当前用户ID
+
+        Returns:
+            'ok' - 已删除; 'not_found' - 任务不存在;
+            'forbidden' - 任务属于其他用户; 'error' - 数据库错误
+        """
+        try:
+            with self._conn() as conn, conn.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM tasks WHERE id = %s AND user_id = %s "
+                    "RETURNING session_id",
+                    (task_id, user_id)
+                )
+                deleted = cursor.fetchone()
+
+                if not deleted:
+                    # 未删除：区分不存在与无权限
+                    cursor.execute(
+                        "SELECT 1 FROM tasks WHERE id = %s LIMIT 1", (task_id,)
+                    )
+                    exists = cursor.fetchone()
+
+            if not deleted:
+                return 'forbidden' if exists else 'not_found'
+
+            self._invalidate_task(task_id, deleted[0])
+            _housekeeping().submit(self._clear_reminder_cache, user_id)
+            logger.info(f"🗑️ 删除任务成功: ID={task_id}")
+            return 'ok'
+
+        except Exception as e:
+            logger.error(f"❌ 删除任务失败: {e}")
+            return 'error'
+
+    def _clear_reminder_cache(self, user_id: str) -> None:
+        """清除用户提醒缓存（任务删除会级联删除关联提醒）"""
+        try:
+            # 延迟导入避免循环依赖
+            from modules.reminder_manager import get_reminder_manager
+            reminder_mgr = get_reminder_manager()
+            # 这是一个私有方法，但为了保持一致性我们需要调用它
+            # 或者我们可以添加一个公共方法 clear_cache(user_id)
+            if hasattr(reminder_mgr, '_clear_user_cache'):
+                reminder_mgr._clear_user_cache(user_id)
+                logger.info(f"🧹 已清除用户 {user_id} 的提醒缓存 (因任务删除)")
+        except Exception as e:
+            logger.warning(f"清除提醒缓存失败: {e}")
+
     # ==================== 任务步骤管理 ====================
 
     def create_step(
@@ -333,25 +620,20 @@ class TaskManager:
             步骤ID，失败返回None
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-
-            # 将参数字典转换为JSON字符串
-            params_json = json.dumps(action_params) if action_params else None
+            with self._conn() as conn, conn.cursor() as cursor:
+                # action_params 为 JSONB 列（迁移 017），由适配器序列化
+                params_json = Jsonb(action_params, dumps=_dumps) if action_params else None
 
-            cursor.execute("""
-                INSERT INTO task_steps (
-                    task_id, step_num, description, 
-                    action_type, action_params, status
-                )
-                VALUES (%s, %s, %s, %s, %s, 'pending')
-                RETURNING id
-            """, (task_id, step_num, description, action_type, params_json))
+                cursor.execute("""
+                    INSERT INTO task_steps (
+                        task_id, step_num, description, 
+                        action_type, action_params, status
+                    )
+                    VALUES (%s, %s, %s, %s, %s, 'pending')
+                    RETURNING id
+                """, (task_id, step_num, description, action_type, params_json))
 
-            step_id = cursor.fetchone()[0]
-            conn.commit()
-            cursor.close()
-            conn.close()
+                step_id = cursor.fetchone()[0]
 
             logger.info(f"📋 创建步骤成功: TaskID={task_id}, StepNum={step_num}")
             return step_id
@@ -360,6 +642,57 @@ class TaskManager:
             logger.error(f"❌ 创建步骤失败: {e}")
             return None
 
+    def create_steps(
+        self,
+        task_id: int,
+        steps: List[Dict[str, Any]]
+    ) -> List[int]:
+        """
+        批量创建任务步骤（一条 INSERT ... VALUES，一个事务）
+
+        Args:
+            task_id: 任务ID
+            steps: 步骤列表，每项含 step_num / description /
+                   action_type / action_params
+
+        Returns:
+            步骤ID列表（与 steps 顺序一致），失败返回空列表
+        """
+        if not steps:
+            return []
+
+        try:
+            rows = [
+                (
+                    task_id,
+                    step.get('step_num', 0),
+                    step.get('description', ''),
+                    step.get('action_type'),
+                    Jsonb(step['action_params'], dumps=_dumps)
+                    if step.get('action_params') else None,
+                    'pending'
+                )
+                for step in steps
+            ]
+            # execute_values 按页拆成多条 INSERT，放在同一事务中
+            with self._conn() as conn, conn.cursor() as cursor, \
+                    self._transaction(cursor):
+                inserted = execute_values(cursor, """
+                    INSERT INTO task_steps (
+                        task_id, step_num, description,
+                        action_type, action_params, status
+                    )
+                    VALUES %s
+                    RETURNING id
+                """, rows, fetch=True)
+
+            logger.info(f"📋 创建步骤成功: TaskID={task_id}, 共{len(inserted)}步")
+            return [row[0] for row in inserted]
+
+        except Exception as e:
+            logger.error(f"❌ 批量创建步骤失败: {e}")
+            return []
+
     def get_task_steps(self, task_id: int) -> List[Dict[str, Any]]:
         """
         获取任务的所有步骤
@@ -371,37 +704,95 @@ class TaskManager:
             步骤列表（按step_num排序）
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-            cursor.execute("""
-                SELECT * FROM task_steps 
-                WHERE task_id = %s
-                ORDER BY step_num
-            """, (task_id,))
-
-            steps = cursor.fetchall()
-            cursor.close()
-            conn.close()
-
-            # 解析JSON参数
-            result = []
-            for step in steps:
-                step_dict = dict(step)
-                if step_dict.get('action_params'):
-                    try:
-                        step_dict['action_params'] = json.loads(
-                            step_dict['action_params'])
-                    except:
-                        pass
-                result.append(step_dict)
-
-            return result
+            # 普通游标返回元组，列名只取一次，省去 RealDictCursor 的逐行字典开销
+            with self._conn() as conn, conn.cursor() as cursor:
+                self._execute_prepared(
+                    conn, cursor, 'task_get_steps', (task_id,)
+                )
+
+                columns = [column.name for column in cursor.description]
+                rows = cursor.fetchall()
+
+            return [dict(zip(columns, row)) for row in rows]
 
         except Exception as e:
             logger.error(f"❌ 获取任务步骤失败: {e}")
             return []
 
+    def get_task_with_steps(
+        self,
+        task_id: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        一次查询获取任务及其全部步骤
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            任务信息字典（steps 字段为按 step_num 排序的步骤列表），
+            任务不存在或失败返回None
+        """
+        try:
+            with self._conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                self._execute_prepared(
+                    conn, cursor, 'task_get_with_steps', (task_id,)
+                )
+
+                task = cursor.fetchone()
+
+            if not task:
+                return None
+
+            return dict(task)
+
+        except Exception as e:
+            logger.error(f"❌ 获取任务详情失败: {e}")
+            return None
+
+    def claim_task(
+        self,
+        task_id: int,
+        from_status: str = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        将任务置为执行中并返回任务及其步骤（一条 UPDATE ... RETURNING）
+
+        状态检查与状态转换在同一语句中完成，已结束（completed / failed /
+        cancelled）的任务不会被重新置为执行中。
+
+        Args:
+            task_id: 任务ID
+            from_status: 只领取处于该状态的任务（可选，如恢复时为 waiting）
+
+        Returns:
+            任务信息字典（含 steps），任务不存在、状态不符或失败返回None
+        """
+        try:
+            with self._conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                if from_status:
+                    self._execute_prepared(
+                        conn, cursor, 'task_claim_from', (task_id, from_status)
+                    )
+                else:
+                    self._execute_prepared(
+                        conn, cursor, 'task_claim', (task_id,)
+                    )
+
+                task = cursor.fetchone()
+
+            if not task:
+                return None
+
+            task = dict(task)
+            self._invalidate_task(task_id, task['session_id'])
+            logger.info(f"✅ 更新任务状态: ID={task_id}, 状态=in_progress")
+            return task
+
+        except Exception as e:
+            logger.error(f"❌ 领取任务失败: {e}")
+            return None
+
     def update_step_status(
         self,
         step_id: int,
@@ -422,42 +813,56 @@ class TaskManager:
             是否成功
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-
-            update_fields = ["status = %s"]
-            params = [status]
+            with self._conn() as conn, conn.cursor() as cursor:
+                sql, params = _status_sql_and_params(
+                    _STEP_STATUS_SQL, step_id, status, result, error_message
+                )
+                cursor.execute(sql, params)
 
-            if status == 'in_progress':
-                update_fields.append("started_at = CURRENT_TIMESTAMP")
-            elif status in ['completed', 'failed']:
-                update_fields.append("completed_at = CURRENT_TIMESTAMP")
+            return True
 
-            if result is not None:
-                update_fields.append("result = %s")
-                params.append(result)
+        except Exception as e:
+            logger.error(f"❌ 更新步骤状态失败: {e}")
+            return False
 
-            if error_message is not None:
-                update_fields.append("error_message = %s")
-                params.append(error_message)
+    def batch_update_step_status(
+        self,
+        updates: List[tuple]
+    ) -> bool:
+        """
+        批量更新步骤状态（一条 UPDATE ... FROM VALUES）
 
-            params.append(step_id)
+        Args:
+            updates: [(step_id, status, result, error_message), ...]，
+                     result / error_message 为 None 时保持原值
 
-            sql = f"""
-                UPDATE task_steps 
-                SET {', '.join(update_fields)}
-                WHERE id = %s
-            """
+        Returns:
+            是否成功
+        """
+        if not updates:
+            return True
 
-            cursor.execute(sql, params)
-            conn.commit()
-            cursor.close()
-            conn.close()
+        try:
+            # execute_values 按页拆成多条 UPDATE，放在同一事务中
+            with self._conn() as conn, conn.cursor() as cursor, \
+                    self._transaction(cursor):
+                execute_values(cursor, """
+                    UPDATE task_steps AS s
+                    SET status = v.status,
+                        started_at = CASE WHEN v.status = 'in_progress'
+                            THEN CURRENT_TIMESTAMP ELSE s.started_at END,
+                        completed_at = CASE WHEN v.status IN ('completed', 'failed')
+                            THEN CURRENT_TIMESTAMP ELSE s.completed_at END,
+                        result = COALESCE(v.result, s.result),
+                        error_message = COALESCE(v.error_message, s.error_message)
+                    FROM (VALUES %s) AS v(id, status, result, error_message)
+                    WHERE s.id = v.id
+                """, updates, template="(%s::int, %s::text, %s::text, %s::text)")
 
             return True
 
         except Exception as e:
-            logger.error(f"❌ 更新步骤状态失败: {e}")
+            logger.error(f"❌ 批量更新步骤状态失败: {e}")
             return False
 
     # ==================== 统计和查询 ====================
@@ -473,30 +878,22 @@ class TaskManager:
             统计信息字典
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
-                    SUM(CASE WHEN status = 'in_progress' THEN 1 ELSE 0 END) as in_progress,
-                    SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
-                    SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed
-                FROM tasks
-                WHERE user_id = %s
-            """, (user_id,))
-
-            row = cursor.fetchone()
-            cursor.close()
-            conn.close()
+            with self._conn() as conn, conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT status, COUNT(*)
+                    FROM tasks
+                    WHERE user_id = %s
+                    GROUP BY status
+                """, (user_id,))
+
+                counts = dict(cursor.fetchall())
 
             return {
-                'total': row[0] or 0,
-                'pending': row[1] or 0,
-                'in_progress': row[2] or 0,
-                'completed': row[3] or 0,
-                'failed': row[4] or 0
+                'total': sum(counts.values()),
+                'pending': counts.get('pending', 0),
+                'in_progress': counts.get('in_progress', 0),
+                'completed': counts.get('completed', 0),
+                'failed': counts.get('failed', 0)
             }
 
         except Exception as e:
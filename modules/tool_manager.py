@@ -3,19 +3,159 @@
 
 提供统一的工具接口、注册系统和执行管理。
 """
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from abc import ABC, abstractmethod
 from datetime import datetime
+import atexit
 import logging
 import json
-from db_setup import SessionLocal, ToolExecution
+import os
+import queue
+import threading
+import time
+import orjson
 
 logger = logging.getLogger(__name__)
 
 
+def _dumps(obj: Any) -> str:
+    """序列化执行记录（orjson，不支持的类型转为字符串；仍失败时回退到标准库 json）"""
+    try:
+        return orjson.dumps(
+            obj, option=orjson.OPT_NON_STR_KEYS, default=str
+        ).decode('utf-8')
+    except TypeError:
+        return json.dumps(obj, ensure_ascii=False, default=str)
+
+
+# 执行记录中的超长字符串 / 列表只保留开头部分，避免大结果（人脸列表、OCR 全文）撑大日志表
+TOOL_LOG_MAX_CHARS = int(os.getenv('TOOL_LOG_MAX_CHARS', 4096))
+TOOL_LOG_MAX_ITEMS = int(os.getenv('TOOL_LOG_MAX_ITEMS', 50))
+
+
+def _trim_for_log(obj: Any) -> Any:
+    """截断执行记录中的超长字符串和列表；没有需要截断的内容时原样返回（不复制）"""
+    if isinstance(obj, str):
+        if len(obj) > TOOL_LOG_MAX_CHARS:
+            return f"{obj[:TOOL_LOG_MAX_CHARS]}<truncated len={len(obj)}>"
+        return obj
+    if isinstance(obj, dict):
+        trimmed = None
+        for key, value in obj.items():
+            new_value = _trim_for_log(value)
+            if new_value is not value:
+                if trimmed is None:
+                    trimmed = dict(obj)
+                trimmed[key] = new_value
+        return obj if trimmed is None else trimmed
+    if isinstance(obj, (list, tuple)):
+        items = obj[:TOOL_LOG_MAX_ITEMS]
+        new_items = [_trim_for_log(item) for item in items]
+        if len(obj) > TOOL_LOG_MAX_ITEMS:
+            new_items.append(f"<truncated len={len(obj)}>")
+        elif all(a is b for a, b in zip(new_items, obj)):
+            return obj
+        return new_items
+    return obj
+
+
+_LOG_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _dumps_result_for_log(result: Dict[str, Any]) -> str:
+    """序列化执行结果
+
+    结果载荷（result['result']）是字符串 / 数字、且其余字段都是标量时
+    （大多数工具的 {'success', 'result', 'error'}），只截断超长字符串后直接编码，
+    不经 _trim_for_log 递归遍历。
+    """
+    if isinstance(result.get('result'), (str, int, float)) and all(
+        isinstance(value, _LOG_SCALAR_TYPES) for value in result.values()
+    ):
+        return _dumps({
+            key: (
+                f"{value[:TOOL_LOG_MAX_CHARS]}<truncated len={len(value)}>"
+                if isinstance(value, str) and len(value) > TOOL_LOG_MAX_CHARS
+                else value
+            )
+            for key, value in result.items()
+        })
+    return _dumps(_trim_for_log(result))
+
+
+# 工具执行记录由后台线程批量写入：攒够一批或等待超时后一次提交
+EXEC_LOG_BATCH_SIZE = 100
+EXEC_LOG_INTERVAL = 0.2  # 秒
+EXEC_LOG_QUEUE_SIZE = 10000
+
+_exec_log_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(
+    maxsize=EXEC_LOG_QUEUE_SIZE
+)
+_exec_log_writer: Optional[threading.Thread] = None
+_exec_log_lock = threading.Lock()
+
+
+def _exec_log_writer_loop() -> None:
+    """后台线程：批量插入工具执行记录"""
+    while True:
+        batch = [_exec_log_queue.get()]
+        deadline = time.monotonic() + EXEC_LOG_INTERVAL
+        while len(batch) < EXEC_LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_exec_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        try:
+            # 延迟导入：导入本模块（注册工具、校验参数）不需要连接数据库
+            from db_setup import SessionLocal, ToolExecution
+
+            # begin(): 正常退出时提交并关闭，异常时回滚
+            with SessionLocal.begin() as session:
+                session.bulk_insert_mappings(ToolExecution, batch)
+        except Exception as e:
+            logger.error(f"保存工具执行记录失败: {e}", exc_info=True)
+        finally:
+            for _ in batch:
+                _exec_log_queue.task_done()
+
+
+def flush_execution_log() -> None:
+    """等待已入队的工具执行记录全部写入"""
+    if _exec_log_writer is not None:
+        _exec_log_queue.join()
+
+
+def _ensure_exec_log_writer() -> None:
+    global _exec_log_writer
+    if _exec_log_writer is None:
+        with _exec_log_lock:
+            if _exec_log_writer is None:
+                _exec_log_writer = threading.Thread(
+                    target=_exec_log_writer_loop,
+                    name="tool-exec-log-writer",
+                    daemon=True
+                )
+                _exec_log_writer.start()
+                # 进程退出前写完队列中剩余的记录
+                atexit.register(flush_execution_log)
+
+
 class ToolParameter:
     """工具参数定义"""
 
+    # 参数类型 -> Python 类型
+    _TYPE_MAP = {
+        'string': str,
+        'number': (int, float),
+        'boolean': bool,
+        'array': list,
+        'object': dict
+    }
+
     def __init__(
         self,
         name: str,
@@ -31,6 +171,11 @@ class ToolParameter:
         self.required = required
         self.default = default
         self.enum = enum
+        # 枚举值可哈希时预先转为集合，校验为 O(1) 查找
+        try:
+            self._enum_set = frozenset(enum) if enum else None
+        except TypeError:
+            self._enum_set = None
 
     def validate(self, value: Any) -> tuple[bool, Optional[str]]:
         """验证参数值"""
@@ -43,15 +188,7 @@ class ToolParameter:
             return True, None
 
         # 类型检查
-        type_map = {
-            'string': str,
-            'number': (int, float),
-            'boolean': bool,
-            'array': list,
-            'object': dict
-        }
-
-        expected_type = type_map.get(self.param_type)
+        expected_type = self._TYPE_MAP.get(self.param_type)
         if expected_type and not isinstance(value, expected_type):
             return False, (
                 f"参数 '{self.name}' 类型错误，"
@@ -59,11 +196,62 @@ class ToolParameter:
             )
 
         # 枚举值检查
-        if self.enum and value not in self.enum:
+        if self.enum and not self._in_enum(value):
             return False, f"参数 '{self.name}' 值必须是 {self.enum} 之一"
 
         return True, None
 
+    def _in_enum(self, value: Any) -> bool:
+        if self._enum_set is not None:
+            try:
+                return value in self._enum_set
+            except TypeError:
+                # 不可哈希的值（如列表）回退到逐个比较
+                pass
+        return value in self.enum
+
+    def compile_check(self) -> Optional[Callable[[Any], Optional[str]]]:
+        """为非 None 值生成专用校验函数（与 validate 等价），返回错误信息或 None
+
+        参数定义注册后不变，类型与枚举分支在此一次性确定；无需任何检查时返回 None。
+        """
+        expected_type = self._TYPE_MAP.get(self.param_type)
+        enum = self.enum
+        enum_set = self._enum_set
+        type_error = (
+            f"参数 '{self.name}' 类型错误，期望 {self.param_type}，实际 "
+        )
+        enum_error = f"参数 '{self.name}' 值必须是 {enum} 之一"
+
+        if not enum:
+            if expected_type is None:
+                return None
+
+            def check(value):
+                if not isinstance(value, expected_type):
+                    return type_error + type(value).__name__
+                return None
+            return check
+
+        in_enum = self._in_enum
+        if enum_set is not None and expected_type is str:
+            # 最常见的字符串枚举：字符串必然可哈希，直接查集合
+            def check(value):
+                if not isinstance(value, str):
+                    return type_error + type(value).__name__
+                if value not in enum_set:
+                    return enum_error
+                return None
+            return check
+
+        def check(value):
+            if expected_type and not isinstance(value, expected_type):
+                return type_error + type(value).__name__
+            if not in_enum(value):
+                return enum_error
+            return None
+        return check
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
@@ -88,6 +276,16 @@ class Tool(ABC):
         self.parameters: List[ToolParameter] = []
         self.category: str = "general"  # weather, search, system, etc.
         self.enabled: bool = True
+        # 纯函数工具（相同参数结果不变、无副作用），任务重试/恢复时可复用结果
+        self.cacheable: bool = False
+        # execute 中没有阻塞调用（I/O 均为 await 或已放到线程中）时设为 True，
+        # 任务执行器直接在常驻事件循环上运行；否则放到独立线程中执行
+        self.async_safe: bool = False
+        # to_dict 结果缓存（元数据注册后不变；启停时由注册中心清除）
+        self._to_dict_cache: Optional[Dict[str, Any]] = None
+        # 专用参数校验函数缓存 (parameters 列表, 校验函数)，
+        # 注册时生成；子类在注册后替换 parameters 时重新生成
+        self._validator_cache: Optional[tuple] = None
 
     @abstractmethod
     async def execute(self, **kwargs) -> Dict[str, Any]:
@@ -103,37 +301,68 @@ class Tool(ABC):
         """
         pass
 
+    def _validator(self) -> Callable[[Dict[str, Any]], tuple]:
+        """获取本工具的专用参数校验函数（按 parameters 列表生成并缓存）"""
+        cache = self._validator_cache
+        if cache is None or cache[0] is not self.parameters:
+            cache = self._validator_cache = (
+                self.parameters, _compile_validator(self.parameters)
+            )
+        return cache[1]
+
     def validate_parameters(
         self, params: Dict[str, Any]
     ) -> tuple[bool, Optional[str], Dict[str, Any]]:
         """验证并处理参数"""
-        validated_params = {}
+        return self._validator()(params)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """工具信息转字典"""
+        if self._to_dict_cache is None:
+            self._to_dict_cache = {
+                'name': self.name,
+                'description': self.description,
+                'category': self.category,
+                'enabled': self.enabled,
+                'parameters': [p.to_dict() for p in self.parameters]
+            }
+        return self._to_dict_cache
 
-        for param_def in self.parameters:
-            value = params.get(param_def.name, param_def.default)
 
-            # 验证参数
-            is_valid, error_msg = param_def.validate(value)
-            if not is_valid:
-                return False, error_msg, {}
+def _compile_validator(
+    parameters: List[ToolParameter]
+) -> Callable[[Dict[str, Any]], tuple]:
+    """按固定的参数定义生成校验函数
 
-            # 使用默认值或实际值
-            if value is not None:
-                validated_params[param_def.name] = value
-            else:
-                validated_params[param_def.name] = param_def.default
+    与逐个调用 ToolParameter.validate 的结果一致（含错误信息与报错顺序）：
+    按定义顺序取值（未传入时取默认值），显式传入 None 等同未传入，
+    未定义的参数忽略；每个参数的类型/枚举检查预先特化（见 ToolParameter.compile_check）。
+    """
+    # (参数名, 是否必填, 默认值, 专用检查函数或 None)
+    specs = tuple(
+        (p.name, p.required, p.default, p.compile_check()) for p in parameters
+    )
+
+    def validate(params: Dict[str, Any]) -> tuple:
+        validated_params = {}
+        for name, required, default, check in specs:
+            value = params.get(name, default)
+            if value is None:
+                if required:
+                    return False, f"参数 '{name}' 是必填项", {}
+                validated_params[name] = default
+                continue
+
+            if check is not None:
+                error_msg = check(value)
+                if error_msg is not None:
+                    return False, error_msg, {}
+
+            validated_params[name] = value
 
         return True, None, validated_params
 
-    def to_dict(self) -> Dict[str, Any]:
-        """工具信息转字典"""
-        return {
-            'name': self.name,
-            'description': self.description,
-            'category': self.category,
-            'enabled': self.enabled,
-            'parameters': [p.to_dict() for p in self.parameters]
-        }
+    return validate
 
 
 class ToolRegistry:
@@ -141,23 +370,47 @@ class ToolRegistry:
 
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
+        # 注册表版本号，注册/注销/启停时递增，用于失效 list_tools 缓存
+        self.version = 0
+        self._list_cache: Dict[tuple, List[Dict[str, Any]]] = {}
+
+    def _bump_version(self) -> None:
+        """工具集合变化，失效列表缓存"""
+        self.version += 1
+        self._list_cache = {}
 
     def register(self, tool: Tool) -> None:
         """注册工具"""
         if tool.name in self._tools:
             logger.warning(f"工具 '{tool.name}' 已存在，将被覆盖")
 
+        tool._to_dict_cache = None
+        # 注册时生成专用参数校验函数，执行时不再现场解析参数定义
+        tool._validator()
         self._tools[tool.name] = tool
+        self._bump_version()
         logger.info(f"✅ 注册工具: {tool.name} ({tool.category})")
 
     def unregister(self, tool_name: str) -> bool:
         """注销工具"""
         if tool_name in self._tools:
             del self._tools[tool_name]
+            self._bump_version()
             logger.info(f"注销工具: {tool_name}")
             return True
         return False
 
+    def set_enabled(self, tool_name: str, enabled: bool) -> bool:
+        """启用/禁用工具（请通过此方法修改，以便失效缓存）"""
+        tool = self._tools.get(tool_name)
+        if not tool:
+            return False
+        if tool.enabled != enabled:
+            tool.enabled = enabled
+            tool._to_dict_cache = None
+            self._bump_version()
+        return True
+
     def get(self, tool_name: str) -> Optional[Tool]:
         """获取工具"""
         return self._tools.get(tool_name)
@@ -167,7 +420,12 @@ class ToolRegistry:
         category: Optional[str] = None,
         enabled_only: bool = True
     ) -> List[Dict[str, Any]]:
-        """列出所有工具"""
+        """列出所有工具（按注册表版本缓存）"""
+        cache_key = (category, enabled_only)
+        cached = self._list_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
         tools = []
         for tool in self._tools.values():
             # 过滤条件
@@ -178,7 +436,8 @@ class ToolRegistry:
 
             tools.append(tool.to_dict())
 
-        return tools
+        self._list_cache[cache_key] = tools
+        return list(tools)
 
     def get_tool_names(self) -> List[str]:
         """获取所有工具名称"""
@@ -193,7 +452,7 @@ class ToolRegistry:
         task_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """执行工具并记录"""
-        start_time = datetime.now()
+        start_time = time.perf_counter()
 
         # 检查工具是否存在
         tool = self.get(tool_name)
@@ -235,7 +494,7 @@ class ToolRegistry:
                 exec_params["task_id"] = task_id
 
             result = await tool.execute(**exec_params)
-            execution_time = (datetime.now() - start_time).total_seconds()
+            execution_time = time.perf_counter() - start_time
 
             # 记录执行历史
             self._save_execution(
@@ -250,7 +509,7 @@ class ToolRegistry:
             return result
 
         except Exception as e:
-            execution_time = (datetime.now() - start_time).total_seconds()
+            execution_time = time.perf_counter() - start_time
             logger.error(f"工具 '{tool_name}' 执行失败: {e}", exc_info=True)
 
             error_result = {
@@ -280,30 +539,32 @@ class ToolRegistry:
         result: Dict[str, Any],
         execution_time: float
     ) -> None:
-        """保存执行记录到数据库"""
+        """保存执行记录（入队，由后台线程批量写入数据库，不阻塞工具调用）
+
+        参数和结果中的超长字符串 / 列表先截断（见 _trim_for_log、_dumps_result_for_log）。
+        参数和结果在入队时序列化（调用方之后可能修改结果字典），
+        以 orjson.Fragment 交给 JSONB 列，写库时原样嵌入，不再二次编码。
+        """
         try:
-            session = SessionLocal()
-            try:
-                execution = ToolExecution(
-                    tool_name=tool_name,
-                    user_id=user_id,
-                    session_id=session_id,
-                    parameters=json.dumps(params, ensure_ascii=False),
-                    result=json.dumps(result, ensure_ascii=False),
-                    success=result.get('success', False),
-                    error_message=result.get('error'),
-                    execution_time=execution_time,
-                    executed_at=datetime.now()
-                )
-                session.add(execution)
-                session.commit()
-                status = '成功' if result.get('success') else '失败'
-                logger.info(
-                    f"📝 记录工具执行: {tool_name} ({status}) "
-                    f"- {execution_time:.2f}s"
-                )
-            finally:
-                session.close()
+            _ensure_exec_log_writer()
+            _exec_log_queue.put_nowait({
+                'tool_name': tool_name,
+                'user_id': user_id,
+                'session_id': session_id,
+                'parameters': orjson.Fragment(_dumps(_trim_for_log(params))),
+                'result': orjson.Fragment(_dumps_result_for_log(result)),
+                'success': result.get('success', False),
+                'error_message': result.get('error'),
+                'execution_time': execution_time,
+                'executed_at': datetime.now()
+            })
+            status = '成功' if result.get('success') else '失败'
+            logger.info(
+                f"📝 记录工具执行: {tool_name} ({status}) "
+                f"- {execution_time:.2f}s"
+            )
+        except queue.Full:
+            logger.warning(f"工具执行记录队列已满，丢弃记录: {tool_name}")
         except Exception as e:
             logger.error(f"保存工具执行记录失败: {e}", exc_info=True)
 
@@ -104,6 +104,19 @@ def get_qa():
     return get_proactive_qa()
 
 
+# SSE 注释行（客户端会忽略），用于在流开始时撑满代理/压缩层的缓冲区，
+# 迫使 nginx 等中间层立即 flush 后续每个 delta
+SSE_PADDING = ": " + " " * 2048 + "\n\n"
+
+# SSE 响应头：no-transform 禁止中间层压缩/改写，identity 声明不做内容编码
+SSE_HEADERS = {
+    "Cache-Control": "no-cache, no-transform",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+    "Content-Encoding": "identity",
+}
+
+
 def _looks_like_time_reply(text: Optional[str]) -> bool:
     if not text:
         return False
@@ -146,6 +159,7 @@ def chat_sse(
     logger.info(f"🌊 真流式聊天请求: prompt={prompt[:50]}...")
 
     def event_generator():
+        yield SSE_PADDING
         try:
             for chunk in agent.chat_stream(
                 prompt=prompt,
@@ -162,11 +176,7 @@ def chat_sse(
     return StreamingResponse(
         event_generator(),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
+        headers=SSE_HEADERS
     )
 
 
@@ -578,6 +588,8 @@ def chat_stream(
 
     def event_stream():
         import json
+        # 填充注释，冲破代理缓冲
+        yield SSE_PADDING
         # 起始事件，便于前端建立状态
         start_payload = {"type": "start"}
         yield f"data: {json.dumps(start_payload, ensure_ascii=False)}\n\n"
@@ -818,9 +830,7 @@ def chat_stream(
         yield f"data: {json.dumps(end_payload, ensure_ascii=False)}\n\n"
 
     headers = {
-        "Cache-Control": "no-cache",
-        "X-Accel-Buffering": "no",
-        "Connection": "keep-alive",
+        **SSE_HEADERS,
         "Content-Type": "text/event-stream; charset=utf-8"
     }
     return StreamingResponse(
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any, Optional, List
-from dependencies import get_xiaole_agent, get_conflict_detector
+from dependencies import (
+    get_xiaole_agent, get_conflict_detector, get_memory_manager
+)
 from agent import XiaoLeAgent
 from modules.conflict_detector import ConflictDetector
 from memory import MemoryManager
@@ -62,7 +64,8 @@ def memory_semantic_search(
     agent: XiaoLeAgent = Depends(get_agent)
 ):
     """语义搜索记忆"""
-    memories = agent.memory.semantic_recall(query, tag, limit, min_score=0.1)
+    memories = agent.memory.cached_semantic_recall(
+        query, tag, limit, min_score=0.1)
     return {"memories": memories}
 
 
@@ -73,28 +76,34 @@ def memory_stats(agent: XiaoLeAgent = Depends(get_agent)):
 
 
 @router.put("/memory/{memory_id}")
-async def update_memory(memory_id: int, request: dict):
+def update_memory(
+    memory_id: int,
+    request: dict,
+    memory_manager: MemoryManager = Depends(get_memory_manager)
+):
     """更新记忆内容"""
     try:
-        memory_manager = MemoryManager()
         from db_setup import Memory
 
-        memory = memory_manager.session.query(Memory).filter(
-            Memory.id == memory_id
-        ).first()
+        with memory_manager.session_scope() as session:
+            memory = session.query(Memory).filter(
+                Memory.id == memory_id
+            ).first()
+
+            if not memory:
+                raise HTTPException(status_code=404, detail="记忆不存在")
 
-        if not memory:
-            raise HTTPException(status_code=404, detail="记忆不存在")
+            content = request.get("content")
+            tag = request.get("tag")
 
-        content = request.get("content")
-        tag = request.get("tag")
+            if content:
+                memory.content = content
+            if tag:
+                memory.tag = tag
 
-        if content:
-            memory.content = content
-        if tag:
-            memory.tag = tag
+            session.commit()
 
-        memory_manager.session.commit()
+        memory_manager.invalidate_search_cache()
 
         return {
             "success": True,
@@ -109,21 +118,28 @@ async def update_memory(memory_id: int, request: dict):
 
 
 @router.delete("/memory/{memory_id}")
-async def delete_memory(memory_id: int):
+def delete_memory(
+    memory_id: int,
+    memory_manager: MemoryManager = Depends(get_memory_manager)
+):
     """删除记忆"""
     try:
-        memory_manager = MemoryManager()
         from db_setup import Memory
 
-        memory = memory_manager.session.query(Memory).filter(
-            Memory.id == memory_id
-        ).first()
+        with memory_manager.session_scope() as session:
+            memory = session.query(Memory).filter(
+                Memory.id == memory_id
+            ).first()
+
+            if not memory:
+                raise HTTPException(status_code=404, detail="记忆不存在")
 
-        if not memory:
-            raise HTTPException(status_code=404, detail="记忆不存在")
+            session.delete(memory)
+            session.commit()
 
-        memory_manager.session.delete(memory)
-        memory_manager.session.commit()
+        if memory_manager.semantic_search:
+            memory_manager.semantic_search.remove_memory(memory_id)
+        memory_manager.invalidate_search_cache()
 
         return {
             "success": True,
@@ -1,4 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import orjson
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from modules.reminder_manager import get_reminder_manager, ReminderManager
@@ -95,11 +97,9 @@ async def get_reminder(
     manager: ReminderManager = Depends(get_manager)
 ):
     """获取单个提醒详情"""
-    reminders = manager.get_user_reminders(user_id)
-    reminder = next(
-        (r for r in reminders if r['reminder_id'] == reminder_id), None)
+    reminder = manager.get_reminder(reminder_id)
 
-    if not reminder:
+    if not reminder or reminder.get('user_id') != user_id:
         raise HTTPException(status_code=404, detail="Reminder not found")
 
     return reminder
@@ -115,8 +115,8 @@ async def update_reminder(
     updates = reminder.dict(exclude_unset=True)
 
     if 'trigger_condition' in updates:
-        import json
-        updates['trigger_condition'] = json.dumps(updates['trigger_condition'])
+        updates['trigger_condition'] = orjson.dumps(
+            updates['trigger_condition']).decode()
 
     success = manager.update_reminder(reminder_id, **updates)
 
@@ -146,15 +146,9 @@ async def toggle_reminder(
     manager: ReminderManager = Depends(get_manager)
 ):
     """启用/禁用提醒"""
-    reminders = manager.get_user_reminders(
-        user_id,
-        enabled_only=False
-    )
-    reminder = next(
-        (r for r in reminders if r['reminder_id'] == reminder_id), None
-    )
+    reminder = manager.get_reminder(reminder_id)
 
-    if not reminder:
+    if not reminder or reminder.get('user_id') != user_id:
         raise HTTPException(status_code=404, detail="Reminder not found")
 
     new_enabled = not reminder.get('enabled', True)
@@ -230,21 +224,28 @@ async def check_reminders(
     manager: ReminderManager = Depends(get_manager)
 ):
     """手动检查并触发提醒"""
-    time_triggered = manager.check_time_reminders(user_id)
-    behavior_triggered = manager.check_behavior_reminders(user_id)
+    # 两类检查互不依赖，各自独立连接数据库，放到线程池并发执行
+    time_triggered, behavior_triggered = await asyncio.gather(
+        asyncio.to_thread(manager.check_time_reminders, user_id),
+        asyncio.to_thread(manager.check_behavior_reminders, user_id)
+    )
     all_triggered = time_triggered + behavior_triggered
 
-    results = []
-    for reminder in all_triggered:
-        success = manager.check_and_notify_reminder(
-            reminder['reminder_id']
-        )
-        results.append({
+    # 一次UPDATE批量标记所有触发的提醒
+    notified = await asyncio.to_thread(
+        manager.notify_batch,
+        [reminder['reminder_id'] for reminder in all_triggered]
+    )
+
+    results = [
+        {
             "reminder_id": reminder['reminder_id'],
             "title": reminder.get('title', 'Untitled'),
             "content": reminder['content'],
-            "notified": success
-        })
+            "notified": notified.get(reminder['reminder_id'], False)
+        }
+        for reminder in all_triggered
+    ]
 
     return {
         "total_checked": len(all_triggered),
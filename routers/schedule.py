@@ -1,5 +1,6 @@
 from fastapi import APIRouter
-from sqlalchemy import or_
+from typing import Dict
+from sqlalchemy import bindparam, select
 from db_setup import Memory, SessionLocal
 import re
 
@@ -8,56 +9,86 @@ router = APIRouter(
     tags=["schedule"]
 )
 
+# 识别图片课程表记忆的特征串，合并为一个正则交给数据库一次匹配
+# （由 idx_memories_content_trgm 三元组索引支持，见迁移 013）
+SCHEDULE_CONTENT_PATTERN = "周一：晨读|周一：第1节|第1节-无课"
+
+# 查询语句在模块加载时构建一次，请求时只绑定参数，命中 SQLAlchemy 编译缓存
+_IMAGE_SCHEDULE_STMT = (
+    select(Memory.content)
+    .where(
+        Memory.tag.like(bindparam('tag_prefix')),
+        Memory.content.regexp_match(bindparam('pattern'))
+    )
+    .order_by(Memory.created_at.desc())
+    .limit(1)
+)
+_SAVED_SCHEDULE_STMT = (
+    select(Memory.content)
+    .where(Memory.tag == bindparam('tag'))
+    .order_by(Memory.created_at.desc())
+    .limit(1)
+)
+
+# 课程表文本解析用的正则，模块加载时编译一次
+# _TOKEN_RE 单遍扫描全文：行首的"周X："、换行、或逗号分隔的课程项
+_TOKEN_RE = re.compile(r'^(周[一二三四五])[:：]|(\n)|([^,\n]+)', re.MULTILINE)
+_PERIOD_RE = re.compile(r'第(\d+)节')
+_COURSE_RE = re.compile(r'-\s*(.+)')
+
+
+def _parse_schedule(content: str) -> Dict[str, str]:
+    """
+    解析课程表文本为 {"节次索引_周X": 课程名}
+
+    格式示例: "周一：第1节-语文,第2节-数学"；不以"周X："开头的行忽略，
+    "无课"不计入。
+    """
+    courses = {}
+    day = None
+    for match in _TOKEN_RE.finditer(content):
+        header, newline, item = match.groups()
+        if header:
+            day = header
+        elif newline:
+            day = None
+        elif day:
+            item = item.strip()
+            period_match = _PERIOD_RE.search(item)
+            if not period_match:
+                continue
+            course_match = _COURSE_RE.search(item)
+            if not course_match:
+                continue
+            course_name = course_match.group(1).strip()
+            if course_name and course_name != '无课':
+                period_num = int(period_match.group(1))
+                courses[f"{period_num-1}_{day}"] = course_name
+    return courses
+
 
 @router.get("")
-async def get_schedule(user_id: str = "default_user"):
+def get_schedule(user_id: str = "default_user"):
     """获取用户课程表"""
     session = SessionLocal()
     try:
-        memories = session.query(Memory).filter(
-            Memory.tag.like('image:%'),
-            or_(
-                Memory.content.like('%周一：晨读%'),
-                Memory.content.like('%周一：第1节%'),
-                Memory.content.like('%第1节-无课%')
-            )
-        ).order_by(Memory.created_at.desc()).limit(1).all()
+        content = session.execute(
+            _IMAGE_SCHEDULE_STMT,
+            {'tag_prefix': 'image:%', 'pattern': SCHEDULE_CONTENT_PATTERN}
+        ).scalar()
 
-        if not memories:
-            memories = session.query(Memory).filter(
-                Memory.tag == 'schedule'
-            ).order_by(Memory.created_at.desc()).limit(1).all()
+        if content is None:
+            content = session.execute(
+                _SAVED_SCHEDULE_STMT, {'tag': 'schedule'}
+            ).scalar()
 
-        if memories:
-            content = memories[0].content
+        if content is not None:
             schedule = {
                 "periods": ['第1节', '第2节', '第3节', '第4节', '第5节', '第6节', '第7节'],
                 "weekdays": ['周一', '周二', '周三', '周四', '周五'],
-                "courses": {}
+                "courses": _parse_schedule(content)
             }
 
-            lines = content.split('\n')
-
-            for line in lines:
-                match = re.match(r'^(周[一二三四五])[:：]\s*(.*)', line)
-                if match:
-                    day = match.group(1)
-                    course_info = match.group(2)
-                    items = course_info.split(',')
-
-                    for item in items:
-                        item = item.strip()
-                        if '第' in item and '节' in item:
-                            period_match = re.search(r'第(\d+)节', item)
-                            if period_match:
-                                period_num = int(period_match.group(1))
-                                course_match = re.search(r'-\s*(.+)', item)
-                                if course_match:
-                                    course_name = course_match.group(1).strip()
-                                    if course_name and course_name != '无课':
-                                        key = f"{period_num-1}_{day}"
-                                        schedule["courses"][key] = course_name
-
             return {
                 "success": True,
                 "schedule": schedule
@@ -83,7 +114,7 @@ async def get_schedule(user_id: str = "default_user"):
 
 
 @router.post("")
-async def save_schedule(request: dict, user_id: str = "default_user"):
+def save_schedule(request: dict, user_id: str = "default_user"):
     """保存用户课程表"""
     session = SessionLocal()
     try:
@@ -97,29 +128,24 @@ async def save_schedule(request: dict, user_id: str = "default_user"):
 
         courses_by_day = {}
         for key, course in schedule.get("courses", {}).items():
-            period_index, day = key.split('_')
-            if day not in courses_by_day:
-                courses_by_day[day] = {}
-            courses_by_day[day][int(period_index)] = course
-
-        lines = []
-        for day in schedule.get("weekdays", []):
-            if day in courses_by_day:
-                courses = []
-                for i in range(len(schedule.get("periods", []))):
-                    course = courses_by_day[day].get(i, "无课")
-                    courses.append(course)
-                lines.append(f"{day}：{'-'.join(courses)}")
+            period_index, day = key.split('_', 1)
+            courses_by_day.setdefault(day, {})[int(period_index)] = course
+
+        period_range = range(len(schedule.get("periods", [])))
+        lines = [
+            f"{day}：" + "-".join(
+                courses_by_day[day].get(i, "无课") for i in period_range
+            )
+            for day in schedule.get("weekdays", [])
+            if day in courses_by_day
+        ]
 
         content = "\n".join(lines)
 
-        # 删除旧的课程表记忆
-        old_memories = session.query(Memory).filter(
+        # 删除旧的课程表记忆（单条 DELETE，与下面的插入在同一事务中提交）
+        session.query(Memory).filter(
             Memory.tag == 'schedule'
-        ).all()
-
-        for mem in old_memories:
-            session.delete(mem)
+        ).delete(synchronize_session=False)
 
         # 创建新的课程表记忆
         new_memory = Memory(
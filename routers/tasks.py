@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
 from dependencies import get_xiaole_agent
 from agent import XiaoLeAgent
 from auth import get_current_user
@@ -11,6 +14,10 @@ router = APIRouter(
 )
 
 
+# 任务执行涉及工具调用/LLM，耗时较长，放到独立线程池，不占用请求线程
+TASK_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="task")
+
+
 def get_agent():
     return get_xiaole_agent()
 
@@ -86,7 +93,8 @@ def get_task(
 ):
     """获取任务详情"""
     try:
-        task = agent.task_manager.get_task(task_id)
+        # 任务与步骤一次查询取回
+        task = agent.task_manager.get_task_with_steps(task_id)
         if not task:
             raise HTTPException(status_code=404, detail="任务不存在")
 
@@ -94,8 +102,7 @@ def get_task(
         if task.get('user_id') != current_user:
             raise HTTPException(status_code=403, detail="无权查看此任务")
 
-        # 获取步骤
-        steps = agent.task_manager.get_task_steps(task_id)
+        steps = task.pop('steps')
 
         return {
             "success": True,
@@ -137,7 +144,7 @@ def update_task_status(
 
 
 @router.post("/{task_id}/execute", response_model=Dict[str, Any])
-def execute_task(
+async def execute_task(
     task_id: int,
     request: Dict[str, Any],
     current_user: str = Depends(get_current_user),
@@ -148,10 +155,15 @@ def execute_task(
         user_id = current_user
         session_id = request.get('session_id', '')
 
-        result = agent.task_executor.execute_task(
-            task_id=task_id,
-            user_id=user_id,
-            session_id=session_id
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            TASK_POOL,
+            partial(
+                agent.task_executor.execute_task,
+                task_id=task_id,
+                user_id=user_id,
+                session_id=session_id
+            )
         )
 
         return result
@@ -186,16 +198,15 @@ def delete_task(
 ):
     """删除任务"""
     try:
-        # 验证所有权
-        task = agent.task_manager.get_task(task_id)
-        if not task:
+        # 所有权校验与删除合并为一条语句
+        outcome = agent.task_manager.delete_if_owned(task_id, current_user)
+        if outcome == 'not_found':
             raise HTTPException(status_code=404, detail="任务不存在")
-        if task.get('user_id') != current_user:
+        if outcome == 'forbidden':
             raise HTTPException(status_code=403, detail="无权删除此任务")
 
-        success = agent.task_manager.delete_task(task_id)
         return {
-            "success": success
+            "success": outcome == 'ok'
         }
     except HTTPException:
         raise
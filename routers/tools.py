@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from typing import Dict, Any, Optional
-from dependencies import get_xiaole_agent
+from sqlalchemy.orm import Session
+from dependencies import get_xiaole_agent, get_db
 from agent import XiaoLeAgent
+from db_setup import ToolExecution
 
 router = APIRouter(
     prefix="/tools",
@@ -45,41 +48,35 @@ async def execute_tool(
     return result
 
 
-@router.get("/history")
+@router.get("/history", response_class=ORJSONResponse)
 def get_tool_history(
     user_id: str = "default_user",
     session_id: Optional[str] = None,
-    limit: int = 20
+    limit: int = 20,
+    db: Session = Depends(get_db)
 ):
     """获取工具执行历史"""
-    from db_setup import SessionLocal, ToolExecution
-
-    db = SessionLocal()
-    try:
-        query = db.query(ToolExecution).filter(
-            ToolExecution.user_id == user_id
-        )
+    # 只取返回需要的列，避免加载 parameters/result 大字段
+    query = db.query(
+        ToolExecution.execution_id,
+        ToolExecution.tool_name,
+        ToolExecution.success,
+        ToolExecution.execution_time,
+        ToolExecution.executed_at,
+        ToolExecution.error_message
+    ).filter(
+        ToolExecution.user_id == user_id
+    )
 
-        if session_id:
-            query = query.filter(ToolExecution.session_id == session_id)
+    if session_id:
+        query = query.filter(ToolExecution.session_id == session_id)
 
-        executions = query.order_by(
-            ToolExecution.executed_at.desc()
-        ).limit(limit).all()
+    executions = query.order_by(
+        ToolExecution.executed_at.desc()
+    ).limit(limit).all()
 
-        return {
-            "total": len(executions),
-            "history": [
-                {
-                    "execution_id": e.execution_id,
-                    "tool_name": e.tool_name,
-                    "success": e.success,
-                    "execution_time": e.execution_time,
-                    "executed_at": e.executed_at.isoformat(),
-                    "error_message": e.error_message
-                }
-                for e in executions
-            ]
-        }
-    finally:
-        db.close()
+    # orjson 原生序列化 datetime（ISO 格式），无需逐行 isoformat()
+    return ORJSONResponse({
+        "total": len(executions),
+        "history": [dict(e._mapping) for e in executions]
+    })
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi import Body
 import os
 import time
+import asyncio
+import hashlib
+import threading
+import aiofiles
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from config import UPLOADS_DIR
 import sys
 
@@ -15,6 +21,7 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from memory import MemoryManager  # noqa: E402
+from dependencies import get_memory_manager  # noqa: E402
 from tools.vision_tool import VisionTool  # noqa: E402
 
 router = APIRouter(
@@ -22,6 +29,51 @@ router = APIRouter(
     tags=["vision"]
 )
 
+# 上传文件分块写盘的块大小（1MB），峰值内存与文件大小无关
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# 图片分析（人脸识别 + 视觉大模型）是阻塞调用，放到专用线程池执行
+VISION_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="vision")
+
+# 按 (图片内容哈希, prompt) 缓存分析结果，相同图片重复上传时直接复用
+_ANALYZE_CACHE_SIZE = 128
+_analyze_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_analyze_cache_lock = threading.Lock()
+
+
+def _hash_file(path: str) -> str:
+    """分块计算文件 sha256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _analyze_cached(image_path: str, prompt) -> dict:
+    """在线程池中执行：按内容哈希查缓存，未命中再调用 VisionTool"""
+    tool = VisionTool()
+    full_path = tool._resolve_path(image_path)
+    if not full_path:
+        return tool.analyze_image(image_path=image_path, prompt=prompt)
+
+    key = (_hash_file(full_path), prompt)
+    with _analyze_cache_lock:
+        cached = _analyze_cache.get(key)
+        if cached is not None:
+            _analyze_cache.move_to_end(key)
+            return cached
+
+    result = tool.analyze_image(image_path=image_path, prompt=prompt)
+
+    # 只缓存成功结果，失败时下次重试
+    if result.get("success"):
+        with _analyze_cache_lock:
+            _analyze_cache[key] = result
+            if len(_analyze_cache) > _ANALYZE_CACHE_SIZE:
+                _analyze_cache.popitem(last=False)
+    return result
+
 
 @router.post("/upload")
 async def upload_image(file: UploadFile = File(...)):
@@ -49,10 +101,10 @@ async def upload_image(file: UploadFile = File(...)):
         filename = f"{int(time.time())}_{uuid.uuid4().hex[:8]}{ext}"
         file_path = os.path.join(images_dir, filename)
 
-        # Save file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Save file (stream in chunks instead of reading it all into memory)
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
 
         # Return relative path for frontend to use
         # Assuming static mount is at /uploads
@@ -72,7 +124,10 @@ async def upload_image(file: UploadFile = File(...)):
 
 
 @router.post("/analyze")
-async def analyze_image(payload: dict = Body(...)):
+async def analyze_image(
+    payload: dict = Body(...),
+    mm: MemoryManager = Depends(get_memory_manager)
+):
     """
     Analyze an uploaded image and persist the result as image memory.
     Body: { image_path: str, prompt?: str }
@@ -86,8 +141,10 @@ async def analyze_image(payload: dict = Body(...)):
                 detail="image_path is required"
             )
 
-        tool = VisionTool()
-        result = tool.analyze_image(image_path=image_path, prompt=prompt)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            VISION_POOL, _analyze_cached, image_path, prompt
+        )
 
         if not result.get("success"):
             raise HTTPException(
@@ -107,7 +164,6 @@ async def analyze_image(payload: dict = Body(...)):
         # Persist memory (with image_path)
         mem_id = None
         try:
-            mm = MemoryManager()
             mem_id = mm.remember(full_content, tag=tag, image_path=image_path)
         except Exception as e:
             print(f"Persist image memory failed: {e}")
@@ -1,14 +1,33 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import asyncio
+import os
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
+from typing import Dict, Optional
 from tools.baidu_voice_tool import baidu_voice_tool
-import base64
 from logger import logger
 
+# 优先使用 SIMD 加速的 pybase64，未安装时回退到标准库（API 相同）
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 router = APIRouter(
     prefix="/voice",
     tags=["voice"]
 )
 
+# TTS 请求合并：参数完全相同的请求在上游调用期间到达时共享同一次百度调用
+# （对话界面常对同一句话并发请求多次），可通过 TTS_COALESCE=false 关闭
+TTS_COALESCE = os.getenv("TTS_COALESCE", "true").lower() == "true"
+# 超过此长度的文本几乎不会重复，直接调用不参与合并
+TTS_COALESCE_MAX_TEXT = 200
+_tts_inflight: Dict[tuple, "asyncio.Future[Optional[bytes]]"] = {}
+
+# 超过此大小的音频在线程池中做 base64 编码（小数据直接编码，省去线程切换）
+BASE64_OFFLOAD_THRESHOLD = 64 * 1024
+
 
 class TTSRequest(BaseModel):
     text: str
@@ -19,28 +38,69 @@ class TTSRequest(BaseModel):
     audio_format: str = "mp3"  # mp3|wav|pcm
 
 
+# 原始音频请求体 Content-Type 子类型 → 百度识别格式
+_FORMAT_BY_SUBTYPE = {
+    "wav": "wav",
+    "x-wav": "wav",
+    "wave": "wav",
+    "pcm": "pcm",
+    "x-pcm": "pcm",
+    "l16": "pcm",
+    "amr": "amr",
+    "m4a": "m4a",
+    "x-m4a": "m4a",
+    "mp4": "m4a",
+}
+
+
+# 上传文件扩展名 → 百度识别格式
+_FORMAT_BY_SUFFIX = {
+    ".wav": "wav",
+    ".pcm": "pcm",
+    ".amr": "amr",
+    ".m4a": "m4a",
+}
+
+# TTS 音频格式 → 响应 MIME 类型
+_MIME_BY_FORMAT = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "pcm": "audio/x-pcm",
+}
+
+
 @router.post("/recognize")
-async def voice_recognize(file: UploadFile = File(...)):
+async def voice_recognize(request: Request, format: Optional[str] = None):
     """
     语音识别接口（使用百度API）
+
+    推荐直接以音频二进制作为请求体（Content-Type: audio/wav 等，
+    或通过 ?format= 指定格式），按块读取请求流，不经过 multipart 解析和临时文件；
+    兼容旧的 multipart/form-data（字段名 file）上传方式。
     """
     try:
         if not baidu_voice_tool.is_enabled():
             raise HTTPException(status_code=503, detail="百度语音服务未配置，请设置环境变量")
 
-        audio_data = await file.read()
-
-        filename = file.filename.lower() if file.filename else ""
-        if filename.endswith('.wav'):
-            format_type = 'wav'
-        elif filename.endswith('.pcm'):
-            format_type = 'pcm'
-        elif filename.endswith('.amr'):
-            format_type = 'amr'
-        elif filename.endswith('.m4a'):
-            format_type = 'm4a'
+        content_type = request.headers.get("content-type", "").lower()
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            file = form.get("file")
+            if file is None or isinstance(file, str):
+                raise HTTPException(status_code=400, detail="缺少音频文件")
+            audio_data = await file.read()
+            suffix = os.path.splitext((file.filename or "").lower())[1]
+            format_type = format or _FORMAT_BY_SUFFIX.get(suffix, 'wav')
         else:
-            format_type = 'wav'
+            buf = bytearray()
+            async for chunk in request.stream():
+                buf.extend(chunk)
+            audio_data = bytes(buf)
+            subtype = content_type.split(";", 1)[0].rpartition("/")[2].strip()
+            format_type = format or _FORMAT_BY_SUBTYPE.get(subtype, 'wav')
+
+        if not audio_data:
+            raise HTTPException(status_code=400, detail="音频数据为空")
 
         result = await baidu_voice_tool.recognize(
             audio_data,
@@ -63,33 +123,96 @@ def voice_status(detailed: bool = False):
     return baidu_voice_tool.get_status(detailed)
 
 
+async def _synthesize(req: TTSRequest) -> Optional[bytes]:
+    return await baidu_voice_tool.synthesize(
+        text=req.text,
+        person=req.person,
+        speed=req.speed,
+        pitch=req.pitch,
+        volume=req.volume,
+        audio_format=req.audio_format,
+    )
+
+
+async def _synthesize_coalesced(req: TTSRequest) -> Optional[bytes]:
+    """相同参数的并发请求只发起一次上游调用，其余请求等待同一结果"""
+    key = (
+        req.text, req.person, req.speed, req.pitch, req.volume,
+        (req.audio_format or "mp3").lower()
+    )
+    pending = _tts_inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _tts_inflight[key] = future
+    try:
+        audio_bytes = await _synthesize(req)
+        future.set_result(audio_bytes)
+        return audio_bytes
+    except BaseException as e:
+        if isinstance(e, Exception):
+            future.set_exception(e)
+            # 无等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+        else:
+            future.cancel()
+        raise
+    finally:
+        _tts_inflight.pop(key, None)
+
+
+def _wants_raw_audio(request: Request, encode: str) -> bool:
+    """?encode=raw 或 Accept 中含 audio/* 时直接返回音频二进制"""
+    if encode == "raw":
+        return True
+    accept = request.headers.get("accept", "")
+    return any(
+        part.strip().lower().startswith("audio/")
+        for part in accept.split(",")
+    )
+
+
 @router.post("/synthesize")
-async def voice_synthesize(req: TTSRequest):
-    """文本转语音（百度TTS）"""
+async def voice_synthesize(req: TTSRequest, request: Request, encode: str = ""):
+    """
+    文本转语音（百度TTS）
+
+    默认返回 JSON（audio_base64 + mime + format）；
+    传 ?encode=raw 或请求头 Accept: audio/* 时直接返回音频二进制
+    （Content-Type 为对应 MIME），省去 base64 编码和约 33% 的体积膨胀。
+    """
     try:
         if not baidu_voice_tool.is_enabled():
             raise HTTPException(status_code=503, detail="百度语音服务未配置，请设置环境变量")
 
-        audio_bytes = await baidu_voice_tool.synthesize(
-            text=req.text,
-            person=req.person,
-            speed=req.speed,
-            pitch=req.pitch,
-            volume=req.volume,
-            audio_format=req.audio_format,
-        )
+        if TTS_COALESCE and len(req.text) <= TTS_COALESCE_MAX_TEXT:
+            audio_bytes = await _synthesize_coalesced(req)
+        else:
+            audio_bytes = await _synthesize(req)
 
         if not audio_bytes:
             raise HTTPException(status_code=500, detail="语音合成失败")
 
-        mime = "audio/mpeg"
         fmt = (req.audio_format or "mp3").lower()
-        if fmt == "wav":
-            mime = "audio/wav"
-        elif fmt == "pcm":
-            mime = "audio/x-pcm"
-
-        b64 = base64.b64encode(audio_bytes).decode("utf-8")
+        mime = _MIME_BY_FORMAT.get(fmt, "audio/mpeg")
+
+        if _wants_raw_audio(request, encode):
+            return Response(
+                content=audio_bytes,
+                media_type=mime,
+                headers={"X-Audio-Format": fmt}
+            )
+
+        if len(audio_bytes) > BASE64_OFFLOAD_THRESHOLD:
+            # 大音频的编码放到线程池，避免阻塞事件循环上的其他请求
+            loop = asyncio.get_running_loop()
+            encoded = await loop.run_in_executor(
+                None, base64.b64encode, audio_bytes
+            )
+        else:
+            encoded = base64.b64encode(audio_bytes)
+        b64 = encoded.decode("ascii")
         return {
             "success": True,
             "audio_base64": b64,
@@ -8,11 +8,11 @@
 import asyncio
 import logging
 from datetime import datetime
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
 
-from modules.reminder_manager import get_reminder_manager
+from modules.reminder_manager import get_reminder_manager, ReminderType
 from modules.proactive_chat import get_proactive_chat
 from memory import MemoryManager
 from pathlib import Path
@@ -40,7 +40,9 @@ class ReminderScheduler:
     """
 
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
+        # 运行在应用的事件循环上：async 任务直接在循环中执行，
+        # 同步任务（数据库检查等）由 APScheduler 交给线程池执行，不阻塞循环
+        self.scheduler = AsyncIOScheduler()
         self.reminder_manager = get_reminder_manager()
         self.proactive_chat = get_proactive_chat()
         self.memory_manager = MemoryManager()
@@ -121,60 +123,41 @@ class ReminderScheduler:
 
     def check_time_reminders(self):
         """检查所有用户的时间提醒"""
-        print("==== FUNCTION ENTERED ====", flush=True)
-        logger.info("==== CHECK_TIME_REMINDERS STARTED ====")
         try:
-            print("==== TRY BLOCK ENTERED ====", flush=True)
-            logger.info("Checking time reminders...")
-            print("==== AFTER FIRST LOG ====", flush=True)
-            logger.info("Step 1: Importing database functions")
-
-            # 获取所有有提醒的用户
-            from modules.reminder_manager import get_db_connection
-            from psycopg2.extras import RealDictCursor
-            print("==== IMPORTS DONE ====", flush=True)
-
-            logger.info("Step 2: Getting database connection")
-            conn = get_db_connection()
-            try:
-                logger.info("Step 3: Querying users")
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                    cur.execute(
-                        "SELECT DISTINCT user_id FROM reminders WHERE enabled = true"
-                    )
-                    users = [row['user_id'] for row in cur.fetchall()]
-                    logger.info(f"Found users: {users}")
-            except Exception as db_error:
-                logger.error(f"Database query failed: {db_error}")
-                raise
-            finally:
-                logger.info("Step 4: Closing connection")
-                conn.close()
-
-            if not users:
-                logger.warning("No active users with reminders found!")
+            logger.debug("Checking time reminders...")
+
+            # 一次查询取回所有用户的启用提醒，按用户分组
+            reminders_by_user = self.reminder_manager.fetch_enabled_reminders(
+                ReminderType.TIME
+            )
+
+            if not reminders_by_user:
+                logger.debug("No active users with reminders found")
                 return
 
-            logger.info(f"Step 5: Checking reminders for {len(users)} users")
-            total_triggered = 0
-            for user_id in users:
-                logger.info(f"Checking user: {user_id}")
+            due = []
+            for user_id, reminders in reminders_by_user.items():
                 triggered = self.reminder_manager.check_time_reminders(
-                    user_id
+                    user_id, reminders
+                )
+                logger.debug(
+                    "User %s has %d triggered", user_id, len(triggered)
                 )
-                logger.info(f"User {user_id} has {len(triggered)} triggered")
+                due.extend(triggered)
 
-                for reminder in triggered:
-                    success = self.reminder_manager.check_and_notify_reminder(
-                        reminder['reminder_id']
+            # 一次 UPDATE 标记全部到期提醒并推送
+            results = self.reminder_manager.notify_batch(
+                [reminder['reminder_id'] for reminder in due]
+            )
+            total_triggered = 0
+            for reminder in due:
+                if results.get(reminder['reminder_id']):
+                    total_triggered += 1
+                    logger.info(
+                        f"Triggered time reminder: "
+                        f"{reminder.get('title', 'Untitled')} "
+                        f"for user {reminder['user_id']}"
                     )
-                    if success:
-                        total_triggered += 1
-                        logger.info(
-                            f"Triggered time reminder: "
-                            f"{reminder.get('title', 'Untitled')} "
-                            f"for user {user_id}"
-                        )
 
             if total_triggered > 0:
                 logger.info(
@@ -182,7 +165,7 @@ class ReminderScheduler:
                     f"{total_triggered} reminders triggered"
                 )
             else:
-                logger.info("No reminders triggered this cycle")
+                logger.debug("No reminders triggered this cycle")
 
         except Exception as e:
             logger.error(f"Error checking time reminders: {e}", exc_info=True)
@@ -192,40 +175,38 @@ class ReminderScheduler:
         try:
             logger.info("Checking behavior reminders...")
 
-            # 获取所有有提醒的用户
-            from modules.reminder_manager import get_db_connection
-            from psycopg2.extras import RealDictCursor
-
-            conn = get_db_connection()
-            try:
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                    cur.execute(
-                        "SELECT DISTINCT user_id FROM reminders WHERE enabled = true"
-                    )
-                    users = [row['user_id'] for row in cur.fetchall()]
-            finally:
-                conn.close()
-
-            if not users:
+            # 一次查询取回所有用户的启用提醒，再一次查询取回最后活跃时间
+            reminders_by_user = self.reminder_manager.fetch_enabled_reminders(
+                ReminderType.BEHAVIOR
+            )
+            if not reminders_by_user:
                 return
 
-            total_triggered = 0
-            for user_id in users:
-                triggered = self.reminder_manager.check_behavior_reminders(
-                    user_id
-                )
+            last_active_by_user = self.reminder_manager.get_users_last_active(
+                list(reminders_by_user)
+            )
 
-                for reminder in triggered:
-                    success = self.reminder_manager.check_and_notify_reminder(
-                        reminder['reminder_id']
+            due = []
+            for user_id, reminders in reminders_by_user.items():
+                last_active = last_active_by_user.get(user_id)
+                if not last_active:
+                    continue
+                due.extend(self.reminder_manager.check_behavior_reminders(
+                    user_id, reminders, last_active
+                ))
+
+            results = self.reminder_manager.notify_batch(
+                [reminder['reminder_id'] for reminder in due]
+            )
+            total_triggered = 0
+            for reminder in due:
+                if results.get(reminder['reminder_id']):
+                    total_triggered += 1
+                    logger.info(
+                        f"Triggered behavior reminder: "
+                        f"{reminder.get('title', 'Untitled')} "
+                        f"for user {reminder['user_id']}"
                     )
-                    if success:
-                        total_triggered += 1
-                        logger.info(
-                            f"Triggered behavior reminder: "
-                            f"{reminder.get('title', 'Untitled')} "
-                            f"for user {user_id}"
-                        )
 
             if total_triggered > 0:
                 logger.info(
@@ -249,7 +230,7 @@ class ReminderScheduler:
         except Exception as e:
             logger.error(f"Error cleaning up reminders: {e}")
 
-    def check_proactive_chat(self):
+    async def check_proactive_chat(self):
         """检查是否需要发起主动对话"""
         try:
             logger.info("Checking proactive chat conditions...")
@@ -258,7 +239,9 @@ class ReminderScheduler:
             users = ["default_user"]
 
             for user_id in users:
-                result = self.proactive_chat.should_initiate_chat(user_id)
+                result = await asyncio.to_thread(
+                    self.proactive_chat.should_initiate_chat, user_id
+                )
 
                 if result["should_chat"]:
                     logger.info(
@@ -266,23 +249,20 @@ class ReminderScheduler:
                         f"{result['reason']} (priority: {result['priority']})"
                     )
 
-                    # 通过WebSocket推送主动对话
-                    if self.reminder_manager.websocket_callback:
-                        # websocket_callback 是一个 async 函数,但我们不能在同步函数中 await
-                        # 使用 asyncio.create_task 在后台执行
-                        asyncio.create_task(
-                            self.reminder_manager.websocket_callback({
-                                "type": "proactive_chat",
-                                "user_id": user_id,
-                                "reason": result["reason"],
-                                "message": result["message"],
-                                "priority": result["priority"],
-                                "metadata": result.get("metadata", {})
-                            })
-                        )
+                    # 通过WebSocket推送主动对话（任务运行在事件循环上，可直接 await）
+                    if self.reminder_manager.websocket_broadcast:
+                        await self.reminder_manager.websocket_broadcast({
+                            "type": "proactive_chat",
+                            "user_id": user_id,
+                            "reason": result["reason"],
+                            "message": result["message"],
+                            "priority": result["priority"],
+                            "metadata": result.get("metadata", {})
+                        })
 
                         # 标记已发起
-                        self.proactive_chat.mark_chat_initiated(
+                        await asyncio.to_thread(
+                            self.proactive_chat.mark_chat_initiated,
                             user_id,
                             result["reason"],
                             result["message"]
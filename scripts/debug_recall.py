@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from sqlalchemy import or_
+from sqlalchemy import func, or_
 from db_setup import SessionLocal, Memory
 import sys
 import os
@@ -15,24 +15,29 @@ def test_recall(tag):
         hours = 24 * 365 * 10
         time_threshold = datetime.now() - timedelta(hours=hours)
 
-        query = session.query(Memory).filter(
+        # COUNT(*) OVER () 在 LIMIT 之前计算，总数与样本行一次查询取回
+        query = session.query(
+            Memory, func.count().over().label('total')
+        ).filter(
             Memory.created_at >= time_threshold
         )
 
         if tag:
             # Support prefix matching for tags (case-insensitive)
+            # 与 MemoryManager 相同的 lower(tag) 写法，可走 idx_memories_tag_lower
+            tag_lower = tag.lower()
             query = query.filter(
                 or_(
-                    Memory.tag.ilike(tag),
-                    Memory.tag.ilike(f"{tag}:%")
+                    func.lower(Memory.tag) == tag_lower,
+                    func.lower(Memory.tag).like(f"{tag_lower}:%")
                 )
             )
 
-        count = query.count()
+        rows = query.limit(5).all()
+        count = rows[0].total if rows else 0
         print(f"Found {count} memories.")
 
-        results = query.limit(5).all()
-        for m in results:
+        for m, _ in rows:
             print(f"  - [{m.tag}] {m.content[:50]}...")
 
     finally:
@@ -8,15 +8,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 def list_tags():
     session = SessionLocal()
     try:
-        # Get all distinct tags
-        tags = session.query(Memory.tag).distinct().all()
-        print("All distinct tags in DB:")
-        for t in tags:
-            print(f"  - {t[0]}")
-
-        # Count by tag
+        # Count by tag (GROUP BY 的结果即去重标签列表，一次查询)
         stats = session.query(Memory.tag, func.count(
             Memory.id)).group_by(Memory.tag).all()
+        print("All distinct tags in DB:")
+        for tag, _ in stats:
+            print(f"  - {tag}")
+
         print("\nTag counts:")
         for tag, count in stats:
             print(f"  - {tag}: {count}")
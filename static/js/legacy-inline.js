@@ -1112,11 +1112,10 @@ async function processBaiduRecording() {
         const voiceText = document.getElementById('voiceText');
         voiceText.textContent = '正在识别...';
 
-        const formData = new FormData();
-        formData.append('file', wavBlob, 'audio.wav');
         const response = await fetch('/api/voice/recognize', {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': 'audio/wav' },
+            body: wavBlob
         });
         const result = await response.json();
 
@@ -0,0 +1,104 @@
+"""语义搜索：结果缓存失效与文档索引持久化"""
+import time
+
+import orjson
+import pytest
+
+pytest.importorskip("jieba")
+
+from modules import semantic_search  # noqa: E402
+from modules.semantic_search import (  # noqa: E402
+    INDEX_FORMAT, SemanticQueryCache, SemanticSearchManager,
+    get_semantic_query_cache, invalidate_search_cache
+)
+
+
+def test_query_cache_hit_and_clear():
+    cache = SemanticQueryCache(maxsize=8, ttl=60)
+    cache.set("用户喜欢喝咖啡", ("facts", 10), [1, 2])
+
+    assert cache.get("用户喜欢喝咖啡", ("facts", 10)) == [1, 2]
+    # 不同 scope（tag/limit）不共享结果
+    assert cache.get("用户喜欢喝咖啡", (None, 10)) is None
+
+    cache.clear()
+    assert cache.get("用户喜欢喝咖啡", ("facts", 10)) is None
+
+
+def test_query_cache_expires_after_ttl():
+    cache = SemanticQueryCache(maxsize=8, ttl=0.05)
+    cache.set("明天天气怎么样", None, ["晴"])
+    assert cache.get("明天天气怎么样", None) == ["晴"]
+    time.sleep(0.1)
+    assert cache.get("明天天气怎么样", None) is None
+
+
+def test_query_cache_evicts_oldest_entry():
+    cache = SemanticQueryCache(maxsize=2, ttl=60)
+    cache.set("第一个问题内容", None, 1)
+    cache.set("第二个问题内容", None, 2)
+    cache.set("第三个问题内容", None, 3)
+    assert cache.get("第一个问题内容", None) is None
+    assert cache.get("第三个问题内容", None) == 3
+
+
+def test_invalidate_search_cache_clears_shared_cache():
+    cache = get_semantic_query_cache()
+    cache.set("用户的生日是哪天", (None, 10, 0.1), ["2月8日"])
+    assert cache.get("用户的生日是哪天", (None, 10, 0.1)) == ["2月8日"]
+
+    invalidate_search_cache()
+
+    assert cache.get("用户的生日是哪天", (None, 10, 0.1)) is None
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return SemanticSearchManager(index_path=str(tmp_path / "index.json"))
+
+
+DOCUMENTS = [
+    (1, "用户喜欢冰美式咖啡"),
+    (2, "用户生日是2月8日"),
+    (3, "用户不喜欢体育运动"),
+]
+
+
+def test_search_reflects_removed_documents(manager):
+    assert manager.search("咖啡", DOCUMENTS, min_score=0.01)[0][0] == 1
+
+    manager.remove_memories([1])
+    # 索引版本递增，语料统计重新计算
+    assert manager.search("咖啡", DOCUMENTS[1:], min_score=0.01) == []
+
+
+def test_saved_index_has_no_plaintext_and_prunes_deleted(manager, tmp_path):
+    manager.search("咖啡", DOCUMENTS)
+    manager.set_live_ids([1, 2])
+    manager.save_index()
+
+    raw = (tmp_path / "index.json").read_bytes()
+    data = orjson.loads(raw)
+    assert data["format"] == INDEX_FORMAT
+    assert sorted(data["docs"]) == ["1", "2"]
+    # 只存摘要和词频，不存记忆原文
+    assert DOCUMENTS[0][1].encode("utf-8") not in raw
+
+    loaded = SemanticSearchManager(index_path=str(tmp_path / "index.json"))
+    assert loaded.load_index()
+    assert sorted(loaded._doc_index) == [1, 2]
+
+
+def test_rebuild_is_not_overwritten_by_lazy_load(manager):
+    manager.search("咖啡", DOCUMENTS)
+    manager.save_index()
+
+    fresh = SemanticSearchManager(index_path=manager.index_path)
+    fresh.rebuild_index([(9, "新的记忆内容")])
+    fresh.add_memory(10, "另一条记忆", "facts")
+
+    assert sorted(fresh._doc_index) == [9, 10]
+
+
+def test_get_semantic_query_cache_is_shared():
+    assert semantic_search.get_semantic_query_cache() is get_semantic_query_cache()
@@ -0,0 +1,180 @@
+"""任务执行器：批次划分（_plan_waves）与批次执行（_run_wave）"""
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from modules.task_executor import TaskExecutor  # noqa: E402
+
+
+def _step(num, action_type='tool_call', depends_on=None, **extra):
+    params = {'tool_name': 'time', 'params': {}}
+    if depends_on is not None:
+        params['depends_on'] = depends_on
+    step = {
+        'id': num,
+        'step_num': num,
+        'description': f'步骤{num}',
+        'action_type': action_type,
+        'action_params': params,
+        'status': 'pending',
+    }
+    step.update(extra)
+    return step
+
+
+def _wave_nums(waves):
+    return [[step['step_num'] for step in wave] for wave in waves]
+
+
+class FakeTaskManager:
+    """记录写入，不连接数据库"""
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.step_updates = []
+        self.task_status = None
+
+    def claim_task(self, task_id, from_status=None):
+        return {'id': task_id, 'status': 'in_progress', 'steps': self.steps}
+
+    def batch_update_step_status(self, updates):
+        self.step_updates.extend(updates)
+        return True
+
+    def update_task_status(self, task_id, status, **kwargs):
+        self.task_status = status
+        return True
+
+
+@pytest.fixture
+def make_executor():
+    executors = []
+
+    def make(steps, outcomes):
+        """outcomes: step_num -> (延迟秒数, 是否成功)"""
+        executor = TaskExecutor(FakeTaskManager(steps), tool_registry=None)
+        executor.started = []
+
+        async def fake_execute_step(step, **kwargs):
+            delay, success = outcomes[step['step_num']]
+            executor.started.append(step['step_num'])
+            await asyncio.sleep(delay)
+            if success:
+                return {'success': True, 'result': step['step_num']}
+            return {'success': False, 'error': f"步骤{step['step_num']}失败"}
+
+        executor._execute_step = fake_execute_step
+        executors.append(executor)
+        return executor
+
+    yield make
+    for executor in executors:
+        executor.close()
+
+
+def test_steps_without_depends_on_run_sequentially():
+    waves = TaskExecutor._plan_waves([_step(1), _step(2), _step(3)])
+    assert _wave_nums(waves) == [[1], [2], [3]]
+
+
+def test_independent_steps_share_a_wave():
+    waves = TaskExecutor._plan_waves([
+        _step(1, depends_on=[]), _step(2, depends_on=[]), _step(3, depends_on=[])
+    ])
+    assert _wave_nums(waves) == [[1, 2, 3]]
+
+
+def test_dependency_on_current_wave_starts_new_wave():
+    waves = TaskExecutor._plan_waves([
+        _step(1, depends_on=[]),
+        _step(2, depends_on=[]),
+        _step(3, depends_on=[1]),
+        _step(4, depends_on=['3']),
+        _step(5, depends_on=[1, 2]),
+    ])
+    assert _wave_nums(waves) == [[1, 2], [3], [4, 5]]
+
+
+def test_unparseable_depends_on_is_sequential():
+    waves = TaskExecutor._plan_waves([
+        _step(1, depends_on=[]),
+        _step(2, depends_on=['上一步']),
+        _step(3, depends_on=2),
+    ])
+    assert _wave_nums(waves) == [[1], [2], [3]]
+
+
+@pytest.mark.parametrize('barrier', ['user_confirm', 'wait', 'info'])
+def test_non_tool_steps_are_barriers(barrier):
+    waves = TaskExecutor._plan_waves([
+        _step(1, depends_on=[]),
+        _step(2, action_type=barrier, depends_on=[]),
+        _step(3, depends_on=[]),
+        _step(4, depends_on=[]),
+    ])
+    assert _wave_nums(waves) == [[1], [2], [3, 4]]
+
+
+def test_run_wave_runs_steps_concurrently_in_step_order(make_executor):
+    steps = [_step(1), _step(2), _step(3)]
+    executor = make_executor(steps, {1: (0.2, True), 2: (0.2, True), 3: (0, True)})
+
+    async def run():
+        return await executor._run_wave(steps)
+
+    started = time.monotonic()
+    results = asyncio.run(run())
+    assert time.monotonic() - started < 0.35
+    assert [r['result'] for r in results] == [1, 2, 3]
+
+
+def test_run_wave_failure_keeps_real_results_of_started_siblings(make_executor):
+    steps = [_step(1), _step(2)]
+    executor = make_executor(steps, {1: (0, False), 2: (0.1, True)})
+
+    results = asyncio.run(executor._run_wave(steps))
+
+    assert results[0] == {'success': False, 'error': '步骤1失败'}
+    # 同批次步骤已开始，等它执行完并返回真实结果，而不是记为失败
+    assert results[1] == {'success': True, 'result': 2}
+
+
+def test_failure_in_wave_stops_later_waves(make_executor):
+    steps = [
+        _step(1, depends_on=[]),
+        _step(2, depends_on=[]),
+        _step(3, depends_on=[1, 2]),
+    ]
+    executor = make_executor(steps, {1: (0, False), 2: (0.05, True), 3: (0, True)})
+
+    result = executor.execute_task(1, 'u', 's')
+
+    assert executor.started == [1, 2]
+    assert executor.task_manager.step_updates == [
+        (1, 'failed', None, '步骤1失败'),
+        (2, 'completed', '{"success":true,"result":2}', None),
+    ]
+    assert result['status'] == 'failed'
+    assert (result['completed_steps'], result['failed_steps']) == (1, 1)
+
+
+def test_continue_on_error_runs_later_waves(make_executor):
+    steps = [
+        _step(1, depends_on=[], continue_on_error=True),
+        _step(2, depends_on=[]),
+        _step(3, depends_on=[1, 2]),
+    ]
+    executor = make_executor(steps, {1: (0, False), 2: (0, True), 3: (0, True)})
+
+    result = executor.execute_task(1, 'u', 's')
+
+    assert sorted(executor.started) == [1, 2, 3]
+    assert [u[:2] for u in executor.task_manager.step_updates] == [
+        (1, 'failed'), (2, 'completed'), (3, 'completed')
+    ]
+    # 部分失败
+    assert executor.task_manager.task_status == 'failed'
+    assert (result['completed_steps'], result['failed_steps']) == (2, 1)
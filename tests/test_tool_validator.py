@@ -0,0 +1,111 @@
+"""工具参数校验：注册时生成的专用校验函数与逐个 ToolParameter.validate 的结果一致"""
+import itertools
+
+from modules.tool_manager import Tool, ToolParameter, ToolRegistry
+
+
+class DummyTool(Tool):
+    def __init__(self, parameters):
+        super().__init__()
+        self.name = "dummy"
+        self.description = "测试工具"
+        self.parameters = parameters
+
+    async def execute(self, **kwargs):
+        return {'success': True, 'result': kwargs}
+
+
+def reference_validate(parameters, params):
+    """原有的逐参数校验（编译前 Tool.validate_parameters 的实现）"""
+    validated_params = {}
+    for param_def in parameters:
+        value = params.get(param_def.name, param_def.default)
+        is_valid, error_msg = param_def.validate(value)
+        if not is_valid:
+            return False, error_msg, {}
+        if value is not None:
+            validated_params[param_def.name] = value
+        else:
+            validated_params[param_def.name] = param_def.default
+    return True, None, validated_params
+
+
+PARAMETERS = [
+    ToolParameter("operation", "string", "操作", required=False,
+                  default="create", enum=["create", "list", "delete"]),
+    ToolParameter("content", "string", "内容", required=True),
+    ToolParameter("count", "number", "数量", required=False, default=5),
+    ToolParameter("level", "number", "级别", required=False, enum=[1, 2, 3]),
+    ToolParameter("flag", "boolean", "开关", required=False),
+    ToolParameter("items", "array", "列表", required=False,
+                  enum=[["a"], ["b"]]),
+    ToolParameter("extra", "object", "附加", required=False),
+    ToolParameter("any", "custom", "任意类型", required=True, default="x"),
+]
+
+# 每个参数的候选取值（含缺省、显式 None、类型错误、不在枚举中）
+_MISSING = object()
+CANDIDATES = {
+    "operation": [_MISSING, None, "list", "update", 3],
+    "content": [_MISSING, None, "hello", 42],
+    "count": [_MISSING, None, 2.5, True, "5"],
+    "level": [_MISSING, None, 2, 4, "1"],
+    "flag": [_MISSING, False, 0],
+    "items": [_MISSING, ["a"], ["c"], "a"],
+    "extra": [_MISSING, {"k": 1}, []],
+    "any": [_MISSING, None, object()],
+}
+
+
+def _all_inputs():
+    names = list(CANDIDATES)
+    for values in itertools.product(*(CANDIDATES[n] for n in names)):
+        params = {n: v for n, v in zip(names, values) if v is not _MISSING}
+        yield params
+        # 未定义的参数应被忽略
+        yield {**params, "undefined": "ignored"}
+
+
+def test_compiled_validator_matches_reference():
+    tool = DummyTool(PARAMETERS)
+    ToolRegistry().register(tool)
+    checked = 0
+    for params in _all_inputs():
+        assert tool.validate_parameters(params) == \
+            reference_validate(PARAMETERS, params), params
+        checked += 1
+    assert checked > 1000
+
+
+def test_explicit_none_on_required_param_is_missing():
+    tool = DummyTool(PARAMETERS)
+    assert tool.validate_parameters({"content": None}) == \
+        (False, "参数 'content' 是必填项", {})
+
+
+def test_required_param_with_default_uses_default_when_omitted():
+    tool = DummyTool(PARAMETERS)
+    ok, error, validated = tool.validate_parameters({"content": "hi"})
+    assert (ok, error) == (True, None)
+    assert validated["any"] == "x"
+    assert validated["operation"] == "create"
+    # 显式传入 None 不回落到默认值
+    assert tool.validate_parameters({"content": "hi", "any": None}) == \
+        (False, "参数 'any' 是必填项", {})
+
+
+def test_first_error_follows_definition_order():
+    tool = DummyTool(PARAMETERS)
+    # content 缺失、operation 不在枚举中：按定义顺序先报 operation
+    ok, error, _ = tool.validate_parameters({"operation": "update"})
+    assert not ok
+    assert error == "参数 'operation' 值必须是 ['create', 'list', 'delete'] 之一"
+
+
+def test_validator_rebuilt_when_parameters_replaced():
+    tool = DummyTool(PARAMETERS)
+    ToolRegistry().register(tool)
+    assert tool.validate_parameters({})[0] is False
+
+    tool.parameters = [ToolParameter("city", "string", "城市", required=False)]
+    assert tool.validate_parameters({}) == (True, None, {"city": None})
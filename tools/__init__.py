@@ -2,40 +2,67 @@
 小乐AI工具模块
 
 包含各种外部服务和系统操作工具
+
+工具按需加载（PEP 562 模块 __getattr__）：只导入某个子模块
+（如 tools.baidu_ocr_tool）时，不会连带导入其余工具模块、创建全部工具实例；
+首次访问包属性时才导入对应子模块并缓存。
+
+包级别导出：
+- 全部工具类：`from tools import VisionTool`
+- 名称与子模块不同的工具实例：system_info_tool、time_tool、calculator_tool、
+  register_face_tool
+
+与子模块同名的工具实例（weather_tool、reminder_tool、search_tool、file_tool、
+delete_memory_tool、task_tool、vision_tool）不再从包导出：子模块被导入后，
+包属性即为该子模块，无法可靠地解析为实例。请从子模块导入实例
+（如 `from tools.weather_tool import weather_tool`），或导入类自行实例化。
 """
-from .weather_tool import weather_tool
-from .system_tool import system_info_tool, time_tool, calculator_tool
-from .reminder_tool import ReminderTool
-from .search_tool import search_tool
-from .file_tool import file_tool
-from .delete_memory_tool import DeleteMemoryTool
-from .task_tool import TaskTool
-from .vision_tool import VisionTool, RegisterFaceTool
-
-# 创建提醒工具实例
-reminder_tool = ReminderTool()
-
-# 创建删除记忆工具实例
-delete_memory_tool = DeleteMemoryTool()
-
-# 创建任务工具实例
-task_tool = TaskTool()
-
-# 创建视觉工具实例
-vision_tool = VisionTool()
-register_face_tool = RegisterFaceTool()
-
-# 导出所有工具
-__all__ = [
-    'weather_tool',
-    'system_info_tool',
-    'time_tool',
-    'calculator_tool',
-    'reminder_tool',
-    'search_tool',
-    'file_tool',
-    'delete_memory_tool',
-    'task_tool',
-    'vision_tool',
-    'register_face_tool'
-]
+import importlib
+import threading
+
+# 名称 -> (子模块, 属性名, 是否需要实例化)
+_LAZY_EXPORTS = {
+    # 工具类
+    'WeatherTool': ('.weather_tool', 'WeatherTool', False),
+    'SystemInfoTool': ('.system_tool', 'SystemInfoTool', False),
+    'TimeTool': ('.system_tool', 'TimeTool', False),
+    'CalculatorTool': ('.system_tool', 'CalculatorTool', False),
+    'ReminderTool': ('.reminder_tool', 'ReminderTool', False),
+    'SearchTool': ('.search_tool', 'SearchTool', False),
+    'FileTool': ('.file_tool', 'FileTool', False),
+    'DeleteMemoryTool': ('.delete_memory_tool', 'DeleteMemoryTool', False),
+    'TaskTool': ('.task_tool', 'TaskTool', False),
+    'VisionTool': ('.vision_tool', 'VisionTool', False),
+    'RegisterFaceTool': ('.vision_tool', 'RegisterFaceTool', False),
+    # 工具实例（名称与子模块不同）
+    'system_info_tool': ('.system_tool', 'system_info_tool', False),
+    'time_tool': ('.system_tool', 'time_tool', False),
+    'calculator_tool': ('.system_tool', 'calculator_tool', False),
+    'register_face_tool': ('.vision_tool', 'RegisterFaceTool', True),
+}
+
+_lazy_lock = threading.RLock()
+
+# 导出的工具类与工具实例
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    spec = _LAZY_EXPORTS.get(name)
+    if spec is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    with _lazy_lock:
+        # 并发首次访问时只创建一个实例
+        if name in globals():
+            return globals()[name]
+        module_name, attr, instantiate = spec
+        value = getattr(importlib.import_module(module_name, __name__), attr)
+        if instantiate:
+            value = value()
+        globals()[name] = value
+        return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
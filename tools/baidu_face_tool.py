@@ -4,15 +4,87 @@
 """
 import os
 import base64
+import hashlib
 import requests
 import logging
 import json
+import mmap
+import orjson
+import tempfile
+import threading
 import time
-from typing import Dict, Any, List, Optional
-from config import UPLOADS_DIR
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import quote
+from config import BASE_DIR, UPLOADS_DIR
+from tools.baidu_http import get_baidu_session
+
+# 跨进程文件锁（Windows 不可用，此时只做进程内加锁）
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# access_token 缓存文件：多个 worker 进程共享同一个 token，重启后也无需重新获取
+TOKEN_CACHE_PATH = os.getenv(
+    'BAIDU_FACE_TOKEN_CACHE',
+    os.path.join(BASE_DIR, 'cache', 'baidu_face_token.json')
+)
+
+# 检测/搜索结果缓存：(操作, 图片内容摘要) -> 结果，同一张图片重复处理时直接复用
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL = 300  # 秒
+
+# 百度接口非 0 错误码 -> 固定返回结果（同一错误码在不同接口含义不同，按接口分表；
+# 取用时浅拷贝）。表中没有的错误码按失败处理
+_GROUP_ADD_OK_CODES = frozenset({0, 223101})  # 223101: 分组已存在
+_DETECT_ERRORS = {
+    222202: {"success": True, "face_count": 0, "faces": []},  # 未检测到人脸
+}
+_REGISTER_ERRORS = {
+    222202: {"success": False, "error": "图片中未检测到人脸"},
+    222203: {"success": False, "error": "检测到多张人脸，请上传单人照片"},
+}
+_SEARCH_ERRORS = {
+    222202: {
+        "success": True,
+        "matched": False,
+        "person_name": "未知人物",
+        "confidence": 0,
+        "error": "未检测到人脸"
+    },
+    223105: {  # 人脸库为空
+        "success": True,
+        "matched": False,
+        "person_name": "未知人物",
+        "confidence": 0,
+        "error": "人脸库为空"
+    },
+}
+_GET_USERS_ERRORS = {
+    223101: {"success": True, "users": [], "count": 0},  # 分组不存在
+}
+
+# 上传目录对外可访问的地址（对应 main.py 挂载的 /uploads，如 https://example.com/uploads）。
+# 配置后，上传目录中的图片以 image_type=URL 提交，由百度直接拉取，
+# 不再读取文件和 base64 编码；未配置或图片不在上传目录时仍使用 BASE64
+IMAGE_BASE_URL = os.getenv('BAIDU_FACE_IMAGE_BASE_URL', '').rstrip('/')
+
+# recognize_faces 中与检测并发执行的人脸搜索请求
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="baidu-face")
+
+
+def _parse_response(response) -> Dict[str, Any]:
+    """解析百度接口响应（orjson 直接解析原始字节，失败时回退到 requests 的解析）"""
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return response.json()
+
 
 def _resolve_image_path(image_path: str) -> Optional[str]:
     """解析图片路径，处理 /uploads/ 前缀映射"""
@@ -34,7 +106,11 @@ def _resolve_image_path(image_path: str) -> Optional[str]:
 
 
 class BaiduFaceClient:
-    """百度人脸识别 API 客户端"""
+    """百度人脸识别 API 客户端
+
+    图片默认以 BASE64 提交；设置 BAIDU_FACE_IMAGE_BASE_URL 后，
+    上传目录中的图片改为以 URL 提交（要求该地址能被百度服务器访问）。
+    """
 
     TOKEN_URL = "https://aip.baidubce.com/oauth/2.0/token"
     DETECT_URL = "https://aip.baidubce.com/rest/2.0/face/v3/detect"
@@ -48,17 +124,86 @@ class BaiduFaceClient:
         self.app_id = os.getenv("BAIDU_FACE_APP_ID")
         self.api_key = os.getenv("BAIDU_FACE_API_KEY")
         self.secret_key = os.getenv("BAIDU_FACE_SECRET_KEY")
+        # 配置在初始化后不会变化，只判断一次
+        self._configured = bool(self.app_id and self.api_key and self.secret_key)
         self._access_token = None
         self._token_expires_at = 0
+        self._token_lock = threading.Lock()
+        # HTTP 连接池：与 OCR / 语音共用到 aip.baidubce.com 的 keep-alive 连接
+        self._http_session = get_baidu_session()
+        self._result_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
         self.group_id = "xiaole_faces"  # 人脸库分组ID
+        self._load_token_from_cache()
 
     def _is_configured(self) -> bool:
         """检查是否配置了百度人脸识别 API"""
-        return all([self.app_id, self.api_key, self.secret_key])
+        return self._configured
+
+    def _token_cache_key(self) -> str:
+        """缓存文件中标识 API Key 的摘要（更换密钥后旧 token 失效）"""
+        return hashlib.sha256((self.api_key or "").encode()).hexdigest()[:16]
+
+    def _load_token_from_cache(self) -> bool:
+        """从缓存文件读取未过期的 access_token"""
+        if not self._configured:
+            return False
+        try:
+            with open(TOKEN_CACHE_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning("读取 access_token 缓存失败: %s", e)
+            return False
+
+        if (data.get("key") != self._token_cache_key()
+                or time.time() >= data.get("expires_at", 0)):
+            return False
+        self._access_token = data.get("token")
+        self._token_expires_at = data["expires_at"]
+        return bool(self._access_token)
+
+    def _save_token_to_cache(self) -> None:
+        """写入缓存文件（先写临时文件再原子替换）"""
+        try:
+            cache_dir = os.path.dirname(TOKEN_CACHE_PATH)
+            os.makedirs(cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=cache_dir, suffix=".tmp", delete=False,
+                encoding="utf-8"
+            ) as f:
+                json.dump({
+                    "key": self._token_cache_key(),
+                    "token": self._access_token,
+                    "expires_at": self._token_expires_at
+                }, f)
+            os.replace(f.name, TOKEN_CACHE_PATH)
+        except Exception as e:
+            logger.warning("保存 access_token 缓存失败: %s", e)
+
+    @contextmanager
+    def _token_file_lock(self):
+        """跨进程互斥刷新 token，避免多个 worker 同时请求"""
+        if fcntl is None:
+            yield
+            return
+        try:
+            os.makedirs(os.path.dirname(TOKEN_CACHE_PATH), exist_ok=True)
+            lock_file = open(TOKEN_CACHE_PATH + ".lock", "w")
+        except OSError:
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
 
     def _get_access_token(self) -> Optional[str]:
         """获取百度 API access_token"""
-        if not self._is_configured():
+        if not self._configured:
             logger.warning("百度人脸识别 API 未配置")
             return None
 
@@ -66,19 +211,30 @@ class BaiduFaceClient:
         if self._access_token and time.time() < self._token_expires_at:
             return self._access_token
 
+        with self._token_lock, self._token_file_lock():
+            # 等锁期间其他线程/进程可能已刷新
+            if self._access_token and time.time() < self._token_expires_at:
+                return self._access_token
+            if self._load_token_from_cache():
+                return self._access_token
+            return self._fetch_access_token()
+
+    def _fetch_access_token(self) -> Optional[str]:
+        """向百度请求新的 access_token 并写入缓存"""
         try:
             params = {
                 "grant_type": "client_credentials",
                 "client_id": self.api_key,
                 "client_secret": self.secret_key
             }
-            response = requests.post(self.TOKEN_URL, params=params, timeout=10)
-            result = response.json()
+            response = self._http_session.post(self.TOKEN_URL, params=params, timeout=10)
+            result = _parse_response(response)
 
             if "access_token" in result:
                 self._access_token = result["access_token"]
                 # Token 有效期通常是 30 天，这里设置 29 天后过期
                 self._token_expires_at = time.time() + result.get("expires_in", 2592000) - 86400
+                self._save_token_to_cache()
                 logger.info("✅ 百度人脸识别 access_token 获取成功")
                 return self._access_token
             else:
@@ -90,13 +246,78 @@ class BaiduFaceClient:
 
     def _image_to_base64(self, image_path: str) -> Optional[str]:
         """将图片转为 base64"""
+        image = self._read_image(image_path)
+        return image[1] if image else None
+
+    def _read_image(self, image_path: str) -> Optional[Tuple[str, str]]:
+        """读取图片一次，同时得到内容摘要（缓存键）和 base64
+
+        文件以 mmap 映射，摘要与编码直接读取映射内存，不再复制一份文件内容。
+        """
         try:
-            with open(image_path, "rb") as f:
-                return base64.b64encode(f.read()).decode("utf-8")
+            with open(image_path, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                digest = hashlib.blake2b(mm, digest_size=16).hexdigest()
+                return digest, base64.b64encode(mm).decode("ascii")
         except Exception as e:
             logger.error("读取图片失败: %s", e)
             return None
 
+    def _load_image(self, image_path: str) -> Optional[Tuple[str, str, str]]:
+        """准备提交给百度的图片，返回 (缓存键摘要, image, image_type)
+
+        上传目录中的图片在配置了 IMAGE_BASE_URL 时直接给出 URL，
+        摘要取路径 + 修改时间 + 大小，无需读取文件；否则读取文件并 base64 编码。
+        """
+        if IMAGE_BASE_URL:
+            try:
+                real_path = os.path.realpath(image_path)
+                uploads_root = os.path.realpath(UPLOADS_DIR)
+                if real_path.startswith(uploads_root + os.sep):
+                    rel_path = os.path.relpath(real_path, uploads_root)
+                    st = os.stat(real_path)
+                    url_path = quote(rel_path.replace(os.sep, '/'))
+                    return (
+                        f"url:{rel_path}:{st.st_mtime_ns}:{st.st_size}",
+                        f"{IMAGE_BASE_URL}/{url_path}",
+                        "URL"
+                    )
+            except OSError as e:
+                logger.error("读取图片失败: %s", e)
+                return None
+
+        image = self._read_image(image_path)
+        if not image:
+            return None
+        return image[0], image[1], "BASE64"
+
+    def _cache_get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        with self._result_cache_lock:
+            entry = self._result_cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._result_cache[key]
+                return None
+            self._result_cache.move_to_end(key)
+            return entry[1]
+
+    def _cache_put(self, key: tuple, result: Dict[str, Any]) -> None:
+        """只缓存成功结果，失败时下次重试"""
+        if not result.get("success"):
+            return
+        with self._result_cache_lock:
+            self._result_cache[key] = (
+                time.monotonic() + RESULT_CACHE_TTL, result
+            )
+            if len(self._result_cache) > RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+
+    def _clear_result_cache(self) -> None:
+        """人脸库变化（注册/删除）后搜索结果失效"""
+        with self._result_cache_lock:
+            self._result_cache.clear()
+
     def ensure_group_exists(self) -> bool:
         """确保人脸库分组存在"""
         token = self._get_access_token()
@@ -106,15 +327,15 @@ class BaiduFaceClient:
         try:
             params = {"access_token": token}
             data = {"group_id": self.group_id}
-            response = requests.post(
+            response = self._http_session.post(
                 self.GROUP_ADD_URL,
                 params=params,
                 data=data,
                 timeout=10
             )
-            result = response.json()
+            result = _parse_response(response)
             # error_code 为 0 或 223101（分组已存在）都算成功
-            if result.get("error_code") in [0, 223101]:
+            if result.get("error_code") in _GROUP_ADD_OK_CODES:
                 return True
             logger.warning("创建人脸库分组失败: %s", result)
             return False
@@ -127,49 +348,66 @@ class BaiduFaceClient:
         检测图片中的人脸
         返回: {success, face_count, faces: [{location, quality, ...}]}
         """
-        if not self._is_configured():
+        if not self._configured:
             return {"success": False, "error": "百度人脸识别 API 未配置"}
 
+        image = self._load_image(image_path)
+        if not image:
+            return {"success": False, "error": f"无法读取图片: {image_path}"}
+        return self._detect_faces(*image)
+
+    def _detect_faces(
+        self, digest: str, image: str, image_type: str = "BASE64"
+    ) -> Dict[str, Any]:
+        """检测人脸（已读取的图片，按内容摘要缓存结果）"""
+        cache_key = ("detect", digest)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         token = self._get_access_token()
         if not token:
             return {"success": False, "error": "获取 access_token 失败"}
 
-        image_base64 = self._image_to_base64(image_path)
-        if not image_base64:
-            return {"success": False, "error": f"无法读取图片: {image_path}"}
+        result = self._post_detect(token, image, image_type)
+        self._cache_put(cache_key, result)
+        return result
 
+    def _post_detect(
+        self, token: str, image: str, image_type: str = "BASE64"
+    ) -> Dict[str, Any]:
         try:
             params = {"access_token": token}
             data = {
-                "image": image_base64,
-                "image_type": "BASE64",
+                "image": image,
+                "image_type": image_type,
                 "face_field": "age,beauty,expression,face_shape,gender,glasses,emotion",
                 "max_face_num": 10
             }
 
-            response = requests.post(
+            response = self._http_session.post(
                 self.DETECT_URL,
                 params=params,
                 data=data,
                 timeout=15
             )
-            result = response.json()
+            result = _parse_response(response)
 
-            if result.get("error_code") == 0:
+            code = result.get("error_code")
+            if code == 0:
                 face_list = result.get("result", {}).get("face_list", [])
                 return {
                     "success": True,
                     "face_count": len(face_list),
                     "faces": face_list
                 }
-            elif result.get("error_code") == 222202:
-                # 未检测到人脸
-                return {"success": True, "face_count": 0, "faces": []}
-            else:
-                return {
-                    "success": False,
-                    "error": f"百度 API 错误: {result.get('error_msg', '未知错误')}"
-                }
+            canned = _DETECT_ERRORS.get(code)
+            if canned is not None:
+                return dict(canned)
+            return {
+                "success": False,
+                "error": f"百度 API 错误: {result.get('error_msg', '未知错误')}"
+            }
 
         except Exception as e:
             logger.error("人脸检测异常: %s", e)
@@ -186,7 +424,7 @@ class BaiduFaceClient:
         person_name: 人名（用于显示）
         user_id: 用户ID（用于唯一标识，默认使用 person_name）
         """
-        if not self._is_configured():
+        if not self._configured:
             return {"success": False, "error": "百度人脸识别 API 未配置"}
 
         # 解析图片路径
@@ -202,9 +440,10 @@ class BaiduFaceClient:
         if not token:
             return {"success": False, "error": "获取 access_token 失败"}
 
-        image_base64 = self._image_to_base64(resolved_path)
-        if not image_base64:
+        image = self._load_image(resolved_path)
+        if not image:
             return {"success": False, "error": f"无法读取图片: {resolved_path}"}
+        _, image_data, image_type = image
 
         # 使用 person_name 作为 user_id（去除空格和特殊字符）
         if not user_id:
@@ -213,8 +452,8 @@ class BaiduFaceClient:
         try:
             params = {"access_token": token}
             data = {
-                "image": image_base64,
-                "image_type": "BASE64",
+                "image": image_data,
+                "image_type": image_type,
                 "group_id": self.group_id,
                 "user_id": user_id,
                 "user_info": json.dumps({"name": person_name}, ensure_ascii=False),
@@ -223,29 +462,29 @@ class BaiduFaceClient:
                 "action_type": "REPLACE"  # 如果用户已存在则替换
             }
 
-            response = requests.post(
+            response = self._http_session.post(
                 self.ADD_USER_URL,
                 params=params,
                 data=data,
                 timeout=30
             )
-            result = response.json()
+            result = _parse_response(response)
 
-            if result.get("error_code") == 0:
+            code = result.get("error_code")
+            if code == 0:
+                self._clear_result_cache()
                 logger.info("✅ 人脸注册成功: %s", person_name)
                 return {
                     "success": True,
                     "result": f"已成功注册 {person_name} 的人脸"
                 }
-            elif result.get("error_code") == 222202:
-                return {"success": False, "error": "图片中未检测到人脸"}
-            elif result.get("error_code") == 222203:
-                return {"success": False, "error": "检测到多张人脸，请上传单人照片"}
-            else:
-                return {
-                    "success": False,
-                    "error": f"注册失败: {result.get('error_msg', '未知错误')}"
-                }
+            canned = _REGISTER_ERRORS.get(code)
+            if canned is not None:
+                return dict(canned)
+            return {
+                "success": False,
+                "error": f"注册失败: {result.get('error_msg', '未知错误')}"
+            }
 
         except Exception as e:
             logger.error("人脸注册异常: %s", e)
@@ -260,37 +499,55 @@ class BaiduFaceClient:
         在人脸库中搜索匹配的人脸
         返回: {success, matched, person_name, confidence, ...}
         """
-        if not self._is_configured():
+        if not self._configured:
             return {"success": False, "error": "百度人脸识别 API 未配置"}
 
+        image = self._load_image(image_path)
+        if not image:
+            return {"success": False, "error": f"无法读取图片: {image_path}"}
+        return self._search_face(*image)
+
+    def _search_face(
+        self, digest: str, image: str, image_type: str = "BASE64"
+    ) -> Dict[str, Any]:
+        """搜索人脸（已读取的图片，按内容摘要缓存结果）"""
+        cache_key = ("search", digest)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         token = self._get_access_token()
         if not token:
             return {"success": False, "error": "获取 access_token 失败"}
 
-        image_base64 = self._image_to_base64(image_path)
-        if not image_base64:
-            return {"success": False, "error": f"无法读取图片: {image_path}"}
+        result = self._post_search(token, image, image_type)
+        self._cache_put(cache_key, result)
+        return result
 
+    def _post_search(
+        self, token: str, image: str, image_type: str = "BASE64"
+    ) -> Dict[str, Any]:
         try:
             params = {"access_token": token}
             data = {
-                "image": image_base64,
-                "image_type": "BASE64",
+                "image": image,
+                "image_type": image_type,
                 "group_id_list": self.group_id,
                 "quality_control": "NORMAL",
                 "liveness_control": "NONE",
                 "max_user_num": 3  # 返回最多3个匹配结果
             }
 
-            response = requests.post(
+            response = self._http_session.post(
                 self.SEARCH_URL,
                 params=params,
                 data=data,
                 timeout=15
             )
-            result = response.json()
+            result = _parse_response(response)
 
-            if result.get("error_code") == 0:
+            code = result.get("error_code")
+            if code == 0:
                 user_list = result.get("result", {}).get("user_list", [])
                 if user_list:
                     best_match = user_list[0]
@@ -333,28 +590,13 @@ class BaiduFaceClient:
                         "confidence": 0,
                         "score": 0
                     }
-            elif result.get("error_code") == 222202:
-                return {
-                    "success": True,
-                    "matched": False,
-                    "person_name": "未知人物",
-                    "confidence": 0,
-                    "error": "未检测到人脸"
-                }
-            elif result.get("error_code") == 223105:
-                # 人脸库为空
-                return {
-                    "success": True,
-                    "matched": False,
-                    "person_name": "未知人物",
-                    "confidence": 0,
-                    "error": "人脸库为空"
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"搜索失败: {result.get('error_msg', '未知错误')}"
-                }
+            canned = _SEARCH_ERRORS.get(code)
+            if canned is not None:
+                return dict(canned)
+            return {
+                "success": False,
+                "error": f"搜索失败: {result.get('error_msg', '未知错误')}"
+            }
 
         except Exception as e:
             logger.error("人脸搜索异常: %s", e)
@@ -368,14 +610,25 @@ class BaiduFaceClient:
         识别图片中的所有人脸
         兼容 FaceManager.recognize_faces 的返回格式
         """
-        if not self._is_configured():
+        if not self._configured:
             return {"success": False, "error": "百度人脸识别 API 未配置"}
 
-        # 先检测人脸
-        detect_result = self.detect_faces(image_path)
+        # 图片只准备一次（读取编码或生成 URL），检测与搜索共用（两者按摘要各自缓存）
+        image = self._load_image(image_path)
+        if not image:
+            return {"success": False, "error": f"无法读取图片: {image_path}"}
+
+        # 检测与搜索互不依赖，并发发出两个请求，耗时约为一次往返；
+        # 先取好 token，避免两个请求同时去刷新
+        if not self._get_access_token():
+            return {"success": False, "error": "获取 access_token 失败"}
+        search_future = _SEARCH_POOL.submit(self._search_face, *image)
+
+        detect_result = self._detect_faces(*image)
         if not detect_result.get("success"):
             return detect_result
 
+        # 未检测到人脸时直接丢弃搜索结果（请求在后台完成并进入缓存）
         face_count = detect_result.get("face_count", 0)
         if face_count == 0:
             return {
@@ -386,7 +639,7 @@ class BaiduFaceClient:
             }
 
         # 搜索匹配
-        search_result = self.search_face(image_path)
+        search_result = search_future.result()
         if not search_result.get("success"):
             # 搜索失败时，仍然返回检测结果
             return {
@@ -444,7 +697,7 @@ class BaiduFaceClient:
 
     def get_registered_users(self) -> Dict[str, Any]:
         """获取已注册的用户列表"""
-        if not self._is_configured():
+        if not self._configured:
             return {"success": False, "error": "百度人脸识别 API 未配置"}
 
         token = self._get_access_token()
@@ -459,29 +712,29 @@ class BaiduFaceClient:
                 "length": 100
             }
 
-            response = requests.post(
+            response = self._http_session.post(
                 self.GET_USER_LIST_URL,
                 params=params,
                 data=data,
                 timeout=10
             )
-            result = response.json()
+            result = _parse_response(response)
 
-            if result.get("error_code") == 0:
+            code = result.get("error_code")
+            if code == 0:
                 user_list = result.get("result", {}).get("user_id_list", [])
                 return {
                     "success": True,
                     "users": user_list,
                     "count": len(user_list)
                 }
-            elif result.get("error_code") == 223101:
-                # 分组不存在
-                return {"success": True, "users": [], "count": 0}
-            else:
-                return {
-                    "success": False,
-                    "error": f"获取用户列表失败: {result.get('error_msg')}"
-                }
+            canned = _GET_USERS_ERRORS.get(code)
+            if canned is not None:
+                return dict(canned)
+            return {
+                "success": False,
+                "error": f"获取用户列表失败: {result.get('error_msg')}"
+            }
 
         except Exception as e:
             logger.error("获取用户列表异常: %s", e)
@@ -489,7 +742,7 @@ class BaiduFaceClient:
 
     def delete_user(self, user_id: str) -> Dict[str, Any]:
         """删除用户"""
-        if not self._is_configured():
+        if not self._configured:
             return {"success": False, "error": "百度人脸识别 API 未配置"}
 
         token = self._get_access_token()
@@ -503,15 +756,16 @@ class BaiduFaceClient:
                 "user_id": user_id
             }
 
-            response = requests.post(
+            response = self._http_session.post(
                 self.DELETE_USER_URL,
                 params=params,
                 data=data,
                 timeout=10
             )
-            result = response.json()
+            result = _parse_response(response)
 
             if result.get("error_code") == 0:
+                self._clear_result_cache()
                 return {"success": True, "result": f"已删除用户 {user_id}"}
             else:
                 return {
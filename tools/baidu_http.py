@@ -0,0 +1,31 @@
+"""
+百度 AI 开放平台共享 HTTP 会话
+
+人脸识别（REST 直连）与 OCR / 语音（aip SDK）都访问 aip.baidubce.com，
+共用一个带连接池的 requests.Session，复用 keep-alive 连接，免去每次调用的 TCP + TLS 握手。
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    # 只对连接失败等可安全重试的错误重试（POST 默认不因读超时重试）
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
+
+def get_baidu_session() -> requests.Session:
+    """获取共享的百度 API 会话"""
+    return _session
+
+
+def share_session(aip_client) -> None:
+    """让 aip SDK 客户端（AipOcr / AipSpeech 等）改用共享会话
+
+    SDK 在 AipBase.__init__ 中为每个客户端单独创建 self.s 并用它发送请求。
+    """
+    if aip_client is not None and hasattr(aip_client, 's'):
+        aip_client.s = _session
@@ -2,13 +2,18 @@
 百度文字识别工具 (OCR)
 支持通用文字识别、手写文字识别
 """
+import logging
 import os
+import threading
 from typing import Optional, Dict, Any, List
 from aip import AipOcr
+from tools.baidu_http import share_session
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class BaiduOCRTool:
     """百度OCR工具类"""
@@ -19,15 +24,27 @@ class BaiduOCRTool:
         self.api_key = os.getenv('BAIDU_API_KEY', '')
         self.secret_key = os.getenv('BAIDU_SECRET_KEY', '')
 
-        self.client: Optional[AipOcr] = None
-        if self.app_id and self.api_key and self.secret_key:
-            self.client = AipOcr(self.app_id, self.api_key, self.secret_key)
-            print("✅ 百度OCR服务初始化成功")
-        else:
-            print("⚠️  百度OCR服务未配置 (复用语音服务的KEY)")
+        self._configured = bool(self.app_id and self.api_key and self.secret_key)
+        # SDK 客户端在首次识别时才创建
+        self._client: Optional[AipOcr] = None
+        self._client_lock = threading.Lock()
+        if not self._configured:
+            logger.info("⚠️  百度OCR服务未配置 (复用语音服务的KEY)")
+
+    @property
+    def client(self) -> Optional[AipOcr]:
+        """百度OCR客户端（懒加载，未配置时为 None）"""
+        if self._client is None and self._configured:
+            with self._client_lock:
+                if self._client is None:
+                    client = AipOcr(self.app_id, self.api_key, self.secret_key)
+                    share_session(client)
+                    self._client = client
+                    logger.info("✅ 百度OCR服务初始化成功")
+        return self._client
 
     def is_enabled(self) -> bool:
-        return self.client is not None
+        return self._configured
 
     def recognize_handwriting(self, image_data: bytes) -> Dict[str, Any]:
         """
@@ -6,6 +6,7 @@ import os
 from typing import Optional, Dict, Any, cast
 
 from aip import AipSpeech
+from tools.baidu_http import share_session
 from dotenv import load_dotenv
 
 
@@ -26,6 +27,7 @@ class BaiduVoiceTool:
         self.client: Optional[AipSpeech] = None
         if self.app_id and self.api_key and self.secret_key:
             self.client = AipSpeech(self.app_id, self.api_key, self.secret_key)
+            share_session(self.client)
             print("✅ 百度语音服务初始化成功（已加载密钥）")
         else:
             print("⚠️  百度语音服务未配置，请设置环境变量：")
@@ -3,10 +3,16 @@
 允许用户通过对话删除数据库中的记忆
 """
 from typing import Optional
+import asyncio
 import logging
+import re
+import threading
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, delete
 from db_setup import Memory, SessionLocal
+from modules.semantic_search import (
+    get_semantic_search_manager, invalidate_search_cache
+)
 from modules.tool_manager import Tool, ToolParameter
 
 logger = logging.getLogger(__name__)
@@ -21,6 +27,10 @@ class DeleteMemoryTool(Tool):
         self.category = "memory"  # 记忆管理类工具
         self.enabled = True
         self.db = db or SessionLocal()
+        # 数据库会话不是线程安全的，同一时间只允许一个调用使用
+        self._db_lock = threading.Lock()
+        # 数据库操作在线程中执行，不阻塞事件循环
+        self.async_safe = True
         self.description = """删除数据库中的记忆。
 支持的删除方式：
 1. 按关键词删除：删除包含特定关键词的记忆
@@ -68,47 +78,57 @@ class DeleteMemoryTool(Tool):
             )
         ]
 
+    # "N分钟前"、"N小时前"、"N天前"
+    _TIME_AGO_RE = re.compile(r'^\s*(\d+)\s*(分钟|小时|天)前\s*$')
+    _TIME_UNITS = {"分钟": "minutes", "小时": "hours", "天": "days"}
+    # 相对时间词 -> 起始时间（按顺序匹配第一个出现的词）
+    _TIME_WORDS = {
+        "昨天": lambda now: now - timedelta(days=1),
+        "今天": lambda now: now.replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ),
+        # "最近" 默认为最近1小时
+        "最近": lambda now: now - timedelta(hours=1),
+    }
+
     def _parse_time_range(self, time_str: str) -> Optional[datetime]:
         """解析时间范围字符串，返回起始时间"""
         now = datetime.now()
-        time_str = time_str.lower().strip()
-
-        # 处理"N分钟前"、"N小时前"、"N天前"
-        if "分钟前" in time_str:
-            try:
-                minutes = int(time_str.replace("分钟前", "").strip())
-                return now - timedelta(minutes=minutes)
-            except ValueError:
-                pass
-
-        if "小时前" in time_str:
-            try:
-                hours = int(time_str.replace("小时前", "").strip())
-                return now - timedelta(hours=hours)
-            except ValueError:
-                pass
-
-        if "天前" in time_str:
-            try:
-                days = int(time_str.replace("天前", "").strip())
-                return now - timedelta(days=days)
-            except ValueError:
-                pass
-
-        # 处理"昨天"、"今天"
-        if "昨天" in time_str:
-            return now - timedelta(days=1)
-
-        if "今天" in time_str:
-            return now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        # 处理"最近"
-        if "最近" in time_str:
-            # 默认为最近1小时
-            return now - timedelta(hours=1)
+        time_str = time_str.lower()
+
+        match = self._TIME_AGO_RE.match(time_str)
+        if match:
+            unit = self._TIME_UNITS[match.group(2)]
+            return now - timedelta(**{unit: int(match.group(1))})
+
+        for word, start_of in self._TIME_WORDS.items():
+            if word in time_str:
+                return start_of(now)
 
         return None
 
+    def _delete_matching(self, conditions) -> list:
+        """删除符合条件的记忆（不提交），返回被删除记忆的 ID"""
+        where = and_(*conditions)
+        if getattr(self.db.get_bind().dialect, 'delete_returning', False):
+            return self.db.execute(
+                delete(Memory)
+                .where(where)
+                .returning(Memory.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+
+        # 不支持 DELETE ... RETURNING（SQLAlchemy 1.x、SQLite < 3.35）：
+        # 同一事务中先查 ID，再按 ID 删除
+        ids = [row[0] for row in self.db.query(Memory.id).filter(where).all()]
+        if ids:
+            self.db.execute(
+                delete(Memory)
+                .where(Memory.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+        return ids
+
     async def execute(self, **kwargs) -> dict:
         """
         执行记忆删除
@@ -119,23 +139,33 @@ class DeleteMemoryTool(Tool):
         Returns:
             {"success": bool, "data": str}
         """
-        keywords = kwargs.get("keywords")
-        time_range = kwargs.get("time_range")
-        tags = kwargs.get("tags")
-        confirm = kwargs.get("confirm", False)
-
+        return await asyncio.to_thread(
+            self._execute_sync,
+            kwargs.get("keywords"),
+            kwargs.get("time_range"),
+            kwargs.get("tags"),
+            kwargs.get("confirm", False)
+        )
+
+    def _execute_sync(self, keywords, time_range, tags, confirm) -> dict:
+        """在工作线程中执行查询/删除（持有会话锁）"""
+        with self._db_lock:
+            return self._delete_memories(keywords, time_range, tags, confirm)
+
+    def _delete_memories(self, keywords, time_range, tags, confirm) -> dict:
         try:
             # 构建查询条件
             conditions = []
 
-            # 关键词过滤
+            # 关键词过滤：多个关键词合并为一个正则交给数据库一次匹配
+            # （由 idx_memories_content_trgm 三元组索引支持，见迁移 013）
             if keywords:
-                keyword_list = [k.strip() for k in keywords.split(",")]
-                keyword_conditions = [
-                    Memory.content.contains(kw)
-                    for kw in keyword_list
+                keyword_list = [
+                    k.strip() for k in keywords.split(",") if k.strip()
                 ]
-                conditions.append(or_(*keyword_conditions))
+                if keyword_list:
+                    pattern = "|".join(re.escape(kw) for kw in keyword_list)
+                    conditions.append(Memory.content.regexp_match(pattern))
 
             # 时间范围过滤
             if time_range:
@@ -168,49 +198,64 @@ class DeleteMemoryTool(Tool):
             if conditions:
                 query = query.filter(and_(*conditions))
 
-            memories = query.all()
+            # 确认后删除：DELETE ... WHERE ... RETURNING id（见 _delete_matching），
+            # 不加载 ORM 对象；返回的 ID 用于同步清理语义索引
+            if confirm:
+                deleted_ids = self._delete_matching(conditions)
+                deleted_count = len(deleted_ids)
+                if not deleted_count:
+                    self.db.rollback()
+                    return {
+                        "success": True,
+                        "data": "没有找到符合条件的记忆"
+                    }
+
+                self.db.commit()
+                get_semantic_search_manager().remove_memories(deleted_ids)
+                invalidate_search_cache()
+
+                logger.info(
+                    f"已删除 {deleted_count} 条记忆 "
+                    f"(keywords={keywords}, time_range={time_range}, "
+                    f"tags={tags})"
+                )
 
-            if not memories:
+                return {
+                    "success": True,
+                    "data": f"✅ 已成功删除 {deleted_count} 条记忆"
+                }
+
+            # 没有确认，只返回预览：总数用 COUNT，预览只取最近 5 条的两列
+            total = query.count()
+
+            if not total:
                 return {
                     "success": True,
                     "data": "没有找到符合条件的记忆"
                 }
 
-            # 如果没有确认，只返回预览
-            if not confirm:
-                preview = f"找到 {len(memories)} 条符合条件的记忆：\n"
-                for i, mem in enumerate(memories[:5], 1):
-                    content = str(mem.content)[:50] + "..." if len(
-                        str(mem.content)
-                    ) > 50 else str(mem.content)
-                    time_str = mem.created_at.strftime('%Y-%m-%d %H:%M')
-                    preview += f"{i}. [{time_str}] {content}\n"
-
-                if len(memories) > 5:
-                    preview += f"...还有 {len(memories) - 5} 条记忆\n"
-
-                preview += (
-                    "\n如果确认删除，请再次调用并设置 confirm=true"
-                )
-                return {"success": True, "data": preview}
+            preview_rows = (
+                query.with_entities(Memory.content, Memory.created_at)
+                .order_by(Memory.created_at.desc())
+                .limit(5)
+                .all()
+            )
 
-            # 确认后删除
-            deleted_count = len(memories)
-            for memory in memories:
-                self.db.delete(memory)
+            preview = f"找到 {total} 条符合条件的记忆：\n"
+            for i, (content, created_at) in enumerate(preview_rows, 1):
+                content = str(content)
+                if len(content) > 50:
+                    content = content[:50] + "..."
+                time_str = created_at.strftime('%Y-%m-%d %H:%M')
+                preview += f"{i}. [{time_str}] {content}\n"
 
-            self.db.commit()
+            if total > 5:
+                preview += f"...还有 {total - 5} 条记忆\n"
 
-            logger.info(
-                f"已删除 {deleted_count} 条记忆 "
-                f"(keywords={keywords}, time_range={time_range}, "
-                f"tags={tags})"
+            preview += (
+                "\n如果确认删除，请再次调用并设置 confirm=true"
             )
-
-            return {
-                "success": True,
-                "data": f"✅ 已成功删除 {deleted_count} 条记忆"
-            }
+            return {"success": True, "data": preview}
 
         except Exception as e:
             logger.error(f"删除记忆失败: {e}", exc_info=True)
@@ -3,6 +3,7 @@
 支持智能创建时间提醒
 """
 from datetime import datetime, timedelta
+import asyncio
 import re
 from modules.tool_manager import Tool, ToolParameter
 
@@ -16,6 +17,8 @@ class ReminderTool(Tool):
         self.description = "提醒管理工具（创建、查询、删除）"
         self.category = "reminder"
         self.enabled = True
+        # 数据库操作在线程中执行，不阻塞事件循环
+        self.async_safe = True
         self.parameters = [
             ToolParameter(
                 name="operation",
@@ -67,21 +70,7 @@ class ReminderTool(Tool):
             **kwargs: 包含 operation, content, time_desc, title, reminder_id, user_id, status
         """
         try:
-            operation = kwargs.get("operation", "create")
-            user_id = kwargs.get("user_id", "default_user")
-
-            from modules.reminder_manager import get_reminder_manager
-            reminder_mgr = get_reminder_manager()
-
-            if operation == "list":
-                return self._handle_list(reminder_mgr, user_id, kwargs)
-            elif operation == "delete":
-                return self._handle_delete(reminder_mgr, kwargs)
-            elif operation == "update":
-                return self._handle_update(reminder_mgr, kwargs)
-            else:
-                return self._handle_create(reminder_mgr, kwargs, user_id)
-
+            return await asyncio.to_thread(self._execute_sync, kwargs)
         except Exception as e:
             import logging
             logging.error(f"提醒操作失败: {e}")
@@ -90,6 +79,23 @@ class ReminderTool(Tool):
                 "data": f"❌ 操作失败: {str(e)}"
             }
 
+    def _execute_sync(self, kwargs: dict) -> dict:
+        """在工作线程中分发提醒操作"""
+        operation = kwargs.get("operation", "create")
+        user_id = kwargs.get("user_id", "default_user")
+
+        from modules.reminder_manager import get_reminder_manager
+        reminder_mgr = get_reminder_manager()
+
+        if operation == "list":
+            return self._handle_list(reminder_mgr, user_id, kwargs)
+        elif operation == "delete":
+            return self._handle_delete(reminder_mgr, kwargs)
+        elif operation == "update":
+            return self._handle_update(reminder_mgr, kwargs)
+        else:
+            return self._handle_create(reminder_mgr, kwargs, user_id)
+
     def _handle_list(self, mgr, user_id: str, kwargs: dict) -> dict:
         """处理查询请求"""
         import logging
@@ -26,6 +26,8 @@ class SearchTool(Tool):
     def __init__(self):
         super().__init__()
         self.name = "search"
+        # DuckDuckGo 请求已在线程池中执行
+        self.async_safe = True
         self.description = (
             "网络搜索工具 - 使用DuckDuckGo获取实时信息。"
             "必须使用的场景："
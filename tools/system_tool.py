@@ -3,6 +3,7 @@
 
 提供本地系统信息查询、文件操作、应用启动等功能
 """
+import asyncio
 import platform
 import psutil
 from typing import Dict, Any
@@ -21,6 +22,7 @@ class SystemInfoTool(Tool):
         self.name = "system_info"
         self.description = "查询系统信息（CPU、内存、磁盘、进程等）"
         self.category = "system"
+        self.async_safe = True
 
         self.parameters = [
             ToolParameter(
@@ -44,7 +46,8 @@ class SystemInfoTool(Tool):
             result_text = ""
 
             if info_type in ["cpu", "all"]:
-                result_text += self._get_cpu_info()
+                # cpu_percent(interval=1) 会阻塞 1 秒，放到线程中执行
+                result_text += await asyncio.to_thread(self._get_cpu_info)
 
             if info_type in ["memory", "all"]:
                 result_text += "\n" + self._get_memory_info()
@@ -143,6 +146,7 @@ class TimeTool(Tool):
         self.name = "time"
         self.description = "查询当前时间和日期"
         self.category = "system"
+        self.async_safe = True
 
         self.parameters = [
             ToolParameter(
@@ -206,6 +210,8 @@ class CalculatorTool(Tool):
         self.name = "calculator"
         self.description = "执行数学计算（支持基本四则运算和常用数学函数）"
         self.category = "system"
+        self.cacheable = True
+        self.async_safe = True
 
         self.parameters = [
             ToolParameter(
@@ -3,6 +3,7 @@
 支持查询和删除任务
 """
 from modules.tool_manager import Tool, ToolParameter
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +18,8 @@ class TaskTool(Tool):
         self.description = "任务管理工具：创建、查询、修改、删除任务"
         self.category = "task"
         self.enabled = True
+        # 数据库操作在线程中执行，不阻塞事件循环
+        self.async_safe = True
         self.parameters = [
             ToolParameter(
                 name="operation",
@@ -78,26 +81,7 @@ class TaskTool(Tool):
                      status, priority, user_id, session_id
         """
         try:
-            operation = kwargs.get("operation", "list")
-            user_id = kwargs.get("user_id", "default_user")
-
-            # 延迟导入避免循环依赖
-            from modules.task_manager import get_task_manager
-            task_mgr = get_task_manager()
-
-            if operation == "create":
-                return await self._handle_create(task_mgr, user_id, kwargs)
-            elif operation == "list":
-                return await self._handle_list(task_mgr, user_id, kwargs)
-            elif operation == "update":
-                return await self._handle_update(task_mgr, kwargs)
-            elif operation == "delete":
-                return await self._handle_delete(task_mgr, kwargs)
-            else:
-                return {
-                    "success": False,
-                    "data": f"❌ 不支持的操作类型: {operation}"
-                }
+            return await asyncio.to_thread(self._execute_sync, kwargs)
 
         except Exception as e:
             logger.error(f"任务操作失败: {e}")
@@ -106,7 +90,30 @@ class TaskTool(Tool):
                 "data": f"❌ 操作失败: {str(e)}"
             }
 
-    async def _handle_create(self, mgr, user_id: str, kwargs) -> dict:
+    def _execute_sync(self, kwargs: dict) -> dict:
+        """在工作线程中分发任务操作"""
+        operation = kwargs.get("operation", "list")
+        user_id = kwargs.get("user_id", "default_user")
+
+        # 延迟导入避免循环依赖
+        from modules.task_manager import get_task_manager
+        task_mgr = get_task_manager()
+
+        if operation == "create":
+            return self._handle_create(task_mgr, user_id, kwargs)
+        elif operation == "list":
+            return self._handle_list(task_mgr, user_id, kwargs)
+        elif operation == "update":
+            return self._handle_update(task_mgr, kwargs)
+        elif operation == "delete":
+            return self._handle_delete(task_mgr, kwargs)
+        else:
+            return {
+                "success": False,
+                "data": f"❌ 不支持的操作类型: {operation}"
+            }
+
+    def _handle_create(self, mgr, user_id: str, kwargs) -> dict:
         """处理创建任务请求"""
         title = kwargs.get("title")
         if not title:
@@ -145,7 +152,7 @@ class TaskTool(Tool):
                 "data": f"❌ 创建失败: {str(e)}"
             }
 
-    async def _handle_list(self, mgr, user_id: str, kwargs) -> dict:
+    def _handle_list(self, mgr, user_id: str, kwargs) -> dict:
         """处理查询请求"""
         status = kwargs.get("status")
         tasks = mgr.get_tasks_by_user(user_id, status=status, limit=10)
@@ -204,7 +211,7 @@ class TaskTool(Tool):
             "data": "\n".join(lines)
         }
 
-    async def _handle_update(self, mgr, kwargs) -> dict:
+    def _handle_update(self, mgr, kwargs) -> dict:
         """处理更新任务请求"""
         task_id = kwargs.get("task_id")
         user_id = kwargs.get("user_id", "default_user")
@@ -264,7 +271,7 @@ class TaskTool(Tool):
                 "data": "❌ 没有可更新的内容"
             }
 
-    async def _handle_delete(self, mgr, kwargs) -> dict:
+    def _handle_delete(self, mgr, kwargs) -> dict:
         """处理删除请求"""
         task_id = kwargs.get("task_id")
         user_id = kwargs.get("user_id", "default_user")
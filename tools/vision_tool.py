@@ -1,4 +1,5 @@
 import os
+import asyncio
 import logging
 import base64
 import requests
@@ -16,6 +17,7 @@ class VisionTool(Tool):
     def __init__(self):
         super().__init__()
         self.name = "vision_analysis"
+        self.async_safe = True  # 图片分析在线程中执行
         self.description = "Analyze images to identify people using face recognition."
         self.category = "vision"
         self.parameters = [
@@ -94,7 +96,7 @@ class VisionTool(Tool):
             else:
                 # 优先使用百度人脸识别 API
                 try:
-                    if self.baidu_face._is_configured():
+                    if self.baidu_face._configured:
                         logger.info("🔍 使用百度人脸识别 API")
                         recognition_result = self.baidu_face.recognize_faces(
                             full_path)
@@ -341,8 +343,10 @@ class VisionTool(Tool):
 
             logger.info(f"👁️ VisionTool analyzing: {image_path}")
 
-            # Use the hybrid analysis method
-            analysis_result = self.analyze_image(image_path, prompt=prompt)
+            # Use the hybrid analysis method (blocking HTTP calls, run in a thread)
+            analysis_result = await asyncio.to_thread(
+                self.analyze_image, image_path, prompt=prompt
+            )
 
             if not analysis_result.get("success"):
                 return {
@@ -408,6 +412,7 @@ class RegisterFaceTool(Tool):
     def __init__(self):
         super().__init__()
         self.name = "register_face"
+        self.async_safe = True  # 人脸注册在线程中执行
         self.description = (
             "注册人脸以便后续识别。当用户说'这是XXX'、'记住这是XXX'、"
             "'帮我记住他/她'、'这个人叫XXX'等表达时使用此工具。"
@@ -478,14 +483,18 @@ class RegisterFaceTool(Tool):
                 f"👤 Registering face for '{person_name}' from {full_path}")
 
             # 优先使用百度人脸识别 API
-            if self.baidu_face._is_configured():
+            if self.baidu_face._configured:
                 logger.info("📝 使用百度人脸识别 API 注册人脸")
-                result = self.baidu_face.register_face(full_path, person_name)
+                # 阻塞的 HTTP 调用放到线程中执行，不阻塞事件循环
+                result = await asyncio.to_thread(
+                    self.baidu_face.register_face, full_path, person_name
+                )
             else:
                 # 回退到本地 face_recognition
                 logger.info("📝 使用本地 face_recognition 注册人脸")
-                result = self.face_manager.register_face(
-                    full_path, person_name)
+                result = await asyncio.to_thread(
+                    self.face_manager.register_face, full_path, person_name
+                )
 
             return result
 
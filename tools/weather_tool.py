@@ -60,6 +60,7 @@ class WeatherTool(Tool):
             "查询指定城市的实时天气和天气预报（使用Open-Meteo免费API）"
         )
         self.category = "weather"
+        self.async_safe = True  # 网络请求使用 aiohttp
         self.enabled = True  # Open-Meteo无需API key，始终可用
 
         # 定义参数